@@ -1,27 +1,429 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, List, Optional, Set, TYPE_CHECKING
+from datetime import datetime, timedelta
+from urllib.parse import quote
 import asyncio
-from playwright.async_api import async_playwright, Browser, Page
+import logging
+import re
+from config.base_config import BaseConfig
+from base.browser import RequestBlocker, BrowserRecycler, ACTION_RESTART, child_pids
+from tools.concurrency import concurrency
+from tools.http_cache import get_cache
+from tools.metrics import BROWSER_CONTEXTS, QUEUE_DEPTH
+from tools.timing import run_timer, STAGE_BROWSER_LAUNCH, STAGE_NAVIGATION, STAGE_WAIT
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+logger = logging.getLogger(__name__)
+
+# 文章URL中的日期，如 /2025/03/01/
+_URL_DATE_RE = re.compile(r'/(20\d{2})/(\d{1,2})/(\d{1,2})/')
+
+
+def url_date(url: str) -> Optional[datetime]:
+    """从文章URL中提取发布日期，没有日期时返回None"""
+    match = _URL_DATE_RE.search(url)
+    if not match:
+        return None
+    try:
+        return datetime(*map(int, match.groups()))
+    except ValueError:
+        return None
+
 
 class AbstractCrawler(ABC):
     """爬虫抽象基类"""
     
+    # 站点名称，用于日志和耗时统计
+    site: str = ''
+    
     def __init__(self):
-        self.browser: Optional[Browser] = None
-        self.page: Optional[Page] = None
+        self.playwright = None
+        self.browser: Optional['Browser'] = None
+        self.context: Optional['BrowserContext'] = None
+        self.page: Optional['Page'] = None
+        self.blocker: Optional[RequestBlocker] = None
+        # 为True时优先通过站点接口获取文章，接口不可用时才启动浏览器
+        self.use_api = False
+        # 已存储文章的URL，翻页时遇到整页都已存储就停止
+        self.known_urls: Set[str] = set()
+        # 运行日志(SiteJournal)，用于断点续爬
+        self.journal = None
+        # 文章处理完成后立即保存的回调，返回是否保存成功；未设置时由调用方在爬取结束后统一保存
+        self.article_sink: Optional[Callable[[Any], Awaitable[bool]]] = None
+        self._local_tagger = None
+        # 多进程模式下接收文章链接的回调，设置后列表页发现的链接放入任务队列，由工作进程抓取
+        self.link_sink: Optional[Callable[[List[str], Optional[str]], Awaitable[None]]] = None
+        # 订阅和站点地图增量发现(FeedDiscovery)，None表示渲染列表页获取链接
+        self.discovery = None
+        # 已存储的最新文章发布时间，增量发现时只获取更新的文章
+        self.since = None
+        # 新建页面时依次执行的异步钩子，如回放模式的路由
+        self.page_hooks: List[Callable[['Page'], Awaitable[None]]] = []
+        # 主页面的额外请求头，更换上下文后重新设置到新的主页面
+        self.extra_headers: Optional[dict] = None
+        self.recycler = BrowserRecycler(BaseConfig.BROWSER_CONFIG.get('recycle', {}), self.site)
+        # 上下文 -> 正在使用的页面数；已更换的旧上下文 -> 需要一起关闭的旧浏览器(没有时为None)
+        self._pages_in_use: dict = {}
+        self._retired: dict = {}
         
     async def init_browser(self):
         """初始化浏览器"""
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=True)
-        self.page = await self.browser.new_page()
+        if self.browser:
+            return False
+        try:
+            # 延迟导入Playwright，只有真正启动浏览器时才加载
+            from playwright.async_api import async_playwright
+            browser_config = BaseConfig.BROWSER_CONFIG
+            with run_timer.stage(STAGE_BROWSER_LAUNCH, self.site):
+                drivers = child_pids()
+                self.playwright = await async_playwright().start()
+                # 新增的子进程是Playwright驱动，Chromium由驱动启动，测量内存时统计整个进程树
+                self.recycler.watch(child_pids() - drivers)
+                self.browser = await self.launch_browser()
+                
+            self.blocker = RequestBlocker(browser_config['block_policy'], self.site)
+            self.context = await self.new_context(self.browser)
+            
+            self.page = await self.context.new_page()
+            # 设置默认超时时间，避免无限等待
+            self.page.set_default_timeout(browser_config['default_timeout'])
+            
+            logger.info("浏览器初始化完成")
+            return True
+        except Exception as e:
+            logger.error(f"浏览器初始化失败: {str(e)}")
+            return False
+        
+    async def launch_browser(self) -> 'Browser':
+        """启动Chromium"""
+        return await self.playwright.chromium.launch(headless=BaseConfig.BROWSER_CONFIG['headless'])
+        
+    async def new_context(self, browser: 'Browser') -> 'BrowserContext':
+        """创建上下文并应用统一的请求拦截策略，拦截图片、字体、广告和跟踪请求"""
+        browser_config = BaseConfig.BROWSER_CONFIG
+        context = await browser.new_context(
+            user_agent=browser_config['user_agent'],
+            viewport=browser_config['viewport']
+        )
+        await self.blocker.apply(context)
+        cache = get_cache()
+        if cache:
+            # 在拦截策略之后注册，先于拦截策略处理；会被拦截的请求交还给拦截策略
+            await cache.route(context, self.blocker.match)
+        BROWSER_CONTEXTS.inc()
+        return context
+        
+    async def set_extra_headers(self, headers: dict):
+        """设置主页面的额外请求头，更换上下文后仍然有效"""
+        self.extra_headers = headers
+        await self.page.set_extra_http_headers(headers)
+        
+    async def maybe_recycle(self):
+        """页面数或浏览器内存超过阈值时更换上下文或重启浏览器
+        
+        新上下文创建后立即替换当前上下文和主页面，之后的抓取都在新上下文中进行；
+        旧上下文中仍在抓取的页面不受影响，等它们全部完成后再关闭旧上下文(和旧浏览器)。
+        """
+        if self.context is None:
+            return
+        action = self.recycler.decide()
+        if action is None:
+            return
+        # 先重置页面计数，创建新上下文期间其他抓取不会重复触发更换
+        self.recycler.recycled(action)
+        browser, context = self.browser, None
+        try:
+            if action == ACTION_RESTART:
+                with run_timer.stage(STAGE_BROWSER_LAUNCH, self.site):
+                    browser = await self.launch_browser()
+            context = await self.new_context(browser)
+            page = await self.new_page(context)
+            if self.extra_headers:
+                await page.set_extra_http_headers(self.extra_headers)
+        except Exception as e:
+            logger.error(f"更换浏览器上下文失败，继续使用当前上下文: {str(e)}")
+            if context:
+                await self._close_context(context, browser if browser is not self.browser else None)
+            elif browser is not self.browser:
+                await browser.close()
+            return
+        old_context, old_browser = self.context, self.browser
+        self.browser, self.context, self.page = browser, context, page
+        self._retired[old_context] = old_browser if browser is not old_browser else None
+        if not self._pages_in_use.get(old_context):
+            await self._close_context(old_context, self._retired.pop(old_context))
+            
+    def _hold_context(self, context):
+        """记录上下文中又有一个页面开始抓取"""
+        if context is not None:
+            self._pages_in_use[context] = self._pages_in_use.get(context, 0) + 1
+            
+    async def _release_context(self, context):
+        """页面抓取结束，已更换的旧上下文没有正在使用的页面时将其关闭"""
+        if context is None:
+            return
+        count = self._pages_in_use.pop(context, 1) - 1
+        if count:
+            self._pages_in_use[context] = count
+        elif context in self._retired:
+            await self._close_context(context, self._retired.pop(context))
+            
+    async def _close_context(self, context: 'BrowserContext', browser: Optional['Browser'] = None):
+        """关闭上下文，browser不为None时随后关闭该浏览器"""
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"关闭浏览器上下文失败: {str(e)}")
+        BROWSER_CONTEXTS.dec()
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"关闭浏览器失败: {str(e)}")
         
     async def close_browser(self):
         """关闭浏览器"""
+        if self.blocker:
+            self.blocker.report()
+        self.recycler.report()
+        for context, browser in list(self._retired.items()):
+            await self._close_context(context, browser)
+        self._retired.clear()
+        self._pages_in_use.clear()
         if self.page:
             await self.page.close()
+        if self.context:
+            await self.context.close()
+            BROWSER_CONTEXTS.dec()
         if self.browser:
             await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+            
+    async def new_page(self, context: Optional['BrowserContext'] = None) -> 'Page':
+        """在上下文(默认为当前上下文)中新建页面，应用默认超时和页面钩子"""
+        page = await (context or self.context).new_page()
+        page.set_default_timeout(BaseConfig.BROWSER_CONFIG['default_timeout'])
+        for hook in self.page_hooks:
+            await hook(page)
+        return page
+        
+    async def fetch_concurrently(self, urls: List[str],
+                                 fetch: Callable[['Page', str], Awaitable[Any]]) -> list:
+        """按主机的自适应并发上限同时抓取多个页面
+        
+        每个fetch(page, url)独占一个页面，空闲页面会被复用，超出的页面按需创建并在结束后关闭。
+        结果顺序与urls一致，抛出异常的URL结果为None。没有浏览器上下文时(如基准测试)按顺序抓取。
+        每次抓取前检查是否需要更换上下文，旧上下文中的空闲页面不再使用，随旧上下文一起关闭。
+        """
+        remaining = len(urls)
+        QUEUE_DEPTH.labels(self.site).set(remaining)
+        # (页面, 所属上下文)
+        idle = [(self.page, self.context)] if self.page else []
+        created = []
+        
+        async def run(url: str):
+            nonlocal remaining
+            try:
+                async with concurrency.slot(url):
+                    await self.maybe_recycle()
+                    while idle and idle[-1][1] is not self.context:
+                        idle.pop()
+                    if idle:
+                        page, context = idle.pop()
+                    else:
+                        context = self.context
+                        page = await self.new_page(context)
+                        created.append((page, context))
+                    self._hold_context(context)
+                    try:
+                        result = await fetch(page, url)
+                    finally:
+                        self.recycler.record_page()
+                        if context is self.context:
+                            idle.append((page, context))
+                        await self._release_context(context)
+                if self.journal:
+                    self.journal.record_fetched(url, result is not None)
+                return result
+            except Exception as e:
+                logger.error(f"爬取文章内容失败: {url}, 错误: {str(e)}")
+                return None
+            finally:
+                remaining -= 1
+                QUEUE_DEPTH.labels(self.site).set(remaining)
+        
+        try:
+            if self.context is None:
+                return [await run(url) for url in urls]
+            return await asyncio.gather(*(run(url) for url in urls))
+        finally:
+            # 旧上下文中创建的页面已随上下文关闭
+            for page, context in created:
+                if context is self.context:
+                    await page.close()
+            if created:
+                logger.info(f"并发抓取完成，最多同时使用{len(created) + 1}个页面")
+            
+    def resume_links(self, keyword: Optional[str] = None) -> Optional[List[str]]:
+        """断点续爬时返回关键词上次已发现但尚未保存的链接，没有记录时返回None"""
+        if not self.journal:
+            return None
+        return self.journal.pending_links(keyword)
+        
+    def commit_discovery(self, links: List[str], articles: list):
+        """增量发现的文章都已保存(或交给任务队列)时才保存订阅的缓存校验信息
+        
+        有文章抓取失败时不保存，下次运行重新完整读取订阅和站点地图，
+        发布时间仍晚于已存储的最新文章的失败文章会再次被发现。
+        """
+        if not self.discovery:
+            return
+        if not self.link_sink:
+            done = {article.url for article in articles}
+            if self.journal:
+                done |= self.journal.saved
+            failed = [url for url in links if url not in done]
+            if failed:
+                logger.warning(f"{self.site} 有{len(failed)}篇增量发现的文章未保存，本次不保存订阅的缓存校验信息")
+                return
+        self.discovery.commit()
+        
+    def checkpoint_links(self, links: List[str], keyword: Optional[str] = None) -> List[str]:
+        """把发现的链接记入运行日志，返回其中尚未保存的链接"""
+        if not self.journal:
+            return links
+        self.journal.record_discovered(keyword, links)
+        return [url for url in links if url not in self.journal.saved]
+        
+    async def defer_links(self, links: List[str], keyword: Optional[str] = None) -> bool:
+        """设置了link_sink时把链接交给任务队列并返回True，调用方不再自行抓取文章"""
+        if not self.link_sink:
+            return False
+        await self.link_sink(links, keyword)
+        return True
+        
+    async def emit_article(self, article) -> bool:
+        """文章处理完成后立即保存并记入运行日志，进程中途退出也不会丢失已爬取的文章"""
+        if not self.article_sink:
+            return False
+        if self.config.get('local_tagging') and self.config.get('search_keywords'):
+            # 本地打标签模式下只保存命中关键词的文章
+            if self._local_tagger is None:
+                from tools.keyword_tagger import KeywordTagger
+                self._local_tagger = KeywordTagger(self.config['search_keywords'])
+            if not self._local_tagger.tag(article):
+                return False
+        saved = await self.article_sink(article)
+        if saved and self.journal:
+            self.journal.record_saved(article.url)
+        return saved
+        
+    def listing_page_url(self, number: int) -> str:
+        """列表页第number页的地址，模板见站点配置pagination.listing_page_url"""
+        template = self.config.get('pagination', {}).get('listing_page_url', '{latest_url}page/{page}/')
+        latest_url = self.config.get('latest_url', '').rstrip('/') + '/'
+        return template.format(latest_url=latest_url, base_url=self.config.get('base_url', ''), page=number)
+        
+    def search_page_url(self, keyword: str, number: int) -> str:
+        """搜索结果第number页的地址，模板见站点配置pagination.search_page_url"""
+        template = self.config.get('pagination', {}).get('search_page_url', '{base_url}?s={keyword}&paged={page}')
+        return template.format(base_url=self.config.get('base_url', ''), keyword=quote(keyword), page=number)
+        
+    async def collect_links(self, first_links: List[str], max_articles: int,
+                            page_url: Optional[Callable[[int], str]] = None,
+                            wait_seconds: float = 2) -> List[str]:
+        """从已加载的第1页开始翻页收集需要爬取的文章链接
+        
+        已存储(known_urls)或URL日期早于截止日期的链接会被跳过；某一页没有新链接、或新链接全部被跳过时停止翻页。
+        翻页时同时预取后一页，停止时取消未完成的预取。page_url为None时只处理第1页。
+        
+        Args:
+            first_links: 第1页提取到的链接
+            max_articles: 最多返回的链接数
+            page_url: 页码 -> 页面地址
+            wait_seconds: 每页加载后的等待时间
+        """
+        pagination = self.config.get('pagination', {})
+        max_pages = pagination.get('max_pages', 1) if page_url else 1
+        skip_known = pagination.get('skip_known', True)
+        cutoff_days = pagination.get('cutoff_days')
+        cutoff = datetime.now() - timedelta(days=cutoff_days) if cutoff_days else None
+        
+        links: List[str] = []
+        seen: Set[str] = set()
+        
+        def accept(page_links: List[str], number: int) -> bool:
+            """处理一页链接，返回是否继续翻页"""
+            new = [url for url in page_links if url not in seen]
+            seen.update(new)
+            fresh = []
+            for url in new:
+                if skip_known and url in self.known_urls:
+                    continue
+                published = url_date(url)
+                if cutoff and published and published < cutoff:
+                    continue
+                fresh.append(url)
+            links.extend(fresh[:max_articles - len(links)])
+            if not new:
+                logger.info(f"第{number}页没有新链接，停止翻页")
+                return False
+            if not fresh:
+                logger.info(f"第{number}页的文章都已存储或早于截止日期，停止翻页")
+                return False
+            return len(links) < max_articles
+        
+        if not accept(first_links, 1) or max_pages <= 1:
+            return links
+        
+        # 两个页面交替加载，当前页处理时下一页已经在加载
+        pages = [self.page]
+        if self.context is not None:
+            pages.append(await self.new_page())
+        
+        async def load(number: int) -> Optional[List[str]]:
+            page = pages[number % len(pages)]
+            url = page_url(number)
+            self.recycler.record_page()
+            async with concurrency.slot(url) as slot:
+                with run_timer.stage(STAGE_NAVIGATION, self.site, url):
+                    response = await page.goto(url, wait_until="networkidle")
+                slot.check_response(response)
+            if response is not None and response.status >= 400:
+                # 超出最后一页
+                return None
+            with run_timer.stage(STAGE_WAIT, self.site):
+                await asyncio.sleep(wait_seconds)
+            return await self.client.get_latest_articles(page, max_articles)
+        
+        pending = {}
+        for number in range(2, min(max_pages, 1 + len(pages)) + 1):
+            pending[number] = asyncio.create_task(load(number))
+        try:
+            number = 2
+            while number in pending:
+                try:
+                    page_links = await pending.pop(number)
+                except Exception as e:
+                    logger.error(f"加载第{number}页失败: {page_url(number)}, 错误: {str(e)}")
+                    break
+                if page_links is None or not accept(page_links, number):
+                    break
+                following = number + len(pages)
+                if following <= max_pages:
+                    pending[following] = asyncio.create_task(load(following))
+                number += 1
+        finally:
+            for task in pending.values():
+                task.cancel()
+            await asyncio.gather(*pending.values(), return_exceptions=True)
+            for page in pages[1:]:
+                await page.close()
+        logger.info(f"翻页收集到{len(links)}个需要爬取的文章链接")
+        return links
             
     @abstractmethod
     async def crawl(self):
@@ -33,6 +435,14 @@ class AbstractCrawler(ABC):
         """解析HTML内容"""
         pass
     
+    def filter_by_keywords(self, articles: list, keywords: List[str]) -> list:
+        """本地打标签模式：为文章打上命中的关键词标签，只保留至少命中一个关键词的文章"""
+        from tools.keyword_tagger import KeywordTagger
+        tagger = KeywordTagger(keywords)
+        matched = [article for article in articles if tagger.tag(article)]
+        logger.info(f"本地关键词筛选: {len(matched)}/{len(articles)} 篇文章命中 {keywords}")
+        return matched
+        
     async def save(self, data):
         """保存数据"""
         pass 
\ No newline at end of file
@@ -0,0 +1,241 @@
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from tools.metrics import BLOCKED_REQUESTS, BLOCKED_BYTES, BROWSER_RSS, BROWSER_RECYCLES
+from tools.timing import run_timer
+
+logger = logging.getLogger(__name__)
+
+
+class RequestBlocker:
+    """浏览器请求拦截策略
+
+    按资源类型、域名黑名单和URL关键字拦截请求，应用到浏览器上下文后
+    对该上下文中的所有页面生效。被拦截请求的字节数无法直接得知，
+    按配置中各资源类型的典型大小估算。
+    """
+
+    def __init__(self, policy: dict, site: str = ''):
+        self.site = site
+        self.enabled = policy.get('enabled', True)
+        self.resource_types = set(policy.get('resource_types', []))
+        if policy.get('block_fonts'):
+            self.resource_types.add('font')
+        if policy.get('block_stylesheets'):
+            self.resource_types.add('stylesheet')
+        self.blocked_domains = tuple(d.lower().lstrip('.') for d in policy.get('blocked_domains', []))
+        self.url_keywords = tuple(policy.get('url_keywords', []))
+        self.estimated_bytes = policy.get('estimated_bytes', {})
+
+        self.allowed = 0
+        self.blocked: Dict[str, int] = defaultdict(int)
+        self.bytes_saved = 0
+
+    def _domain_blocked(self, url: str) -> bool:
+        host = (urlsplit(url).hostname or '').lower()
+        return any(host == domain or host.endswith('.' + domain) for domain in self.blocked_domains)
+
+    def match(self, resource_type: str, url: str) -> Optional[str]:
+        """判断请求是否应被拦截，返回拦截原因，不拦截时返回None"""
+        if not self.enabled or resource_type == 'document':
+            return None
+        if resource_type in self.resource_types:
+            return f"type:{resource_type}"
+        if self.blocked_domains and self._domain_blocked(url):
+            return 'domain'
+        if any(keyword in url for keyword in self.url_keywords):
+            return 'url'
+        return None
+
+    async def handle(self, route):
+        """Playwright路由回调"""
+        request = route.request
+        reason = self.match(request.resource_type, request.url)
+        if reason is None:
+            self.allowed += 1
+            await route.continue_()
+            return
+
+        saved = self.estimated_bytes.get(request.resource_type, self.estimated_bytes.get('other', 0))
+        self.blocked[reason] += 1
+        self.bytes_saved += saved
+        BLOCKED_REQUESTS.labels(self.site, reason).inc()
+        BLOCKED_BYTES.labels(self.site).inc(saved)
+        await route.abort()
+
+    async def apply(self, context):
+        """将拦截策略应用到浏览器上下文(或单个页面)"""
+        if self.enabled:
+            await context.route('**/*', self.handle)
+
+    def stats(self) -> dict:
+        """拦截统计"""
+        return {
+            'allowed': self.allowed,
+            'blocked': sum(self.blocked.values()),
+            'blocked_by_reason': dict(self.blocked),
+            'estimated_bytes_saved': self.bytes_saved
+        }
+
+    def report(self):
+        """输出拦截统计并写入运行报告"""
+        stats = self.stats()
+        if not stats['blocked'] and not stats['allowed']:
+            return
+        run_timer.add_count('blocked_requests', self.site, stats['blocked'])
+        run_timer.add_count('allowed_requests', self.site, stats['allowed'])
+        run_timer.add_count('estimated_bytes_saved', self.site, stats['estimated_bytes_saved'])
+        logger.info(f"请求拦截统计({self.site}): 放行{stats['allowed']}个, 拦截{stats['blocked']}个 "
+                    f"{stats['blocked_by_reason']}, 预计节省{stats['estimated_bytes_saved'] / 1024 / 1024:.1f}MB")
+
+
+# 上下文回收动作
+ACTION_RECYCLE = 'recycle'  # 更换浏览器上下文
+ACTION_RESTART = 'restart'  # 重启浏览器进程
+
+
+def _process_table() -> Optional[Dict[int, Tuple[int, int]]]:
+    """读取/proc中各进程的(父进程id, 常驻内存字节)，非Linux系统返回None"""
+    if not os.path.isdir('/proc'):
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    table = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                # 进程名可能包含空格和括号，从最后一个右括号之后开始解析
+                fields = f.read().rsplit(b')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        table[int(name)] = (int(fields[1]), int(fields[21]) * page_size)
+    return table
+
+
+def child_pids(pid: Optional[int] = None) -> Set[int]:
+    """进程的直接子进程id，默认为当前进程"""
+    pid = pid or os.getpid()
+    try:
+        import psutil
+        return {child.pid for child in psutil.Process(pid).children()}
+    except ImportError:
+        pass
+    table = _process_table() or {}
+    return {child for child, (parent, _) in table.items() if parent == pid}
+
+
+def process_tree_rss(pids: Iterable[int]) -> Optional[int]:
+    """进程及其全部子进程的常驻内存之和(字节)，无法测量时返回None
+
+    优先使用psutil，未安装时在Linux上读取/proc。
+    """
+    pids = set(pids)
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil:
+        total = 0
+        for pid in pids:
+            try:
+                process = psutil.Process(pid)
+                for member in [process] + process.children(recursive=True):
+                    total += member.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    table = _process_table()
+    if table is None:
+        return None
+    children = defaultdict(list)
+    for pid, (parent, _) in table.items():
+        children[parent].append(pid)
+    total, stack, seen = 0, [pid for pid in pids if pid in table], set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += table[pid][1]
+        stack.extend(children[pid])
+    return total
+
+
+class BrowserRecycler:
+    """浏览器上下文回收策略
+
+    统计当前上下文打开过的页面数，并每隔若干页面测量一次浏览器进程树
+    (Playwright驱动及其启动的Chromium各进程)的常驻内存。页面数或内存超过阈值时
+    建议更换上下文，内存超过重启阈值时建议重启浏览器。实际的更换由爬虫完成。
+    """
+
+    def __init__(self, policy: dict, site: str = ''):
+        self.site = site
+        self.enabled = policy.get('enabled', True)
+        self.max_pages = policy.get('max_pages_per_context', 0)
+        self.max_rss = policy.get('max_rss_mb', 0) * 1024 * 1024
+        self.restart_rss = policy.get('restart_rss_mb', 0) * 1024 * 1024
+        self.check_every = max(1, policy.get('check_every_pages', 10))
+
+        self.pids: Set[int] = set()
+        self.pages = 0
+        self.rss: Optional[int] = None
+        self.peak_rss = 0
+        self.actions: Dict[str, int] = defaultdict(int)
+
+    def watch(self, pids: Iterable[int]):
+        """设置需要测量内存的进程，通常为启动Playwright时新增的驱动进程"""
+        self.pids = set(pids)
+
+    def record_page(self):
+        """当前上下文又打开了一个页面"""
+        self.pages += 1
+
+    def measure(self) -> Optional[int]:
+        """测量浏览器进程树的常驻内存"""
+        if not self.pids:
+            return None
+        self.rss = process_tree_rss(self.pids)
+        if self.rss is not None:
+            self.peak_rss = max(self.peak_rss, self.rss)
+            BROWSER_RSS.labels(self.site).set(self.rss)
+        return self.rss
+
+    def decide(self) -> Optional[str]:
+        """根据页面数和内存判断是否需要更换上下文或重启浏览器，不需要时返回None"""
+        if not self.enabled or not self.pages:
+            return None
+        if (self.max_rss or self.restart_rss) and self.pages % self.check_every == 0:
+            rss = self.measure()
+            if rss is not None:
+                if self.restart_rss and rss >= self.restart_rss:
+                    return ACTION_RESTART
+                if self.max_rss and rss >= self.max_rss:
+                    return ACTION_RECYCLE
+        if self.max_pages and self.pages >= self.max_pages:
+            return ACTION_RECYCLE
+        return None
+
+    def recycled(self, action: str):
+        """记录一次更换，新上下文的页面数从零开始"""
+        rss = f", 浏览器内存{self.rss / 1024 / 1024:.0f}MB" if self.rss is not None else ''
+        logger.info(f"{'重启浏览器' if action == ACTION_RESTART else '更换浏览器上下文'}({self.site}): "
+                    f"当前上下文已打开{self.pages}个页面{rss}")
+        self.pages = 0
+        self.actions[action] += 1
+        BROWSER_RECYCLES.labels(self.site, action).inc()
+
+    def report(self):
+        """输出回收统计并写入运行报告"""
+        self.measure()
+        for action, count in self.actions.items():
+            run_timer.add_count(f'browser_{action}s', self.site, count)
+        if self.peak_rss:
+            run_timer.add_count('browser_peak_rss_bytes', self.site, self.peak_rss)
+        if self.actions or self.peak_rss:
+            logger.info(f"浏览器回收统计({self.site}): {dict(self.actions)}, "
+                        f"内存峰值{self.peak_rss / 1024 / 1024:.0f}MB")
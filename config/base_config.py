@@ -3,14 +3,6 @@ from typing import List, Dict
 class BaseConfig:
     """基础配置类"""
     
-    # 存储配置
-    STORAGE_CONFIG = {
-        'storage_path': './data',
-        'news_directory': 'news',
-        'trends_directory': 'trends',
-        'reports_directory': 'reports'
-    }
-    
     # 调度器配置
     SCHEDULER_CONFIG = {
         'news_crawl_hour': 8,  # 每天8点爬取新闻
@@ -28,7 +20,22 @@ class BaseConfig:
             'base_url': 'https://www.howtogeek.com/', # 请勿修改
             'latest_url': 'https://www.howtogeek.com/news/', # 请勿修改
             'max_articles': 10,  # 每次最多爬取10篇文章
-            'search_keywords': ['deepseek', 'chatgpt', 'ai', 'llm', 'claude', 'gemini']
+            'search_keywords': ['deepseek', 'chatgpt', 'ai', 'llm', 'claude', 'gemini'],
+            'local_tagging': False,  # 为True时不逐个关键词搜索，只爬取最新列表并在本地按关键词筛选
+            # 翻页：继续读取后续列表页和搜索结果页，某页文章都已存储或早于截止日期时停止
+            'pagination': {
+                'max_pages': 5,
+                'skip_known': True,    # 跳过已存储的文章
+                'cutoff_days': None,   # 跳过URL日期早于该天数的文章，None表示不限制
+                'listing_page_url': '{latest_url}page/{page}/',
+                'search_page_url': '{base_url}search/?q={keyword}&page={page}'
+            },
+            # 增量发现：读取RSS/Atom和站点地图，只爬取晚于已存储最新文章的URL，不渲染列表页
+            'discovery': {
+                'enabled': False,
+                'feeds': ['https://www.howtogeek.com/feed/'],
+                'sitemaps': []
+            }
         },
         # UniteAI
         'uniteai': {
@@ -36,7 +43,29 @@ class BaseConfig:
             'base_url': 'https://www.unite.ai/',
             'latest_url': 'https://www.unite.ai', # 请勿修改
             'max_articles': 10,  # 每次最多爬取10篇文章
-            'search_keywords': ['deepseek', 'deekseek', 'chatgpt']
+            'search_keywords': ['deepseek', 'deekseek', 'chatgpt'],
+            'local_tagging': False,
+            # 翻页：继续读取后续列表页和搜索结果页，某页文章都已存储或早于截止日期时停止
+            'pagination': {
+                'max_pages': 5,
+                'skip_known': True,    # 跳过已存储的文章
+                'cutoff_days': None,   # 跳过URL日期早于该天数的文章，None表示不限制
+                'listing_page_url': '{latest_url}page/{page}/',
+                'search_page_url': '{base_url}?s={keyword}&paged={page}'
+            },
+            # 增量发现：读取RSS/Atom和站点地图，只爬取晚于已存储最新文章的URL，不渲染列表页
+            'discovery': {
+                'enabled': False,
+                'feeds': ['https://www.unite.ai/feed/'],
+                'sitemaps': ['https://www.unite.ai/sitemap_index.xml']
+            },
+            # WordPress接口模式：请求/wp-json/wp/v2/posts，失败时回退到浏览器爬取
+            'wordpress_api': {
+                'enabled': False,
+                'per_page': 20,     # 每页文章数，最多100
+                'after_days': 7,    # 只获取最近几天发布的文章，None表示不限制
+                'timeout': 30
+            }
         },
         # MarkTechPost
         'marktechpost': {
@@ -44,17 +73,50 @@ class BaseConfig:
             'base_url': 'https://www.marktechpost.com/',
             'latest_url': 'https://www.marktechpost.com/category/tech-news/', # 请勿修改
             'max_articles': 3,  # 每次最多爬取10篇文章
-            'search_keywords': ['deepseek'] # 示例：['deepseek', 'chatgpt', 'claude', 'gemini', 'llama']
+            'search_keywords': ['deepseek'], # 示例：['deepseek', 'chatgpt', 'claude', 'gemini', 'llama']
+            'local_tagging': False,
+            # 翻页：继续读取后续列表页和搜索结果页，某页文章都已存储或早于截止日期时停止
+            'pagination': {
+                'max_pages': 5,
+                'skip_known': True,    # 跳过已存储的文章
+                'cutoff_days': None,   # 跳过URL日期早于该天数的文章，None表示不限制
+                'listing_page_url': '{latest_url}page/{page}/',
+                'search_page_url': '{base_url}?s={keyword}&paged={page}'
+            },
+            # 增量发现：读取RSS/Atom和站点地图，只爬取晚于已存储最新文章的URL，不渲染列表页
+            'discovery': {
+                'enabled': False,
+                'feeds': ['https://www.marktechpost.com/feed/'],
+                'sitemaps': ['https://www.marktechpost.com/sitemap_index.xml']
+            },
+            # WordPress接口模式：请求/wp-json/wp/v2/posts，失败时回退到浏览器爬取
+            'wordpress_api': {
+                'enabled': False,
+                'per_page': 20,     # 每页文章数，最多100
+                'after_days': 7,    # 只获取最近几天发布的文章，None表示不限制
+                'timeout': 30
+            }
         }
     }
     
+    # 关键词标签配置，所有站点的search_keywords会自动加入
+    TAGGING_CONFIG = {
+        'enabled': True,
+        'extra_keywords': ['openai', 'gpt-4o', 'llama', 'mistral', 'qwen', 'hugging face']
+    }
+    
     # 趋势网站配置
     TREND_SITES = {
         # GitHub Trending
         'github': {
             'name': 'GitHub',
             'trending_url': 'https://github.com/trending',
-            'languages': ['python', 'javascript']  # 要爬取的语言趋势
+            'languages': ['python', 'javascript'],  # 要爬取的语言趋势
+            'include_all_languages': True,  # 同时抓取不限语言的总榜
+            'periods': ['daily', 'weekly', 'monthly'],  # 语言 × 周期 并发抓取
+            'concurrency': 6,  # 同时进行的请求数
+            'max_items': 25,
+            'timeout': 20  # 单个平台的抓取超时(秒)，各平台并发抓取互不影响
         }
     }
     
@@ -62,11 +124,16 @@ class BaseConfig:
     TREND_PLATFORMS = {
         'twitter': {
             'url': 'https://twitter.com/explore/tabs/trending',
-            'max_items': 25
+            'max_items': 25,
+            'enabled': False,  # 需要登录，暂未实现客户端
+            'timeout': 20
         },
         'huggingface': {
             'url': 'https://huggingface.co/models?sort=trending',
-            'max_items': 25
+            'api_url': 'https://huggingface.co/api/models',  # JSON接口，可指向本地替身服务器
+            'page_size': 25,  # 每页条数，超过后按Link头翻页
+            'max_items': 25,
+            'timeout': 20
         }
     }
     
@@ -75,9 +142,137 @@ class BaseConfig:
         'request_delay': 2,  # 请求间隔(秒)
         'timeout': 30,       # 请求超时时间
         'retry_times': 3,    # 重试次数
+        'journal_directory': './data/journal',  # 运行日志目录，main.py --resume 从这里继续
         'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
+    # 运行指标配置
+    METRICS_CONFIG = {
+        'run_report_directory': './data/run_reports',  # 每次运行的分阶段耗时报告目录
+        'prometheus_enabled': False,  # 定时任务模式下是否开启/metrics接口
+        'prometheus_host': '127.0.0.1',
+        'prometheus_port': 9108
+    }
+    
+    # 增量发现配置
+    DISCOVERY_CONFIG = {
+        'state_path': 'data/discovery_state.json',  # 各订阅和站点地图的ETag/Last-Modified
+        'timeout': 20,
+        'max_child_sitemaps': 3  # 站点地图索引中最多跟进的子站点地图数
+    }
+    
+    # 自适应并发配置，按主机调整同时进行的页面和HTTP请求数
+    CONCURRENCY_CONFIG = {
+        'enabled': True,  # 关闭后每个主机固定使用initial并发
+        'initial': 2,
+        'minimum': 1,
+        'maximum': 8,
+        'target_p95_seconds': 15.0,  # p95延迟超过该值时下调并发
+        'max_error_rate': 0.1,       # 最近window次请求的错误率超过该值时不再上调
+        'backoff_factor': 0.5,       # 遇到429、超时或验证页时的下调比例
+        'cooldown_seconds': 5.0,     # 两次下调之间的最短间隔
+        'window': 50,
+        # 按主机覆盖，如 'www.marktechpost.com': {'maximum': 4}
+        'hosts': {}
+    }
+    
+    # 磁盘响应缓存配置，浏览器和aiohttp共用；命令行--cache-only可临时开启离线模式
+    HTTP_CACHE_CONFIG = {
+        'enabled': False,
+        'mode': 'read_write',    # read_write、refresh(只写不读)或cache_only(只读缓存，未命中返回504)
+        'path': './data/http_cache.db',
+        'max_bytes': 512 * 1024 * 1024,  # 压缩后的总大小上限，超出时按最近访问时间淘汰
+        'max_entry_bytes': 16 * 1024 * 1024,  # 单个响应正文的上限，更大的响应照常返回但不写入缓存
+        # 各类URL的有效期(秒)，站点首页和latest_url属于listing
+        'ttl_seconds': {
+            'listing': 15 * 60,
+            'feed': 15 * 60,
+            'api': 15 * 60,
+            'article': 7 * 24 * 3600
+        },
+        # 按规范化后的URL匹配类别，都不匹配时视为article
+        'class_patterns': {
+            'api': [r'/wp-json/', r'/api/'],
+            'feed': [r'\.xml(\.gz)?$', r'/feed/?$', r'sitemap'],
+            'listing': [r'/page/\d+/?$', r'[?&](s|q|page|paged|search)=', r'/(category|tag|author|latest|trending)(/|$)']
+        },
+        'key_headers': ['Accept', 'Accept-Language']  # 参与缓存键的请求头
+    }
+    
+    # 进程内共享的HTTP抓取服务，趋势平台、WordPress接口、订阅和站点地图共用一个连接池
+    FETCHER_CONFIG = {
+        'limit': 100,                # 连接池总连接数
+        'limit_per_host': 8,         # 每个主机的连接数上限
+        'dns_cache_seconds': 300,    # DNS解析结果缓存时间
+        'keepalive_seconds': 30,     # 空闲连接保持时间
+        'timeout': 60,               # 单次请求总超时(秒)，调用方可单独指定
+        'max_body_bytes': 32 * 1024 * 1024,  # 解压后的响应正文上限，超过时中止，0为不限制
+        'http2': False               # 使用HTTP/2，需要 pip install httpx[http2]
+    }
+    
+    # 分片爬取配置(main.py --workers)
+    WORK_QUEUE_CONFIG = {
+        'backend': 'sqlite',     # sqlite(单机多进程)、redis(多台机器)或memory(进程内)
+        'path': './data/work_queue.db',  # SQLite任务队列
+        'redis_url': 'redis://localhost:6379/0',
+        'redis_prefix': 'techtrend',
+        'worker_writes': False,  # 为True时工作进程直接写存储(适用于MySQL)，否则结果由协调进程统一保存
+        'workers': 0,            # 工作进程数，0表示按CPU核数；命令行--workers优先
+        'lease_seconds': 300,    # 租约时长，工作进程崩溃后任务在到期后被重新领取
+        'max_attempts': 3,       # 每个任务最多尝试次数
+        'batch_size': 4,         # 每次领取的文章任务数，同一批在一个进程中并发抓取
+        'poll_seconds': 1.0
+    }
+    
+    # 录制回放配置(离线基准测试)
+    REPLAY_CONFIG = {
+        'recordings_directory': './data/recordings',  # 录制页面保存目录
+        'host': '127.0.0.1',
+        'port': 8765,
+        'latency_ms': 50  # 回放时每个页面的模拟延迟(毫秒)
+    }
+    
+    # 浏览器配置
+    BROWSER_CONFIG = {
+        'headless': True,
+        'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
+        'viewport': {'width': 1920, 'height': 1080},
+        'default_timeout': 60000,  # 页面默认超时(毫秒)
+        # 请求拦截策略，应用到所有浏览器上下文
+        'block_policy': {
+            'enabled': True,
+            'resource_types': ['image', 'media'],  # 拦截的资源类型
+            'block_fonts': True,
+            'block_stylesheets': False,  # 部分站点的备用搜索依赖元素可见性，默认不拦截样式表
+            'blocked_domains': [
+                'doubleclick.net', 'googlesyndication.com', 'googleadservices.com',
+                'google-analytics.com', 'googletagmanager.com', 'googletagservices.com',
+                'adservice.google.com', 'amazon-adsystem.com', 'adnxs.com', 'criteo.com',
+                'pubmatic.com', 'rubiconproject.com', 'taboola.com', 'outbrain.com',
+                'scorecardresearch.com', 'quantserve.com', 'chartbeat.com', 'hotjar.com',
+                'facebook.net', 'connect.facebook.net', 'moatads.com', 'adsafeprotected.com'
+            ],
+            'url_keywords': ['/ads/', '/analytics/', '/tracking/'],
+            # 被拦截请求的典型大小(字节)，用于估算节省的流量
+            'estimated_bytes': {
+                'image': 60000,
+                'media': 500000,
+                'font': 40000,
+                'stylesheet': 30000,
+                'script': 60000,
+                'other': 5000
+            }
+        },
+        # 上下文回收：长时间运行时Chromium内存随访问页面数持续增长，超过阈值时更换上下文或重启浏览器
+        'recycle': {
+            'enabled': True,
+            'max_pages_per_context': 100,  # 一个上下文最多打开的页面数，0为不限制
+            'max_rss_mb': 1500,  # 浏览器进程树常驻内存超过该值时更换上下文，0为不检查
+            'restart_rss_mb': 2500,  # 超过该值时重启浏览器进程，0为不重启
+            'check_every_pages': 10  # 每打开多少个页面测量一次内存
+        }
+    }
+    
     # 数据存储配置
     STORAGE_CONFIG = {
         'type': 'json',  # 改为json类型,更简单易用
@@ -89,5 +284,30 @@ class BaseConfig:
             'database': 'tech_trends'
         },
         'csv_path': 'data/articles.csv',
-        'json_path': 'data/articles.json'
+        'json_path': 'data/articles.json',
+        'trends_json_path': 'data/trends.json',
+        'reports_directory': 'data/reports',  # 周报和每日汇总(rollups子目录)的存放目录
+        # 每日预聚合，保存文章和趋势时更新，周报只读取最近7天的汇总
+        'rollup': {
+            'enabled': True,
+            'top_articles': 50,  # 每天最多记录的文章条目
+            'top_trends': 25     # 每个平台每天记录的榜单条目
+        },
+        # 近似重复检测(SimHash)，重复文章仍会保存，但会标记duplicate_of
+        'dedup': {
+            'enabled': True,
+            'index_path': 'data/simhash_index.jsonl',
+            'max_distance': 3,  # 汉明距离不超过该值视为重复，最大为3(4个分段)
+            'shingle_size': 3   # 按连续3个词构造特征
+        },
+        # 趋势历史，每次保存榜单时追加(时间, 排名, 星标数)快照
+        'trend_history': {
+            'enabled': True,
+            'directory': 'data/trend_history'
+        },
+        # 本地全文索引(SQLite FTS5)，保存文章时增量更新
+        'search_index': {
+            'enabled': True,
+            'path': 'data/search_index.db'
+        }
     } 
\ No newline at end of file
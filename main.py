@@ -3,13 +3,12 @@ import logging
 import warnings
 import sys
 import argparse
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import time
 from config.base_config import BaseConfig
-from base.base_crawler import AbstractCrawler
-from news_sites.howtogeek import HowToGeekCrawler
-from news_sites.uniteai import UniteAICrawler
-from news_sites.marktechpost import MarkTechPostCrawler
-from store.json import JSONStore
+from news_sites import SITE_REGISTRY, get_crawler_class
+from store import get_store
+from tools.metrics import MetricsServer, JOB_SECONDS, JOB_FAILURES, LAST_SUCCESS
+from tools.timing import run_timer, STAGE_STORE_WRITE
 
 # 添加警告过滤，抑制Windows平台上asyncio的管道关闭警告
 if sys.platform.startswith('win'):
@@ -34,164 +33,225 @@ logger = logging.getLogger(__name__)
 class TechTrendCrawler:
     """科技趋势爬虫主类"""
     
-    def __init__(self):
+    def __init__(self, record: bool = False, replay: bool = False):
         self.config = BaseConfig()
-        self.scheduler = AsyncIOScheduler()
-        self.store = JSONStore(self.config.STORAGE_CONFIG)
+        self.scheduler = None  # 仅在定时任务模式下创建，避免普通运行加载APScheduler
+        self.store = get_store(self.config.STORAGE_CONFIG)
+        if self.config.TAGGING_CONFIG.get('enabled'):
+            # 保存前用全部关键词为文章打标签，无论来自常规爬取还是搜索爬取
+            from tools.keyword_tagger import KeywordTagger
+            self.store.add_article_hook(KeywordTagger.from_config(self.config))
+        self.record = record  # 录制模式：保存列表页和文章页HTML
+        self.replay = replay  # 回放模式：从本地回放服务器读取录制页面
+        self.replay_server = None
+        self.replay_session = None
+        self.metrics_server = None
+        self.journal = None  # 运行日志(RunJournal)，用于断点续爬
+        
+    async def prepare_crawler(self, crawler, site: str):
+        """根据运行模式为爬虫设置页面录制或回放"""
+        replay_config = self.config.REPLAY_CONFIG
+        if self.record or self.replay:
+            from tools.replay import PageRecorder, ReplayServer
+        if self.record:
+            crawler.client.recorder = PageRecorder(site, replay_config['recordings_directory'])
+            logger.info(f"已开启页面录制: {site}")
+        if self.replay:
+            if not self.replay_server:
+                self.replay_server = ReplayServer(
+                    replay_config['recordings_directory'],
+                    replay_config['host'],
+                    0,
+                    replay_config['latency_ms']
+                )
+                await self.replay_server.start()
+                import aiohttp
+                self.replay_session = aiohttp.ClientSession()
+            await self.replay_server.route_page(crawler.page, self.replay_session)
+            # 并发抓取时新建的页面同样从回放服务器读取
+            crawler.page_hooks.append(lambda page: self.replay_server.route_page(page, self.replay_session))
+            logger.info(f"已开启页面回放: {site}")
+            
+    async def close(self):
+        """释放回放服务器、共享HTTP连接池等资源"""
+        if self.replay_session:
+            await self.replay_session.close()
+            self.replay_session = None
+        if self.replay_server:
+            await self.replay_server.stop()
+            self.replay_server = None
+        if self.metrics_server:
+            await self.metrics_server.stop()
+            self.metrics_server = None
+        # 关闭共享的HTTP连接池，抓取统计写入运行报告
+        from tools.fetcher import close_fetcher
+        stats = await close_fetcher()
+        if stats and stats['requests']:
+            run_timer.set_section('fetcher', stats)
+        
+    async def save_site_articles(self, site: str, articles) -> bool:
+        """逐篇保存文章并记录存储耗时"""
+        success_count = 0
+        for article in articles:
+            with run_timer.stage(STAGE_STORE_WRITE, site, article.url):
+                if await self.store.save_article(article):
+                    success_count += 1
+        logger.info(f"批量保存文章完成: {success_count}/{len(articles)} 篇保存成功")
+        if success_count:
+            LAST_SUCCESS.labels(site).set_to_current_time()
+        return success_count == len(articles)
+        
+    async def save_article_now(self, site: str, article) -> bool:
+        """文章处理完成后立即保存，供爬虫的article_sink使用"""
+        with run_timer.stage(STAGE_STORE_WRITE, site, article.url):
+            saved = await self.store.save_article(article)
+        if saved:
+            LAST_SUCCESS.labels(site).set_to_current_time()
+        return saved
+        
+    async def save_platform_trends(self, platform: str, trends) -> bool:
+        """保存一个平台的趋势榜单"""
+        with run_timer.stage(STAGE_STORE_WRITE, platform):
+            saved = await self.store.save_trends(trends, platform)
+        if saved:
+            LAST_SUCCESS.labels(platform).set_to_current_time()
+        return saved
+        
+    async def run_job(self, job_name: str, job):
+        """执行定时任务并记录耗时和最近成功时间"""
+        start = time.perf_counter()
+        try:
+            await job()
+            LAST_SUCCESS.labels(job_name).set_to_current_time()
+        except Exception as e:
+            JOB_FAILURES.labels(job_name).inc()
+            logger.error(f"定时任务 {job_name} 执行失败: {str(e)}")
+        finally:
+            JOB_SECONDS.labels(job_name).observe(time.perf_counter() - start)
+            if self.scheduler:
+                # 定时任务模式下每次任务结束后写出运行报告并清空统计，避免耗时样本无限增长
+                run_timer.write_report(self.config.METRICS_CONFIG['run_report_directory'])
+                run_timer.reset()
         
     async def crawl_news_sites(self):
         """爬取新闻网站"""
         logger.info("开始爬取新闻网站...")
-        # TODO: 实现新闻网站爬取逻辑
-        pass
+        # 每个站点使用独立的浏览器，爬取结束即关闭，长期运行时内存不会随运行次数累积
+        failed = []
+        for site in SITE_REGISTRY:
+            try:
+                await self.test_site(site)
+            except Exception:
+                failed.append(site)
+        if failed:
+            raise RuntimeError(f"以下站点爬取失败: {', '.join(failed)}")
         
     async def crawl_trends(self):
         """爬取趋势榜单"""
         logger.info("开始爬取趋势榜单...")
-        # TODO: 实现趋势榜单爬取逻辑
-        pass
+        from trend_platforms import fetch_trends
+        
+        # 各平台并发抓取，单个平台超时不会拖慢整个任务
+        results = await fetch_trends(self.config)
+        for platform, trends in results.items():
+            if trends:
+                await self.save_platform_trends(platform, trends)
+        logger.info("趋势榜单爬取完成: " + ', '.join(f"{p} {len(t)}条" for p, t in results.items()))
         
     async def generate_weekly_report(self):
         """生成周报"""
         logger.info("开始生成周报...")
-        # TODO: 实现周报生成逻辑
-        pass
+        from tools.weekly_report import generate_weekly_report
+        generate_weekly_report(self.config.STORAGE_CONFIG['reports_directory'])
         
-    async def test_howtogeek(self):
-        """测试HowToGeek爬虫"""
+    async def test_site(self, site: str):
+        """测试单个新闻站点爬虫"""
+        site_config = self.config.NEWS_SITES[site]
+        site_journal = self.journal.site(site) if self.journal else None
+        if site_journal and site_journal.finished:
+            logger.info(f"{site_config['name']} 在上次运行中已完成，跳过")
+            return
         try:
-            logger.info("开始测试HowToGeek爬虫...")
+            logger.info(f"开始测试{site_config['name']}爬虫...")
             
-            # 创建HowToGeek爬虫实例
-            crawler = HowToGeekCrawler(self.config.NEWS_SITES['howtogeek'])
+            # 按需导入并创建爬虫实例
+            crawler = get_crawler_class(site)(site_config)
             
-            # 初始化浏览器
-            await crawler.init_browser()
+            if self.record or self.replay:
+                # 录制和回放只针对浏览器页面
+                crawler.use_api = False
+                crawler.discovery = None
+            # 增量发现只获取晚于已存储最新文章的URL，翻页遇到已存储的文章时停止
+            crawler.since = await self.store.get_latest_published_date(site)
+            crawler.known_urls = await self.store.get_article_urls(site)
+            if site_journal:
+                # 每篇文章处理完成后立即保存并写入运行日志，中断后可以从断点继续
+                crawler.journal = site_journal
+                crawler.article_sink = lambda article: self.save_article_now(site, article)
+            if not crawler.use_api:
+                # 初始化浏览器，接口模式下只在接口不可用时才启动
+                await crawler.init_browser()
+                await self.prepare_crawler(crawler, site)
             
             try:
                 # 爬取文章
                 articles = await crawler.crawl()
                 logger.info(f"爬取到{len(articles)}篇文章")
                 
-                # 保存文章
-                if articles:
-                    await self.store.save_articles(articles)
+                # 保存文章，已由article_sink保存的不再重复保存
+                unsaved = [article for article in articles
+                           if not site_journal or article.url not in site_journal.saved]
+                if unsaved:
+                    await self.save_site_articles(site, unsaved)
                     logger.info("文章保存成功")
-                    
-                    # 打印第一篇文章的信息作为示例
-                    if articles:
-                        first_article = articles[0]
-                        logger.info("\n第一篇文章信息:")
-                        logger.info(f"标题: {first_article.title}")
-                        logger.info(f"作者: {first_article.author}")
-                        logger.info(f"发布时间: {first_article.published_date}")
-                        logger.info(f"链接: {first_article.url}")
-                
-            finally:
-                # 关闭浏览器
-                await crawler.close_browser()
-                
-        except Exception as e:
-            logger.error(f"测试HowToGeek爬虫时出错: {str(e)}")
-            raise
-            
-    async def test_uniteai(self):
-        """测试UniteAI爬虫"""
-        try:
-            logger.info("开始测试UniteAI爬虫...")
-            
-            # 创建UniteAI爬虫实例
-            crawler = UniteAICrawler(self.config.NEWS_SITES['uniteai'])
-            
-            # 初始化浏览器
-            await crawler.init_browser()
-            
-            try:
-                # 爬取文章
-                articles = await crawler.crawl()
-                logger.info(f"爬取到{len(articles)}篇文章")
-                
-                # 保存文章
+                if site_journal:
+                    site_journal.finish()
                 if articles:
-                    await self.store.save_articles(articles)
-                    logger.info("文章保存成功")
-                    
                     # 打印第一篇文章的信息作为示例
-                    if articles:
-                        first_article = articles[0]
-                        logger.info("\n第一篇文章信息:")
-                        logger.info(f"标题: {first_article.title}")
-                        logger.info(f"作者: {first_article.author}")
-                        logger.info(f"发布时间: {first_article.published_date}")
-                        logger.info(f"链接: {first_article.url}")
+                    first_article = articles[0]
+                    logger.info("\n第一篇文章信息:")
+                    logger.info(f"标题: {first_article.title}")
+                    logger.info(f"作者: {first_article.author}")
+                    logger.info(f"发布时间: {first_article.published_date}")
+                    logger.info(f"链接: {first_article.url}")
                 
             finally:
                 # 关闭浏览器
                 await crawler.close_browser()
                 
         except Exception as e:
-            logger.error(f"测试UniteAI爬虫时出错: {str(e)}")
-            raise
-            
-    async def test_marktechpost(self):
-        """测试MarkTechPost爬虫"""
-        try:
-            logger.info("开始测试MarkTechPost爬虫...")
-            
-            # 创建MarkTechPost爬虫实例
-            crawler = MarkTechPostCrawler(self.config.NEWS_SITES['marktechpost'])
-            
-            # 初始化浏览器
-            await crawler.init_browser()
-            
-            try:
-                # 爬取文章
-                articles = await crawler.crawl()
-                logger.info(f"爬取到{len(articles)}篇文章")
-                
-                # 保存文章
-                if articles:
-                    await self.store.save_articles(articles)
-                    logger.info("文章保存成功")
-                    
-                    # 打印第一篇文章的信息作为示例
-                    if articles:
-                        first_article = articles[0]
-                        logger.info("\n第一篇文章信息:")
-                        logger.info(f"标题: {first_article.title}")
-                        logger.info(f"作者: {first_article.author}")
-                        logger.info(f"发布时间: {first_article.published_date}")
-                        logger.info(f"链接: {first_article.url}")
-                
-            finally:
-                # 关闭浏览器
-                await crawler.close_browser()
-                
-        except Exception as e:
-            logger.error(f"测试MarkTechPost爬虫时出错: {str(e)}")
+            logger.error(f"测试{site_config['name']}爬虫时出错: {str(e)}")
             raise
 
     def configure_schedules(self):
         """配置定时任务"""
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        self.scheduler = AsyncIOScheduler()
+        
         # 每日爬取新闻网站
         self.scheduler.add_job(
-            self.crawl_news_sites,
+            self.run_job,
             'cron',
+            args=['crawl_news_sites', self.crawl_news_sites],
             hour=self.config.SCHEDULER_CONFIG['news_crawl_hour'],
             minute=self.config.SCHEDULER_CONFIG['news_crawl_minute']
         )
         
         # 每小时爬取趋势榜单
         self.scheduler.add_job(
-            self.crawl_trends,
+            self.run_job,
             'interval',
-            hours=1
+            args=['crawl_trends', self.crawl_trends],
+            hours=1,
+            max_instances=1,  # 上一次未结束时不并发执行
+            coalesce=True     # 错过的多次执行合并为一次
         )
         
         # 每周日生成周报
         self.scheduler.add_job(
-            self.generate_weekly_report,
+            self.run_job,
             'cron',
+            args=['generate_weekly_report', self.generate_weekly_report],
             day_of_week=self.config.SCHEDULER_CONFIG['weekly_report_day'],
             hour=self.config.SCHEDULER_CONFIG['weekly_report_hour'],
             minute=self.config.SCHEDULER_CONFIG['weekly_report_minute']
@@ -201,12 +261,22 @@ class TechTrendCrawler:
         """启动爬虫"""
         try:
             logger.info("正在启动爬虫...")
+            
+            # 可选的Prometheus指标接口，与调度器运行在同一事件循环中
+            metrics_config = self.config.METRICS_CONFIG
+            if metrics_config.get('prometheus_enabled'):
+                self.metrics_server = MetricsServer(
+                    metrics_config['prometheus_host'],
+                    metrics_config['prometheus_port']
+                )
+                await self.metrics_server.start()
+            
             self.configure_schedules()
             self.scheduler.start()
             
             # 立即执行一次爬取
-            await self.crawl_news_sites()
-            await self.crawl_trends()
+            await self.run_job('crawl_news_sites', self.crawl_news_sites)
+            await self.run_job('crawl_trends', self.crawl_trends)
             
             # 保持程序运行
             while True:
@@ -214,7 +284,8 @@ class TechTrendCrawler:
                 
         except Exception as e:
             logger.error(f"爬虫运行出错: {str(e)}")
-            self.scheduler.shutdown()
+            if self.scheduler:
+                self.scheduler.shutdown()
             raise
 
 async def main():
@@ -222,21 +293,67 @@ async def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='科技趋势爬虫')
     parser.add_argument('platform', nargs='?', default='all', 
-                        choices=['all', 'howtogeek', 'uniteai', 'marktechpost'], 
-                        help='要爬取的平台: howtogeek, uniteai, marktechpost或all(默认)')
+                        choices=['all'] + list(SITE_REGISTRY), 
+                        help='要爬取的平台: ' + ', '.join(SITE_REGISTRY) + '或all(默认)')
+    parser.add_argument('--record', action='store_true',
+                        help='录制列表页和文章页HTML，供离线回放和基准测试使用')
+    parser.add_argument('--replay', action='store_true',
+                        help='从本地回放服务器读取录制的页面，不访问真实网站')
+    parser.add_argument('--schedule', action='store_true',
+                        help='以定时任务模式长期运行')
+    parser.add_argument('--resume', action='store_true',
+                        help='从上次中断的运行日志继续，跳过已完成的站点和已保存的文章')
+    parser.add_argument('--workers', type=int, nargs='?', const=0, default=None,
+                        help='多进程分片爬取，指定工作进程数，不带数值时使用WORK_QUEUE_CONFIG中的配置(0为CPU核数)')
+    parser.add_argument('--join', action='store_true',
+                        help='与--workers一起使用，只启动工作进程，加入其他机器上协调进程的任务队列')
+    parser.add_argument('--cache-only', action='store_true',
+                        help='只从磁盘响应缓存读取页面，未命中的请求直接失败，离线且结果可重复')
     args = parser.parse_args()
     
-    crawler = TechTrendCrawler()
+    if args.cache_only:
+        from tools.http_cache import configure_cache
+        configure_cache(BaseConfig.HTTP_CACHE_CONFIG, 'cache_only')
+    crawler = TechTrendCrawler(record=args.record, replay=args.replay)
     
-    # 根据命令行参数选择爬取平台
-    if args.platform == 'all' or args.platform == 'howtogeek':
-        await crawler.test_howtogeek()
+    if args.schedule:
+        try:
+            await crawler.start()
+        finally:
+            await crawler.close()
+        return
     
-    if args.platform == 'all' or args.platform == 'uniteai':
-        await crawler.test_uniteai()
-        
-    if args.platform == 'all' or args.platform == 'marktechpost':
-        await crawler.test_marktechpost()
+    if args.workers is not None:
+        # 分片模式由任务队列记录进度，--resume从队列中未完成的任务继续；爬取全部平台时趋势榜单也拆成任务
+        from tools.sharded_crawl import Coordinator, enabled_trend_platforms
+        sites = list(SITE_REGISTRY) if args.platform == 'all' else [args.platform]
+        platforms = enabled_trend_platforms(crawler.config) if args.platform == 'all' else []
+        workers = args.workers or crawler.config.WORK_QUEUE_CONFIG.get('workers', 0)
+        try:
+            await Coordinator(crawler, workers, args.resume).run(sites, platforms, args.join)
+        finally:
+            await crawler.close()
+        return
+    
+    from tools.run_journal import RunJournal
+    crawler.journal = RunJournal.start(crawler.config.CRAWLER_CONFIG['journal_directory'], args.resume)
+    try:
+        # 根据命令行参数选择爬取平台，只导入需要运行的站点
+        sites = list(SITE_REGISTRY) if args.platform == 'all' else [args.platform]
+        for site in sites:
+            await crawler.test_site(site)
+        crawler.journal.finish()
+    finally:
+        crawler.journal.close()
+        await crawler.close()
+        # 输出本次运行的分阶段耗时报告，附带各主机最终的并发上限和响应缓存统计
+        from tools.concurrency import concurrency
+        from tools.http_cache import get_cache
+        run_timer.set_section('concurrency', concurrency.snapshot())
+        cache = get_cache()
+        if cache:
+            run_timer.set_section('http_cache', cache.snapshot())
+        run_timer.write_report(crawler.config.METRICS_CONFIG['run_report_directory'])
 
 async def cleanup_resources():
     """清理异步资源"""
@@ -0,0 +1,150 @@
+"""数据模型编解码
+
+所有存储后端共用的to_dict/from_dict实现，统一处理datetime字段和schema版本，
+并在安装了orjson时使用更快的JSON编码器。
+"""
+import dataclasses
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Type, get_type_hints
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+# 当前数据格式版本，字段有不兼容变化时递增
+SCHEMA_VERSION = 1
+
+# Python 3.10+ 使用__slots__，减少每个对象的内存占用
+DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# 类 -> (字段名元组, {字段名: 需要转换的类型})
+_FIELD_CACHE: Dict[type, Tuple[Tuple[str, ...], Dict[str, type]]] = {}
+
+
+def _fields(cls: type) -> Tuple[Tuple[str, ...], Dict[str, type]]:
+    cached = _FIELD_CACHE.get(cls)
+    if cached is None:
+        hints = get_type_hints(cls)
+        names = tuple(f.name for f in dataclasses.fields(cls))
+        kinds = {}
+        for name in names:
+            hint = hints.get(name)
+            if hint in (datetime, Optional[datetime]):
+                kinds[name] = datetime
+            elif hint in (int, Optional[int]):
+                kinds[name] = int
+            elif hint == List[str]:
+                kinds[name] = list
+        cached = _FIELD_CACHE[cls] = (names, kinds)
+    return cached
+
+
+def _convert(kind: type, value: Any) -> Any:
+    """将字符串形式的字段值(来自CSV等文本存储)转换为模型类型"""
+    if kind is datetime:
+        return parse_datetime(value)
+    if not isinstance(value, str):
+        return value
+    if kind is int:
+        return int(value)
+    if kind is list:
+        return loads(value)
+    return value
+
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    """解析ISO格式时间，兼容末尾的Z"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """带时区的时间转换为UTC并去掉时区，便于和不带时区的时间比较"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def utc_now() -> datetime:
+    """当前的UTC时间，不带时区；发布时间无法解析时用它代替，避免非UTC主机上的本地时间越过增量发现的起点"""
+    return naive_utc(datetime.now(timezone.utc))
+
+
+def to_dict(obj: Any, with_version: bool = False, iso_datetime: bool = True) -> Dict[str, Any]:
+    """将模型对象转换为可序列化的字典
+
+    Args:
+        obj: 模型对象
+        with_version: 是否写入schema_version字段
+        iso_datetime: datetime是否转为ISO字符串，数据库驱动可直接使用datetime对象时传False
+    """
+    names, _ = _fields(type(obj))
+    data = {}
+    for name in names:
+        value = getattr(obj, name)
+        if iso_datetime and isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, list):
+            value = list(value)
+        data[name] = value
+    if with_version:
+        data['schema_version'] = SCHEMA_VERSION
+    return data
+
+
+def to_row(obj: Any, with_version: bool = False) -> Dict[str, Any]:
+    """转换为纯文本存储(CSV)使用的行，列表字段编码为JSON，None写为空字符串"""
+    row = to_dict(obj, with_version)
+    for name, value in row.items():
+        if value is None:
+            row[name] = ''
+        elif isinstance(value, list):
+            row[name] = json.dumps(value, ensure_ascii=False)
+    return row
+
+
+def from_dict(cls: Type, data: Dict[str, Any]):
+    """从字典创建模型对象
+
+    忽略未知字段(包括schema_version)，自动解析datetime字段；
+    字符串形式的整数和列表字段也会被转换，空字符串和None视为缺失，使用字段默认值。
+    """
+    names, kinds = _fields(cls)
+    kwargs = {}
+    for name in names:
+        if name not in data:
+            continue
+        value = data[name]
+        kind = kinds.get(name)
+        if kind is not None:
+            if value == '' or value is None:
+                continue
+            value = _convert(kind, value)
+        kwargs[name] = value
+    return cls(**kwargs)
+
+
+def trend_from_dict(data: Dict[str, Any]):
+    """根据platform字段创建对应的趋势对象"""
+    from model.platform_trends import TREND_CLASSES, TrendItem
+    return from_dict(TREND_CLASSES.get(data.get('platform'), TrendItem), data)
+
+
+def dumps(data: Any, indent: bool = True) -> bytes:
+    """编码JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def loads(raw) -> Any:
+    """解码JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
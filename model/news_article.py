@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from .codec import DATACLASS_OPTIONS
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class NewsArticle:
     """新闻文章数据模型"""
     title: str
@@ -15,4 +16,6 @@ class NewsArticle:
     id: Optional[int] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    keyword: Optional[str] = None  # 添加关键词字段，用于存储搜索关键词 
\ No newline at end of file
+    keyword: Optional[str] = None  # 添加关键词字段，用于存储搜索关键词
+    duplicate_of: Optional[str] = None  # 近似重复文章的原文URL，由去重索引设置
+    tags: List[str] = field(default_factory=list)  # 命中的全部关键词
@@ -1,9 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List
+from .codec import DATACLASS_OPTIONS
 from .trend_item import TrendItem
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class TwitterTrend(TrendItem):
     """Twitter趋势模型"""
     tweet_count: str = ""
@@ -11,22 +12,31 @@ class TwitterTrend(TrendItem):
     def __post_init__(self):
         self.platform = 'twitter'
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class GithubTrend(TrendItem):
     """GitHub趋势模型"""
     language: str = "Unknown"
     stars: int = 0
+    period: str = ""  # 榜单周期: daily/weekly/monthly
+    period_stars: int = 0  # 该周期内新增的星标数
     
     def __post_init__(self):
         self.platform = 'github'
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class HuggingfaceTrend(TrendItem):
     """Huggingface趋势模型"""
     downloads: str = "0"
-    tags: List[str] = None
+    tags: List[str] = field(default_factory=list)
     
     def __post_init__(self):
         self.platform = 'huggingface'
         if self.tags is None:
-            self.tags = [] 
\ No newline at end of file
+            self.tags = []
+
+# 平台名 -> 趋势模型类
+TREND_CLASSES = {
+    'twitter': TwitterTrend,
+    'github': GithubTrend,
+    'huggingface': HuggingfaceTrend,
+}
@@ -1,15 +1,16 @@
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
+from .codec import DATACLASS_OPTIONS
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class TrendItem:
     """趋势项目基础模型"""
     rank: int
     name: str
     description: str
     url: str
-    platform: str
+    platform: str = ''  # 子类在__post_init__中设置
     id: Optional[int] = None
     created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None 
\ No newline at end of file
+    updated_at: Optional[datetime] = None
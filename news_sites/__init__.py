@@ -0,0 +1,23 @@
+"""新闻网站爬虫注册表
+
+按名称延迟导入站点爬虫，只加载实际要运行的站点及其依赖。
+"""
+import importlib
+
+# 站点名 -> (模块路径, 爬虫类名)
+SITE_REGISTRY = {
+    'howtogeek': ('news_sites.howtogeek', 'HowToGeekCrawler'),
+    'uniteai': ('news_sites.uniteai', 'UniteAICrawler'),
+    'marktechpost': ('news_sites.marktechpost', 'MarkTechPostCrawler'),
+}
+
+
+def get_crawler_class(site: str):
+    """根据站点名获取爬虫类"""
+    if site not in SITE_REGISTRY:
+        raise ValueError(f"未知的新闻站点: {site}")
+    module_name, class_name = SITE_REGISTRY[site]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+__all__ = ['SITE_REGISTRY', 'get_crawler_class']
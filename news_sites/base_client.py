@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from playwright.async_api import Page
+from typing import List, Dict, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
 
 class BaseClient(ABC):
     """新闻网站客户端基类"""
@@ -16,7 +18,7 @@ class BaseClient(ABC):
         self.max_articles = config['max_articles']
     
     @abstractmethod
-    async def get_latest_articles(self, page: Page, max_articles: int) -> List[str]:
+    async def get_latest_articles(self, page: 'Page', max_articles: int) -> List[str]:
         """获取最新文章链接
         
         Args:
@@ -29,7 +31,7 @@ class BaseClient(ABC):
         pass
     
     @abstractmethod
-    async def get_article_content(self, page: Page, url: str) -> Dict[str, Any]:
+    async def get_article_content(self, page: 'Page', url: str) -> Dict[str, Any]:
         """获取文章内容
         
         Args:
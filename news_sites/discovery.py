@@ -0,0 +1,285 @@
+"""基于RSS/Atom和站点地图的增量文章发现
+
+读取站点的RSS/Atom订阅和sitemap.xml(包括新闻站点地图和站点地图索引)，只返回发布时间晚于
+已存储的最新文章的URL。请求时带上上次的ETag/Last-Modified，内容未变化时服务器返回304；
+XML边下载边解析，每个站点每次只需几KB流量，不必渲染列表页。
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import zlib
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import XMLPullParser
+
+from model.codec import parse_datetime, naive_utc
+from tools.concurrency import concurrency
+from tools.timing import run_timer, STAGE_NAVIGATION
+
+logger = logging.getLogger(__name__)
+
+# (URL, 发布时间)，时间为UTC且不带时区
+Entry = Tuple[str, Optional[datetime]]
+
+_ENTRY_TAGS = ('item', 'entry', 'url', 'sitemap')
+_DATE_TAGS = ('publication_date', 'published', 'pubDate', 'date', 'updated', 'lastmod')
+
+
+def _local_name(tag: str) -> str:
+    """去掉命名空间: {http://www.sitemaps.org/schemas/sitemap/0.9}loc -> loc"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_date(text: Optional[str]) -> Optional[datetime]:
+    """解析RSS(RFC 822)、Atom和站点地图(W3C)中的时间"""
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        return naive_utc(parse_datetime(text))
+    except ValueError:
+        pass
+    try:
+        return naive_utc(parsedate_to_datetime(text))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_element(elem) -> Tuple[str, Optional[datetime]]:
+    """从item/entry/url/sitemap元素中取出链接和时间"""
+    link = ''
+    dates: Dict[str, Optional[datetime]] = {}
+    for child in elem.iter():
+        name = _local_name(child.tag)
+        if name == 'loc' and not link:
+            link = (child.text or '').strip()
+        elif name == 'link' and not link:
+            # Atom使用href属性，RSS使用文本
+            rel = child.get('rel', 'alternate')
+            if child.get('href') and rel == 'alternate':
+                link = child.get('href').strip()
+            elif child.text:
+                link = child.text.strip()
+        elif name in _DATE_TAGS and name not in dates:
+            dates[name] = parse_date(child.text)
+    for name in _DATE_TAGS:
+        if dates.get(name):
+            return link, dates[name]
+    return link, None
+
+
+class FeedParser:
+    """增量解析订阅和站点地图，喂入字节块，逐个取出条目"""
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=('start', 'end'))
+        self._depth = 0
+        self.is_index = False  # 是否为站点地图索引(<sitemapindex>)
+
+    def feed(self, data: bytes) -> List[Tuple[str, Entry]]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> List[Tuple[str, Entry]]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Tuple[str, Entry]]:
+        entries = []
+        for event, elem in self._parser.read_events():
+            name = _local_name(elem.tag)
+            if event == 'start':
+                if name == 'sitemapindex':
+                    self.is_index = True
+                if name in _ENTRY_TAGS:
+                    self._depth += 1
+                continue
+            if name in _ENTRY_TAGS:
+                self._depth -= 1
+                # 只处理最外层的条目，避免<url><image:image>等扩展元素被当作单独的条目
+                if self._depth == 0:
+                    link, published = _parse_element(elem)
+                    if link:
+                        entries.append((name, (link, published)))
+                    elem.clear()
+        return entries
+
+
+class FeedDiscovery:
+    """单个站点的增量文章发现
+
+    discover()返回新文章URL，commit()保存本次的ETag/Last-Modified。调用方在文章都保存后
+    才调用commit()(见BaseCrawler.commit_discovery)，有文章失败时下次条件请求不会返回304，
+    发布时间仍晚于已存储的最新文章的失败文章会再次被发现。
+    """
+
+    def __init__(self, site: str, site_config: dict, state_path: str, timeout: float = 20,
+                 max_child_sitemaps: int = 3):
+        discovery_config = site_config.get('discovery', {})
+        self.site = site
+        self.feeds = discovery_config.get('feeds', [])
+        self.sitemaps = discovery_config.get('sitemaps', [])
+        # 站点地图索引中只跟进地址包含这些关键词的子站点地图
+        self.child_keywords = discovery_config.get('child_sitemap_keywords', ['post', 'news'])
+        self.state_path = state_path
+        self.timeout = timeout
+        self.max_child_sitemaps = max_child_sitemaps
+        self._pending: Dict[str, dict] = {}
+
+    def _load_state(self) -> Dict[str, dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"读取发现状态失败: {str(e)}")
+            return {}
+
+    def commit(self):
+        """保存本次请求得到的缓存校验信息"""
+        if not self._pending:
+            return
+        state = self._load_state()
+        state.update(self._pending)
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_path)
+            self._pending = {}
+        except Exception as e:
+            logger.error(f"保存发现状态失败: {str(e)}")
+
+    async def _fetch(self, session, url: str, validators: dict) -> Tuple[Optional[List[Tuple[str, Entry]]], bool]:
+        """条件请求并增量解析，返回(条目列表, 是否为站点地图索引)，内容未变化时条目为None"""
+        import aiohttp
+
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        parser = FeedParser()
+        entries: List[Tuple[str, Entry]] = []
+        size = 0
+        async with concurrency.slot(url) as slot:
+            with run_timer.stage(STAGE_NAVIGATION, self.site, url):
+                async with session.get(url, headers=headers,
+                                       timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                    slot.check_response(response)
+                    if response.status == 304:
+                        return None, False
+                    response.raise_for_status()
+                    # .xml.gz形式的站点地图需要自行解压，Content-Encoding压缩由aiohttp处理
+                    gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS) if url.endswith('.gz') else None
+                    async for chunk in response.content.iter_chunked(16384):
+                        size += len(chunk)
+                        entries.extend(parser.feed(gunzip.decompress(chunk) if gunzip else chunk))
+                    entries.extend(parser.close())
+                    self._pending[url] = {
+                        'etag': response.headers.get('ETag', ''),
+                        'last_modified': response.headers.get('Last-Modified', '')
+                    }
+        run_timer.add_count('discovery_bytes', self.site, size)
+        return entries, parser.is_index
+
+    async def _collect(self, session, url: str, since: Optional[datetime], state: Dict[str, dict],
+                       depth: int = 0) -> List[Entry]:
+        entries, is_index = await self._fetch(session, url, state.get(url, {}))
+        if entries is None:
+            logger.info(f"{url} 未变化(304)")
+            return []
+        if not is_index:
+            return [entry for kind, entry in entries if kind != 'sitemap']
+        if depth > 0:
+            return []
+
+        # 站点地图索引：只跟进最近更新过的文章类子站点地图
+        children = [
+            entry for kind, entry in entries
+            if kind == 'sitemap'
+            and any(keyword in entry[0] for keyword in self.child_keywords)
+            and (since is None or entry[1] is None or entry[1] > since)
+        ]
+        children.sort(key=lambda entry: entry[1] or datetime.min, reverse=True)
+        results = await asyncio.gather(*(
+            self._collect(session, child_url, since, state, depth + 1)
+            for child_url, _ in children[:self.max_child_sitemaps]
+        ), return_exceptions=True)
+        collected = []
+        for (child_url, _), result in zip(children, results):
+            if isinstance(result, Exception):
+                logger.error(f"读取子站点地图失败: {child_url}, 错误: {str(result)}")
+            else:
+                collected.extend(result)
+        return collected
+
+    async def discover(self, since: Optional[datetime], max_articles: int, session=None) -> Optional[List[str]]:
+        """返回发布时间晚于since的文章URL，最多max_articles个
+
+        since为None(首次运行)时按时间倒序返回最新的文章；增量模式下按时间正序返回晚于since的
+        最早的文章，下次运行的since从已存储的最新文章继续，超出数量的较新文章留到下次。
+        所有订阅和站点地图都获取失败时返回None，由调用方回退到渲染列表页。
+        """
+        sources = self.feeds + self.sitemaps
+        if not sources:
+            return None
+        # 延迟导入，未配置订阅和站点地图的站点运行不会加载HTTP抓取服务
+        from tools.fetcher import fetch_session
+        from tools.http_cache import cached_session
+
+        session = cached_session(session or fetch_session())
+        start = time.perf_counter()
+        state = self._load_state()
+        results = await asyncio.gather(
+            *(self._collect(session, url, since, state) for url in sources),
+            return_exceptions=True
+        )
+
+        latest: Dict[str, Optional[datetime]] = {}
+        failures = 0
+        undated = 0
+        for url, result in zip(sources, results):
+            if isinstance(result, Exception):
+                failures += 1
+                logger.error(f"读取订阅或站点地图失败: {url}, 错误: {str(result)}")
+                continue
+            for link, published in result:
+                if published is None and since is not None:
+                    # 没有时间的条目无法判断新旧，增量模式下跳过
+                    undated += 1
+                    continue
+                if since is not None and published <= since:
+                    continue
+                if link not in latest or (published and (latest[link] is None or published > latest[link])):
+                    latest[link] = published
+        if failures == len(sources):
+            return None
+
+        if since is None:
+            links = sorted(latest, key=lambda link: latest[link] or datetime.min, reverse=True)[:max_articles]
+        else:
+            links = sorted(latest, key=lambda link: latest[link])[:max_articles]
+            if len(latest) > max_articles:
+                # 本次没有返回全部新文章，不保存缓存校验信息，否则下次条件请求返回304，剩余的文章不会再出现
+                self._pending = {}
+                logger.info(f"{self.site} 新文章超过{max_articles}篇，其余{len(latest) - max_articles}篇留到下次运行")
+        logger.info(f"{self.site} 增量发现{len(links)}篇新文章(晚于{since})，跳过{undated}个无时间条目，"
+                    f"耗时{time.perf_counter() - start:.2f}秒")
+        return links
+
+
+def create_discovery(site: str, site_config: dict) -> Optional[FeedDiscovery]:
+    """站点开启了增量发现时创建FeedDiscovery"""
+    if not site_config.get('discovery', {}).get('enabled'):
+        return None
+    from config.base_config import BaseConfig
+    config = BaseConfig.DISCOVERY_CONFIG
+    return FeedDiscovery(site, site_config, config['state_path'], config.get('timeout', 20),
+                         config.get('max_child_sitemaps', 3))
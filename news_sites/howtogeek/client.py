@@ -1,11 +1,10 @@
-from typing import Optional, List, Dict, Any, Tuple
-import aiohttp
+from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import logging
+import time
 from model.news_article import NewsArticle
 from urllib.parse import urljoin
-from playwright.async_api import Page
 import asyncio
 import warnings
 import sys
@@ -20,31 +19,61 @@ if sys.platform.startswith('win'):
     warnings.filterwarnings("ignore", message="unclosed.*<asyncio.streams.StreamWriter.*>", 
                            category=ResourceWarning)
 
+from news_sites.link_extractor import LinkRule, extract_links
+from tools.concurrency import concurrency, is_challenge
+from tools.metrics import record_page
+from tools.timing import run_timer, STAGE_NAVIGATION, STAGE_WAIT, STAGE_CONTENT, STAGE_PARSE, STAGE_EXTRACT
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 logger = logging.getLogger(__name__)
 
+
+def _article_div_link(url: str) -> bool:
+    """过滤article区域中的标签、锚点和脚本链接"""
+    return ('/tag/' not in url and '#' not in url and 'javascript:' not in url
+            and 'howtogeek.com' in url)
+
+
+# 列表页文章链接规则：第0层为标题链接和display-card标题，第1层为h5标题和article区域中的其他链接
+LISTING_RULES = [
+    LinkRule('a.bc-title-link[title]'),
+    LinkRule('.w-display-card-content .display-card-title a'),
+    LinkRule('.w-display-card-content h5 a'),
+    LinkRule('h5 a', tier=1),
+    LinkRule('div[class*="article"] a', tier=1, accept=_article_div_link),
+    LinkRule('.article a', tier=1, accept=_article_div_link),
+]
+
 class HowToGeekClient:
     """HowToGeek API客户端"""
     
     def __init__(self, config: dict):
         self.config = config
-        self.base_url = config['url']
+        self.base_url = config.get('url', config['base_url'])
         self.latest_url = config['latest_url']
         self.max_articles = config['max_articles']
+        # 页面录制器，由--record模式设置，用于离线回放基准测试
+        self.recorder = None
         
-    async def get_latest_articles(self, page: Page, max_articles: int) -> List[str]:
+    async def get_latest_articles(self, page: 'Page', max_articles: int) -> List[str]:
         """获取最新文章链接"""
         
         logger.info(f"获取HowToGeek最新文章链接，最大数量: {max_articles}")
         
         # 获取页面HTML内容
-        html_content = await page.content()
+        with run_timer.stage(STAGE_CONTENT, 'howtogeek', page.url):
+            html_content = await page.content()
+        if is_challenge(html_content):
+            # 列表页是验证页时通知并发控制器下调上限
+            concurrency.report_failure(page.url, 'challenge')
+            logger.warning(f"列表页遇到反爬验证页面: {page.url}")
+            return []
         logger.info(f"获取到HTML内容，长度: {len(html_content)}")
-        
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # 收集所有文章链接
-        article_links = []
+        record_page('howtogeek', html_content)
+        if self.recorder:
+            self.recorder.record(page.url, html_content, 'listing')
         
         # 打印当前页面的URL，帮助调试
         current_url = page.url
@@ -53,82 +82,13 @@ class HowToGeekClient:
         # 输出一些页面基本信息帮助调试
         logger.info(f"页面标题: {await page.title()}")
         
-        # 1. 首先尝试查找网页截图中的第一个元素示例：.bc-title-link
-        logger.info("尝试查找.bc-title-link元素...")
-        title_links = soup.select('a.bc-title-link')
-        logger.info(f"找到{len(title_links)}个a.bc-title-link元素")
+        # 流式提取，标题链接和display-card中找到足够的链接后不再解析页面剩余部分
+        with run_timer.stage(STAGE_PARSE, 'howtogeek', current_url):
+            article_links, parsed = extract_links(html_content, LISTING_RULES, max_articles, self.base_url)
+        run_timer.add_count('listing_chars_skipped', 'howtogeek', len(html_content) - parsed)
+        logger.info(f"解析了{parsed}/{len(html_content)}个字符，找到{len(article_links)}个链接")
         
-        for link in title_links:
-            if link.has_attr('href') and link.has_attr('title'):
-                url = link['href']
-                title = link['title']
-                logger.info(f"找到标题链接: {title} -> {url}")
-                
-                # 确保URL完整
-                if not url.startswith(('http://', 'https://')):
-                    url = urljoin(self.base_url, url)
-                
-                if url not in article_links:
-                    article_links.append(url)
-        
-        # 2. 尝试查找网页截图中的第三个元素示例：.w-display-card-content.regular.article-block
-        if len(article_links) < max_articles:
-            logger.info("尝试查找.w-display-card-content元素...")
-            display_cards = soup.select('.w-display-card-content')
-            logger.info(f"找到{len(display_cards)}个.w-display-card-content元素")
-            
-            for card in display_cards:
-                # 查找display-card中的标题链接
-                title_link = card.select_one('.display-card-title a, h5 a')
-                if title_link and title_link.has_attr('href'):
-                    url = title_link['href']
-                    title = title_link.get_text(strip=True)
-                    logger.info(f"找到display-card标题链接: {title} -> {url}")
-                    
-                    # 确保URL完整
-                    if not url.startswith(('http://', 'https://')):
-                        url = urljoin(self.base_url, url)
-                    
-                    if url not in article_links:
-                        article_links.append(url)
-        
-        # 3. 尝试更通用的选择器
-        if len(article_links) < max_articles:
-            logger.info("尝试查找其他可能的文章链接...")
-            
-            # 查找h5标题中的链接
-            h5_links = soup.select('h5 a')
-            for link in h5_links:
-                if link.has_attr('href'):
-                    url = link['href']
-                    title = link.get_text(strip=True)
-                    
-                    # 确保URL完整
-                    if not url.startswith(('http://', 'https://')):
-                        url = urljoin(self.base_url, url)
-                    
-                    if url not in article_links:
-                        article_links.append(url)
-                        logger.info(f"找到h5链接: {title} -> {url}")
-            
-            # 查找包含"article"类的div中的链接
-            article_divs = soup.select('div[class*="article"] a, .article a')
-            for link in article_divs:
-                if link.has_attr('href'):
-                    url = link['href']
-                    # 过滤一些非文章链接
-                    if '/tag/' in url or '#' in url or 'javascript:' in url:
-                        continue
-                    
-                    # 确保URL完整
-                    if not url.startswith(('http://', 'https://')):
-                        url = urljoin(self.base_url, url)
-                    
-                    if url not in article_links and 'howtogeek.com' in url:
-                        article_links.append(url)
-                        logger.info(f"找到article div中的链接: {url}")
-        
-        # 4. 最后的尝试：直接执行JavaScript获取所有链接
+        # 规则提取的链接不够时，直接执行JavaScript获取所有链接
         if len(article_links) < max_articles:
             logger.info("执行JavaScript获取所有链接...")
             
@@ -188,21 +148,35 @@ class HowToGeekClient:
         
         return article_links
 
-    async def get_article_content(self, page: Page, url: str) -> Dict[str, Any]:
+    async def get_article_content(self, page: 'Page', url: str) -> Dict[str, Any]:
         """获取文章内容"""
         
         logger.info(f"获取文章内容: {url}")
         
         try:
-            # 访问文章页面
-            await page.goto(url, wait_until="networkidle")
-            
-            # 等待页面加载
-            await page.wait_for_load_state("networkidle")
-            
-            # 获取页面HTML内容
-            html_content = await page.content()
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # 访问文章页面，按主机的自适应并发上限占用名额
+            async with concurrency.slot(url) as slot:
+                with run_timer.stage(STAGE_NAVIGATION, 'howtogeek', url):
+                    response = await page.goto(url, wait_until="networkidle")
+                slot.check_response(response)
+                
+                # 等待页面加载
+                with run_timer.stage(STAGE_WAIT, 'howtogeek', url):
+                    await page.wait_for_load_state("networkidle")
+                
+                # 获取页面HTML内容
+                with run_timer.stage(STAGE_CONTENT, 'howtogeek', url):
+                    html_content = await page.content()
+                if slot.check_html(html_content):
+                    logger.warning(f"遇到反爬验证页面，跳过文章: {url}")
+                    run_timer.record_outcome('howtogeek', False)
+                    return None
+            record_page('howtogeek', html_content)
+            if self.recorder:
+                self.recorder.record(url, html_content, 'article')
+            with run_timer.stage(STAGE_PARSE, 'howtogeek', url):
+                soup = BeautifulSoup(html_content, 'html.parser')
+            extract_start = time.perf_counter()
             
             # 提取标题 - 尝试多种可能的选择器
             title = None
@@ -425,6 +399,9 @@ class HowToGeekClient:
             if not image_url:
                 logger.warning(f"无法提取图片URL: {url}")
             
+            run_timer.observe(STAGE_EXTRACT, time.perf_counter() - extract_start, 'howtogeek', url)
+            run_timer.record_outcome('howtogeek', True)
+            
             # 构建文章数据对象
             article = {
                 'title': title,
@@ -440,6 +417,7 @@ class HowToGeekClient:
             
         except Exception as e:
             logger.error(f"获取文章内容失败: {url}, 错误: {str(e)}", exc_info=True)
+            run_timer.record_outcome('howtogeek', False)
             return {
                 'title': "获取失败",
                 'author': "未知",
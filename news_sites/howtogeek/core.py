@@ -2,9 +2,15 @@ import asyncio
 import logging
 from typing import List, Dict, Any
 from base.base_crawler import AbstractCrawler
+from model.codec import utc_now
 from model.news_article import NewsArticle
+from news_sites.discovery import create_discovery
+from tools.concurrency import concurrency
+from tools.metrics import QUEUE_DEPTH
+from tools.timing import run_timer, STAGE_NAVIGATION, STAGE_WAIT, STAGE_DATE_PARSE
 from .client import HowToGeekClient
 from datetime import datetime
+import time
 import warnings
 import sys
 import urllib.parse
@@ -24,10 +30,14 @@ logger = logging.getLogger(__name__)
 class HowToGeekCrawler(AbstractCrawler):
     """HowToGeek爬虫实现"""
     
+    site = 'howtogeek'
+    
     def __init__(self, config: dict):
         super().__init__()
         self.config = config
         self.client = HowToGeekClient(config)
+        # RSS/Atom和站点地图增量发现，未开启时渲染列表页获取链接
+        self.discovery = create_discovery(self.site, config)
         
     async def crawl(self) -> List[NewsArticle]:
         """爬取HowToGeek最新文章"""
@@ -42,7 +52,11 @@ class HowToGeekCrawler(AbstractCrawler):
                 # 获取搜索关键词配置
                 search_keywords = self.config.get('search_keywords', [])
                 
-                if search_keywords and len(search_keywords) > 0:
+                if search_keywords and self.config.get('local_tagging'):
+                    # 本地打标签：一次常规爬取，代替逐个关键词搜索
+                    logger.info(f"使用本地关键词筛选: {search_keywords}，执行常规爬取")
+                    return self.filter_by_keywords(await self._crawl_regular(), search_keywords)
+                elif search_keywords and len(search_keywords) > 0:
                     # 有搜索关键词，执行搜索爬取
                     logger.info(f"检测到搜索关键词: {search_keywords}，执行搜索爬取")
                     return await self._crawl_with_search(search_keywords)
@@ -64,39 +78,62 @@ class HowToGeekCrawler(AbstractCrawler):
             
     async def _crawl_regular(self) -> List[NewsArticle]:
         """常规爬取方法"""
+        resumed = self.resume_links()
+        if resumed is not None:
+            # 断点续爬：直接处理上次已发现但尚未保存的文章
+            logger.info(f"从断点继续，剩余{len(resumed)}篇文章")
+            return await self._process_article_links(resumed)
+        
+        if self.discovery:
+            article_links = await self.discovery.discover(self.since, self.config.get('max_articles', 10))
+            if article_links is not None:
+                articles = await self._process_article_links(article_links) if article_links else []
+                # 文章都保存后才保存缓存校验信息，有失败的文章时下次重新读取订阅
+                self.commit_discovery(article_links, articles)
+                return articles
+            logger.warning("订阅和站点地图均不可用，改为渲染列表页")
+            
         # 首先访问最新文章页面
         latest_url = self.config.get('latest_url', 'https://www.howtogeek.com/news/')
         logger.info(f"访问HowToGeek最新文章页面: {latest_url}")
         
         # 设置用户代理
-        await self.page.set_extra_http_headers({
+        await self.set_extra_headers({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
             'Accept-Language': 'en-US,en;q=0.9'
         })
         
         # 访问页面
-        await self.page.goto(latest_url, wait_until="networkidle")
+        async with concurrency.slot(latest_url) as slot:
+            with run_timer.stage(STAGE_NAVIGATION, self.site, latest_url):
+                slot.check_response(await self.page.goto(latest_url, wait_until="networkidle"))
         logger.info("页面加载完成")
         
         # 等待一段时间确保页面完全加载
-        await asyncio.sleep(2)
+        with run_timer.stage(STAGE_WAIT, self.site):
+            await asyncio.sleep(2)
             
         # 获取最新文章链接
         max_articles = self.config.get('max_articles', 10)
-        article_links = await self.client.get_latest_articles(self.page, max_articles)
-        logger.info(f"获取到{len(article_links)}篇文章链接")
+        first_links = await self.client.get_latest_articles(self.page, max_articles)
+        logger.info(f"获取到{len(first_links)}篇文章链接")
+        # 需要时继续翻页，遇到已存储或过旧的文章时停止
+        article_links = await self.collect_links(first_links, max_articles, self.listing_page_url)
         
-        if not article_links:
+        if not first_links:
             # 如果没有获取到链接，尝试直接从主页获取
             logger.warning("未从新闻页面获取到文章链接，尝试从主页获取")
             main_url = self.config.get('url', 'https://www.howtogeek.com')
-            await self.page.goto(main_url, wait_until="networkidle")
-            await asyncio.sleep(2)
-            article_links = await self.client.get_latest_articles(self.page, max_articles)
+            async with concurrency.slot(main_url) as slot:
+                with run_timer.stage(STAGE_NAVIGATION, self.site, main_url):
+                    slot.check_response(await self.page.goto(main_url, wait_until="networkidle"))
+            with run_timer.stage(STAGE_WAIT, self.site):
+                await asyncio.sleep(2)
+            article_links = await self.collect_links(await self.client.get_latest_articles(self.page, max_articles), max_articles)
             logger.info(f"从主页获取到{len(article_links)}篇文章链接")
         
         if not article_links:
-            logger.warning("未获取到任何文章链接")
+            logger.warning("未获取到需要爬取的文章链接")
             return []
         
         # 爬取文章内容
@@ -109,6 +146,17 @@ class HowToGeekCrawler(AbstractCrawler):
         
         # 处理每个关键词
         for keyword in keywords:
+            if self.journal and self.journal.is_done(keyword):
+                logger.info(f"关键词 '{keyword}' 已在上次运行中完成，跳过")
+                continue
+            resumed = self.resume_links(keyword)
+            if resumed is not None:
+                # 断点续爬：不再搜索翻页，直接处理上次已发现但尚未保存的文章
+                logger.info(f"关键词 '{keyword}' 从断点继续，剩余{len(resumed)}篇文章")
+                all_articles.extend(await self._process_article_links(resumed, keyword))
+                self.journal.keyword_done(keyword)
+                continue
+            
             logger.info(f"使用关键词 '{keyword}' 进行搜索")
             
             try:
@@ -119,8 +167,11 @@ class HowToGeekCrawler(AbstractCrawler):
                 logger.info(f"使用直接URL搜索方式: {search_url}")
                 
                 # 访问搜索结果页面
-                await self.page.goto(search_url, wait_until="networkidle")
-                await asyncio.sleep(5)  # 等待页面完全加载
+                async with concurrency.slot(search_url) as slot:
+                    with run_timer.stage(STAGE_NAVIGATION, self.site, search_url):
+                        slot.check_response(await self.page.goto(search_url, wait_until="networkidle"))
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await asyncio.sleep(5)  # 等待页面完全加载
                 
                 # 输出页面标题和URL，用于调试
                 page_title = await self.page.title()
@@ -130,13 +181,20 @@ class HowToGeekCrawler(AbstractCrawler):
                 
                 # 获取搜索结果中的文章链接
                 logger.info(f"获取搜索结果中的文章链接(最多{max_articles_per_keyword}篇)")
-                article_links = await self.client.get_latest_articles(self.page, max_articles_per_keyword)
-                logger.info(f"搜索 '{keyword}' 获取到{len(article_links)}篇文章链接")
+                first_links = await self.client.get_latest_articles(self.page, max_articles_per_keyword)
+                logger.info(f"搜索 '{keyword}' 获取到{len(first_links)}篇文章链接")
+                # 需要时继续翻页，遇到已存储或过旧的文章时停止
+                article_links = await self.collect_links(
+                    first_links, max_articles_per_keyword,
+                    lambda number: self.search_page_url(keyword, number), wait_seconds=5
+                )
                 
                 # 如果找不到任何文章，尝试备用方法
-                if not article_links:
+                if not first_links:
                     logger.warning(f"直接URL搜索未找到任何文章，尝试备用搜索方法")
-                    article_links = await self._fallback_search(keyword, max_articles_per_keyword)
+                    article_links = await self.collect_links(
+                        await self._fallback_search(keyword, max_articles_per_keyword), max_articles_per_keyword
+                    )
                     
                 if article_links:
                     # 处理文章内容，并设置关键词
@@ -154,7 +212,9 @@ class HowToGeekCrawler(AbstractCrawler):
                 # 尝试备用方法
                 try:
                     logger.info(f"尝试使用备用方法搜索关键词 '{keyword}'")
-                    article_links = await self._fallback_search(keyword, max_articles_per_keyword)
+                    article_links = await self.collect_links(
+                        await self._fallback_search(keyword, max_articles_per_keyword), max_articles_per_keyword
+                    )
                     
                     if article_links:
                         # 处理文章内容，并设置关键词
@@ -163,6 +223,9 @@ class HowToGeekCrawler(AbstractCrawler):
                         logger.info(f"使用备用方法成功爬取 '{keyword}' 的{len(keyword_articles)}篇文章")
                 except Exception as e2:
                     logger.error(f"备用搜索方法也失败: {str(e2)}")
+            finally:
+                if self.journal:
+                    self.journal.keyword_done(keyword)
                 
         # 返回所有爬取的文章
         logger.info(f"所有关键词搜索完成，共爬取到{len(all_articles)}篇文章")
@@ -175,8 +238,11 @@ class HowToGeekCrawler(AbstractCrawler):
         # 访问主页
         main_url = self.config.get('url', 'https://www.howtogeek.com')
         logger.info(f"访问主页: {main_url}")
-        await self.page.goto(main_url, wait_until="networkidle")
-        await asyncio.sleep(5)  # 增加等待时间，确保页面完全加载
+        async with concurrency.slot(main_url) as slot:
+            with run_timer.stage(STAGE_NAVIGATION, self.site, main_url):
+                slot.check_response(await self.page.goto(main_url, wait_until="networkidle"))
+        with run_timer.stage(STAGE_WAIT, self.site):
+            await asyncio.sleep(5)  # 增加等待时间，确保页面完全加载
         
         try:
             # 1. 点击侧边栏菜单按钮
@@ -186,14 +252,16 @@ class HowToGeekCrawler(AbstractCrawler):
                 await self.page.wait_for_selector(sidebar_selector, timeout=10000)
                 await self.page.click(sidebar_selector)
                 logger.info("成功点击侧边栏菜单按钮")
-                await asyncio.sleep(2)  # 等待侧边栏展开
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await asyncio.sleep(2)  # 等待侧边栏展开
             except Exception as e:
                 logger.warning(f"点击侧边栏按钮失败: {str(e)}")
                 # 如果找不到精确选择器，尝试更宽松的选择器
                 try:
                     await self.page.click("label.menu-icon")
                     logger.info("成功使用备选选择器点击侧边栏按钮")
-                    await asyncio.sleep(2)
+                    with run_timer.stage(STAGE_WAIT, self.site):
+                        await asyncio.sleep(2)
                 except Exception as e2:
                     logger.error(f"点击侧边栏按钮(备选方法)失败: {str(e2)}")
             
@@ -204,14 +272,16 @@ class HowToGeekCrawler(AbstractCrawler):
                 await self.page.wait_for_selector(search_button_selector, timeout=10000)
                 await self.page.click(search_button_selector)
                 logger.info("成功点击搜索按钮")
-                await asyncio.sleep(2)  # 等待搜索框出现
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await asyncio.sleep(2)  # 等待搜索框出现
             except Exception as e:
                 logger.warning(f"点击搜索按钮失败: {str(e)}")
                 # 尝试备选选择器或JavaScript方法
                 try:
                     await self.page.click("span.icon.i-search-menu")
                     logger.info("成功使用备选选择器点击搜索按钮")
-                    await asyncio.sleep(2)
+                    with run_timer.stage(STAGE_WAIT, self.site):
+                        await asyncio.sleep(2)
                 except Exception as e2:
                     logger.error(f"点击搜索按钮(备选方法)失败: {str(e2)}")
                     
@@ -240,7 +310,8 @@ class HowToGeekCrawler(AbstractCrawler):
                             }
                         """)
                         logger.info("通过JavaScript点击搜索按钮")
-                        await asyncio.sleep(2)
+                        with run_timer.stage(STAGE_WAIT, self.site):
+                            await asyncio.sleep(2)
                     except Exception as e3:
                         logger.error(f"使用JavaScript点击搜索按钮失败: {str(e3)}")
                         return []  # 如果所有方法都失败，返回空列表
@@ -268,9 +339,11 @@ class HowToGeekCrawler(AbstractCrawler):
                 # 清空搜索框并输入关键词
                 logger.info(f"清空搜索框并输入关键词: {keyword}")
                 await self.page.fill(search_input_selector, '')
-                await asyncio.sleep(1)
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await asyncio.sleep(1)
                 await self.page.fill(search_input_selector, keyword)
-                await asyncio.sleep(2)  # 等待自动建议显示
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await asyncio.sleep(2)  # 等待自动建议显示
                 
                 # 按回车键执行搜索
                 logger.info("按回车键执行搜索")
@@ -278,8 +351,10 @@ class HowToGeekCrawler(AbstractCrawler):
                 
                 # 等待搜索结果加载
                 logger.info("等待搜索结果加载")
-                await self.page.wait_for_load_state("networkidle", timeout=30000)
-                await asyncio.sleep(5)  # 等待加载完成
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await self.page.wait_for_load_state("networkidle", timeout=30000)
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await asyncio.sleep(5)  # 等待加载完成
                 
                 # 获取搜索结果中的文章链接
                 logger.info(f"获取搜索结果中的文章链接(最多{max_articles}篇)")
@@ -299,14 +374,20 @@ class HowToGeekCrawler(AbstractCrawler):
     async def _process_article_links(self, article_links: List[str], keyword: str = None) -> List[NewsArticle]:
         """处理文章链接，爬取文章内容"""
         articles = []
-        for url in article_links:
+        # 记入运行日志，并跳过上次运行中已保存的文章
+        article_links = self.checkpoint_links(article_links, keyword)
+        if await self.defer_links(article_links, keyword):
+            # 多进程模式：文章由工作进程从任务队列中领取后抓取
+            return articles
+        # 按主机的自适应并发上限同时打开多个页面抓取文章
+        results = await self.fetch_concurrently(article_links, self.client.get_article_content)
+        for url, article_data in zip(article_links, results):
             try:
-                # 使用同一个页面顺序处理每篇文章
-                article_data = await self.client.get_article_content(self.page, url)
                 if article_data:
                     # 转换为NewsArticle对象
                     try:
                         # 处理日期字符串
+                        date_start = time.perf_counter()
                         pub_date = article_data.get('pub_date', '')
                         if isinstance(pub_date, str):
                             try:
@@ -331,12 +412,14 @@ class HowToGeekCrawler(AbstractCrawler):
                                             continue
                                     else:
                                         # 如果所有格式都失败，使用当前时间
-                                        published_date = datetime.now()
+                                        published_date = utc_now()
                             except Exception as e:
                                 logger.warning(f"日期解析失败: {pub_date}, 错误: {str(e)}")
-                                published_date = datetime.now()
+                                published_date = utc_now()
                         else:
-                            published_date = datetime.now()
+                            published_date = utc_now()
+                        
+                        run_timer.observe(STAGE_DATE_PARSE, time.perf_counter() - date_start, self.site, url)
                         
                         article = NewsArticle(
                             title=article_data.get('title', '未知标题'),
@@ -349,11 +432,13 @@ class HowToGeekCrawler(AbstractCrawler):
                             keyword=keyword  # 设置关键词
                         )
                         articles.append(article)
+                        await self.emit_article(article)
                     except Exception as e:
                         logger.error(f"创建文章对象失败: {str(e)}")
             except Exception as e:
                 logger.error(f"爬取文章内容失败: {url}, 错误: {str(e)}")
         
+        QUEUE_DEPTH.labels(self.site).set(0)
         logger.info(f"成功爬取{len(articles)}篇文章")
         return articles
 
@@ -0,0 +1,210 @@
+"""列表页文章链接的流式提取
+
+列表页HTML按块送入html.parser，边解析边匹配链接规则，不构建完整的DOM；
+第0层规则找到足够的有效链接后立即停止解析，页面后半部分(页脚、推荐区、脚本)不再处理。
+
+规则使用CSS选择器的一个子集：只支持后代组合符(空格)，每一级可以是
+标签名、.类名、[属性]、[属性="值"]、[属性*="值"]、[属性^="值"]、[属性$="值"]的组合，
+最后一级必须匹配<a>元素，例如 '.mvp-blog-story-list a[href*="unite.ai"]'。
+"""
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+
+# 没有结束标签的元素，不压入元素栈
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+              'param', 'source', 'track', 'wbr'}
+
+_COMPOUND_RE = re.compile(r'^([a-zA-Z][\w-]*|\*)?((?:\.[\w-]+|\[[^\]]+\])*)$')
+_PART_RE = re.compile(r'\.([\w-]+)|\[\s*([\w-]+)\s*(?:([*^$]?=)\s*["\']?([^"\'\]]*)["\']?)?\s*\]')
+
+
+class _Compound:
+    """选择器中的一级，如 a.title[href*="20"]"""
+
+    def __init__(self, text: str):
+        match = _COMPOUND_RE.match(text)
+        if not match:
+            raise ValueError(f"不支持的选择器: {text}")
+        self.tag = None if match.group(1) in (None, '*') else match.group(1).lower()
+        self.classes = set()
+        self.attrs: List[Tuple[str, Optional[str], str]] = []
+        for class_name, attr, op, value in _PART_RE.findall(match.group(2)):
+            if class_name:
+                self.classes.add(class_name)
+            else:
+                self.attrs.append((attr.lower(), op or None, value))
+
+    def matches(self, tag: str, attrs: Dict[str, str], classes: set) -> bool:
+        if self.tag and self.tag != tag:
+            return False
+        if not self.classes <= classes:
+            return False
+        for name, op, value in self.attrs:
+            actual = attrs.get(name)
+            if actual is None:
+                return False
+            if (op == '=' and actual != value) or (op == '*=' and value not in actual) \
+                    or (op == '^=' and not actual.startswith(value)) or (op == '$=' and not actual.endswith(value)):
+                return False
+        return True
+
+
+class LinkRule:
+    """一条链接规则
+
+    Args:
+        selector: 匹配<a>元素的选择器
+        tier: 优先级，0最高；第0层找到足够链接时停止解析，较低层的链接只在不够时补充
+        contains: 链接内必须包含的标签，如'h2'(对应选择器'a h2')
+        min_text: 链接文字(没有时为title属性)的最少字符数，用于排除导航链接
+        accept: 对补全后的绝对URL的额外过滤
+    """
+
+    def __init__(self, selector: str, tier: int = 0, contains: Optional[str] = None, min_text: int = 0,
+                 accept: Optional[Callable[[str], bool]] = None):
+        self.selector = selector
+        self.compounds = [_Compound(part) for part in selector.split()]
+        if self.compounds[-1].tag != 'a':
+            raise ValueError(f"链接规则的最后一级必须是a元素: {selector}")
+        self.tier = tier
+        self.contains = contains
+        self.min_text = min_text
+        self.accept = accept
+
+    def matches(self, element: tuple, ancestors: list) -> bool:
+        """element和ancestors中的元素均为(标签, 属性, 类名集合)，ancestors从外到内"""
+        if not self.compounds[-1].matches(*element):
+            return False
+        index = len(ancestors) - 1
+        for compound in reversed(self.compounds[:-1]):
+            while index >= 0 and not compound.matches(*ancestors[index]):
+                index -= 1
+            if index < 0:
+                return False
+            index -= 1
+        return True
+
+
+class _Anchor:
+    """正在解析的<a>元素"""
+
+    def __init__(self, href: str, title: str, rules: List[LinkRule]):
+        self.href = href
+        self.title = title
+        self.rules = rules
+        self.text: List[str] = []
+        self.tags: set = set()
+
+
+class LinkExtractor(HTMLParser):
+    """按规则流式提取列表页中的文章链接
+
+    Args:
+        rules: 链接规则，同一层内按在页面中出现的顺序返回
+        base_url: 补全相对链接
+        accept: 对所有规则生效的URL过滤
+    """
+
+    def __init__(self, rules: Sequence[LinkRule], base_url: str = '',
+                 accept: Optional[Callable[[str], bool]] = None):
+        super().__init__(convert_charrefs=True)
+        self.rules = list(rules)
+        self.base_url = base_url
+        self.accept = accept
+        self.parsed_chars = 0
+        self._stack: List[tuple] = []
+        self._anchor: Optional[_Anchor] = None
+        self._found: List[Tuple[int, str]] = []
+
+    def handle_starttag(self, tag: str, attrs):
+        if self._anchor is not None:
+            if tag == 'a':
+                # 嵌套的<a>隐式结束前一个链接
+                self._finish_anchor()
+            else:
+                self._anchor.tags.add(tag)
+        attributes = {name: value or '' for name, value in attrs}
+        element = (tag, attributes, set(attributes.get('class', '').split()))
+        if tag == 'a' and attributes.get('href'):
+            rules = [rule for rule in self.rules if rule.matches(element, self._stack)]
+            if rules:
+                self._anchor = _Anchor(attributes['href'], attributes.get('title', ''), rules)
+        if tag not in _VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag: str, attrs):
+        if self._anchor is not None:
+            self._anchor.tags.add(tag)
+
+    def handle_endtag(self, tag: str):
+        if tag == 'a' and self._anchor is not None:
+            self._finish_anchor()
+        # 弹出到最近的同名元素，未闭合的子元素一起弹出；没有同名元素时忽略
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                break
+
+    def handle_data(self, data: str):
+        if self._anchor is not None:
+            self._anchor.text.append(data)
+
+    def _finish_anchor(self):
+        anchor, self._anchor = self._anchor, None
+        url = anchor.href.strip()
+        if not url.startswith(('http://', 'https://')):
+            url = urljoin(self.base_url, url)
+        if self.accept and not self.accept(url):
+            return
+        text = ''.join(anchor.text).strip() or anchor.title
+        tiers = [
+            rule.tier for rule in anchor.rules
+            if (not rule.contains or rule.contains in anchor.tags)
+            and len(text) >= rule.min_text
+            and (not rule.accept or rule.accept(url))
+        ]
+        if tiers:
+            self._found.append((min(tiers), url))
+
+    def iter_links(self, html: str, chunk_size: int = 16384) -> Iterator[Tuple[int, str]]:
+        """逐块解析HTML，按出现顺序产出(层, 链接)，调用方停止迭代后不再解析剩余内容"""
+        for start in range(0, len(html), chunk_size):
+            self.feed(html[start:start + chunk_size])
+            self.parsed_chars = min(start + chunk_size, len(html))
+            found, self._found = self._found, []
+            yield from found
+        self.close()
+        if self._anchor is not None:
+            self._finish_anchor()
+        yield from self._found
+        self._found = []
+
+    def extract(self, html: str, max_links: int, chunk_size: int = 16384) -> List[str]:
+        """返回最多max_links个不重复的链接，高优先级层在前
+
+        第0层找到max_links个链接时立即停止解析。同一链接被多条规则匹配时取最高的层。
+        """
+        best: Dict[str, Tuple[int, int]] = {}
+        top = 0
+        for tier, url in self.iter_links(html, chunk_size):
+            if url in best:
+                if tier < best[url][0]:
+                    best[url] = (tier, best[url][1])
+                    top += tier == 0
+            else:
+                best[url] = (tier, len(best))
+                top += tier == 0
+            if top >= max_links:
+                break
+        ordered = sorted(best, key=lambda url: best[url])
+        return ordered[:max_links]
+
+
+def extract_links(html: str, rules: Sequence[LinkRule], max_links: int, base_url: str = '',
+                  accept: Optional[Callable[[str], bool]] = None) -> Tuple[List[str], int]:
+    """流式提取链接，返回(链接列表, 实际解析的字符数)"""
+    extractor = LinkExtractor(rules, base_url, accept)
+    links = extractor.extract(html, max_links)
+    return links, extractor.parsed_chars
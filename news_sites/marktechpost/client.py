@@ -1,12 +1,49 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 import logging
+import time
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from playwright.async_api import Page
 import asyncio
 
+from news_sites.link_extractor import LinkRule, extract_links
+from tools.concurrency import concurrency, is_challenge
+from tools.metrics import record_page
+from tools.timing import run_timer, STAGE_NAVIGATION, STAGE_WAIT, STAGE_CONTENT, STAGE_PARSE, STAGE_EXTRACT
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 logger = logging.getLogger(__name__)
 
+# 搜索结果页面中排除的链接
+_SEARCH_EXCLUDED = ['/category/', '/tag/', '/page/', '/author/', 'wp-content', 'wp-admin', 'wp-login']
+
+
+def _listing_link(url: str) -> bool:
+    """排除分类、标签、翻页链接，保留MarkTechPost域名下的文章链接(通常包含年份，如/2025/03/)"""
+    if '/category/' in url or '#' in url or 'page' in url or '/tag/' in url:
+        return False
+    return 'marktechpost.com' in url and ('/20' in url or '/article/' in url)
+
+
+def _search_link(url: str) -> bool:
+    """搜索结果中的文章链接：必须包含年份，例如 https://www.marktechpost.com/2025/03/02/article-title/"""
+    return 'marktechpost.com' in url and '/20' in url and not any(exclude in url for exclude in _SEARCH_EXCLUDED)
+
+
+# 列表页文章链接规则，都属于第0层，按在页面中出现的顺序收集
+LISTING_RULES = [
+    LinkRule(selector, accept=_listing_link) for selector in [
+        'article.post h2.entry-title a',
+        '.archive-list .title a',
+        '.entry-title a',
+        '.search-results article a.title',
+        '.post-title a',
+        'h2.title a'
+    ]
+]
+# 搜索结果页面的补充规则，链接文字太短的通常是导航链接
+SEARCH_RULES = [LinkRule('a', tier=1, min_text=16, accept=_search_link)]
+
 class MarkTechPostClient:
     """MarkTechPost API客户端"""
     
@@ -15,21 +52,26 @@ class MarkTechPostClient:
         self.base_url = config['base_url']
         self.latest_url = config['latest_url']
         self.max_articles = config['max_articles']
+        # 页面录制器，由--record模式设置，用于离线回放基准测试
+        self.recorder = None
         
-    async def get_latest_articles(self, page: Page, max_articles: int) -> List[str]:
+    async def get_latest_articles(self, page: 'Page', max_articles: int) -> List[str]:
         """获取最新文章链接"""
         
         logger.info(f"获取MarkTechPost最新文章链接，最大数量: {max_articles}")
         
         # 获取页面HTML内容
-        html_content = await page.content()
+        with run_timer.stage(STAGE_CONTENT, 'marktechpost', page.url):
+            html_content = await page.content()
+        if is_challenge(html_content):
+            # 列表页是验证页时通知并发控制器下调上限
+            concurrency.report_failure(page.url, 'challenge')
+            logger.warning(f"列表页遇到反爬验证页面: {page.url}")
+            return []
         logger.info(f"获取到HTML内容，长度: {len(html_content)}")
-        
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # 收集所有文章链接
-        article_links = []
+        record_page('marktechpost', html_content)
+        if self.recorder:
+            self.recorder.record(page.url, html_content, 'listing')
         
         # 打印当前页面的URL，帮助调试
         current_url = page.url
@@ -38,123 +80,57 @@ class MarkTechPostClient:
         # 输出一些页面基本信息帮助调试
         logger.info(f"页面标题: {await page.title()}")
         
-        # 优化的选择器，特别针对MarkTechPost网站的常见文章链接选择器
-        article_selectors = [
-            'article.post h2.entry-title a', 
-            '.archive-list .title a',
-            '.entry-title a',
-            '.search-results article a.title',
-            '.post-title a',
-            'h2.title a'
-        ]
-        
-        # 尝试不同的选择器
-        for selector in article_selectors:
-            links = soup.select(selector)
-            logger.info(f"使用选择器 '{selector}' 找到 {len(links)} 个链接")
-            
-            for link in links:
-                if link.has_attr('href'):
-                    url = link['href']
-                    # 排除非文章链接
-                    if '/category/' in url or '#' in url or 'page' in url or '/tag/' in url:
-                        continue
-                        
-                    # 确保URL完整
-                    if not url.startswith(('http://', 'https://')):
-                        url = urljoin(self.base_url, url)
-                    
-                    # 确保链接为MarkTechPost域名且是文章链接格式（通常包含年份）
-                    if ('marktechpost.com' in url and url not in article_links and 
-                        (('/20' in url) or ('/article/' in url))):  # 大多数文章URL包含年份格式（如/2025/03/）
-                        # 尝试获取标题
-                        title = link.get_text(strip=True) if link.get_text(strip=True) else "未知标题"
-                        logger.info(f"找到文章: {title} -> {url}")
-                        article_links.append(url)
-                        
-                        if len(article_links) >= max_articles:
-                            break
-                            
-            if len(article_links) >= max_articles:
-                break
-                
-        # 如果没有找到足够的文章，尝试更加精确的方法查找文章链接
-        if len(article_links) < max_articles:
-            logger.info("通过常规选择器未找到足够文章，尝试更精确的方法")
-            
-            # 针对搜索结果页面的特殊处理
-            if "?s=" in current_url:  # 判断是否是搜索结果页面
-                # 查找所有可能的文章链接，主要关注那些包含年份的URL，这通常是文章链接的特征
-                all_links = soup.find_all('a')
-                for link in all_links:
-                    if link.has_attr('href'):
-                        url = link['href']
-                        
-                        # 确保URL完整
-                        if not url.startswith(('http://', 'https://')):
-                            url = urljoin(self.base_url, url)
-                        
-                        # 使用更严格的过滤条件：必须包含年份格式（通常文章URL都包含发布日期）
-                        # 例如：https://www.marktechpost.com/2025/03/02/article-title/
-                        if ('marktechpost.com' in url and 
-                            url not in article_links and 
-                            '/20' in url and  # 匹配年份格式
-                            not any(exclude in url for exclude in ['/category/', '/tag/', '/page/', '/author/', 'wp-content', 'wp-admin', 'wp-login'])):
-                            
-                            # 尝试找到链接相关的标题（如果有）
-                            title = "未知标题"
-                            if link.get_text(strip=True):
-                                title = link.get_text(strip=True)
-                            elif link.has_attr('title'):
-                                title = link['title']
-                            
-                            # 如果文本内容不为空且不太短（可能是导航链接），则添加这个链接
-                            if len(title) > 15:  # 假设正常文章标题应该足够长
-                                logger.info(f"通过更精确方法找到文章: {title} -> {url}")
-                                article_links.append(url)
-                                
-                                if len(article_links) >= max_articles:
-                                    break
-        
-        # 筛选出真正的文章链接，移除主页、账户页面等非文章链接
-        filtered_links = []
-        for url in article_links:
-            # 排除常见的非文章URL模式
-            if (self.base_url + '/' == url or  # 主页
-                '/my-account' in url or        # 账户页面
-                '/login' in url or             # 登录页面
-                '/ai-magazine' in url or       # 杂志页面
-                any(non_article in url for non_article in ['?signup', '/privacy-policy/', '/contact/', '/about/'])):
-                logger.info(f"排除非文章链接: {url}")
-                continue
-            
-            # 保留真正的文章链接
-            filtered_links.append(url)
-        
-        # 将筛选后的链接作为结果
-        article_links = filtered_links[:max_articles]
+        # 搜索结果页面额外匹配所有包含年份的长标题链接，常规选择器找到足够链接后不再解析页面剩余部分
+        rules = LISTING_RULES + SEARCH_RULES if "?s=" in current_url else LISTING_RULES
+        with run_timer.stage(STAGE_PARSE, 'marktechpost', current_url):
+            article_links, parsed = extract_links(html_content, rules, max_articles, self.base_url,
+                                                  self.is_article_link)
+        run_timer.add_count('listing_chars_skipped', 'marktechpost', len(html_content) - parsed)
+        logger.info(f"解析了{parsed}/{len(html_content)}个字符")
         
         logger.info(f"筛选后共找到{len(article_links)}个有效文章链接")
         for idx, url in enumerate(article_links):
             logger.info(f"有效文章{idx+1}: {url}")
         
         return article_links
+        
+    def is_article_link(self, url: str) -> bool:
+        """排除主页、账户页面等非文章链接"""
+        return not (self.base_url + '/' == url or  # 主页
+                    '/my-account' in url or        # 账户页面
+                    '/login' in url or             # 登录页面
+                    '/ai-magazine' in url or       # 杂志页面
+                    any(non_article in url for non_article in ['?signup', '/privacy-policy/', '/contact/', '/about/']))
 
-    async def get_article_content(self, page: Page, url: str) -> Dict[str, Any]:
+    async def get_article_content(self, page: 'Page', url: str) -> Dict[str, Any]:
         """获取文章内容"""
         
         logger.info(f"获取文章内容: {url}")
         
         try:
-            # 访问文章页面，并减少超时等待时间
-            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            
-            # 等待页面加载，但不等待所有网络请求完成
-            await page.wait_for_load_state("domcontentloaded")
-            
-            # 获取页面HTML内容
-            html_content = await page.content()
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # 访问文章页面，并减少超时等待时间，按主机的自适应并发上限占用名额
+            async with concurrency.slot(url) as slot:
+                with run_timer.stage(STAGE_NAVIGATION, 'marktechpost', url):
+                    response = await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                slot.check_response(response)
+                
+                # 等待页面加载，但不等待所有网络请求完成
+                with run_timer.stage(STAGE_WAIT, 'marktechpost', url):
+                    await page.wait_for_load_state("domcontentloaded")
+                
+                # 获取页面HTML内容
+                with run_timer.stage(STAGE_CONTENT, 'marktechpost', url):
+                    html_content = await page.content()
+                if slot.check_html(html_content):
+                    logger.warning(f"遇到反爬验证页面，跳过文章: {url}")
+                    run_timer.record_outcome('marktechpost', False)
+                    return None
+            record_page('marktechpost', html_content)
+            if self.recorder:
+                self.recorder.record(url, html_content, 'article')
+            with run_timer.stage(STAGE_PARSE, 'marktechpost', url):
+                soup = BeautifulSoup(html_content, 'html.parser')
+            extract_start = time.perf_counter()
             
             # 提取标题
             title_elem = soup.select_one('h1.entry-title, .td-post-title h1')
@@ -242,9 +218,12 @@ class MarkTechPostClient:
             else:
                 logger.warning("未找到文章内容元素")
             
+            run_timer.observe(STAGE_EXTRACT, time.perf_counter() - extract_start, 'marktechpost', url)
+            
             # 如果内容为空，返回None
             if not content.strip():
                 logger.warning(f"文章内容为空，将跳过保存: {url}")
+                run_timer.record_outcome('marktechpost', False)
                 return None
                 
             # 构建文章数据
@@ -257,10 +236,12 @@ class MarkTechPostClient:
                 'url': url
             }
             
+            run_timer.record_outcome('marktechpost', True)
             return article_data
             
         except Exception as e:
             logger.error(f"获取文章内容失败: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
+            run_timer.record_outcome('marktechpost', False)
             return None 
\ No newline at end of file
@@ -1,14 +1,20 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from base.base_crawler import AbstractCrawler
+from model.codec import utc_now
 from model.news_article import NewsArticle
+from news_sites.discovery import create_discovery
+from news_sites.wordpress import WordPressClient, WordPressAPIError
+from tools.concurrency import concurrency
+from tools.metrics import QUEUE_DEPTH
+from tools.timing import run_timer, STAGE_NAVIGATION, STAGE_WAIT, STAGE_DATE_PARSE
 from .client import MarkTechPostClient
 from datetime import datetime
+import time
 import warnings
 import sys
 import urllib.parse
-from playwright.async_api import async_playwright, TimeoutError
 
 # 添加警告过滤，抑制Windows平台上asyncio的管道关闭警告
 if sys.platform.startswith('win'):
@@ -24,16 +30,29 @@ logger = logging.getLogger(__name__)
 class MarkTechPostCrawler(AbstractCrawler):
     """MarkTechPost爬虫实现"""
     
+    site = 'marktechpost'
+    
     def __init__(self, config: dict):
         super().__init__()
         self.config = config
         self.client = MarkTechPostClient(config)
+        # RSS/Atom和站点地图增量发现，未开启时渲染列表页获取链接
+        self.discovery = create_discovery(self.site, config)
+        # WordPress接口模式，一次分页JSON请求代替逐篇渲染页面
+        self.use_api = config.get('wordpress_api', {}).get('enabled', False)
         
     async def crawl(self) -> List[NewsArticle]:
         """爬取MarkTechPost最新文章"""
         try:
             logger.info("开始爬取MarkTechPost文章...")
             
+            if self.use_api:
+                articles = await self._crawl_api()
+                if articles is not None:
+                    return articles
+                # 接口不可用时回退到浏览器爬取
+                await self.init_browser()
+            
             if not self.page:
                 logger.error("浏览器未初始化")
                 return []
@@ -42,7 +61,11 @@ class MarkTechPostCrawler(AbstractCrawler):
                 # 获取搜索关键词配置
                 search_keywords = self.config.get('search_keywords', [])
                 
-                if search_keywords and len(search_keywords) > 0:
+                if search_keywords and self.config.get('local_tagging'):
+                    # 本地打标签：一次常规爬取，代替逐个关键词搜索
+                    logger.info(f"使用本地关键词筛选: {search_keywords}，执行常规爬取")
+                    return self.filter_by_keywords(await self._crawl_regular(), search_keywords)
+                elif search_keywords and len(search_keywords) > 0:
                     # 有搜索关键词，执行搜索爬取
                     logger.info(f"检测到搜索关键词: {search_keywords}，执行搜索爬取")
                     return await self._crawl_with_search(search_keywords)
@@ -62,41 +85,81 @@ class MarkTechPostCrawler(AbstractCrawler):
             logger.error(f"爬取MarkTechPost文章时出错: {str(e)}")
             return []
             
+    async def _crawl_api(self) -> Optional[List[NewsArticle]]:
+        """通过WordPress接口爬取，搜索关键词直接作为search参数，接口不可用时返回None"""
+        search_keywords = self.config.get('search_keywords', [])
+        local_tagging = bool(search_keywords) and self.config.get('local_tagging')
+        try:
+            articles = await WordPressClient(self.site, self.config).crawl(
+                self.config.get('max_articles', 10),
+                None if local_tagging else search_keywords
+            )
+        except WordPressAPIError as e:
+            logger.warning(f"WordPress接口不可用，改用浏览器爬取: {str(e)}")
+            return None
+        if local_tagging:
+            return self.filter_by_keywords(articles, search_keywords)
+        logger.info(f"通过WordPress接口获取到{len(articles)}篇文章")
+        return articles
+            
     async def _crawl_regular(self) -> List[NewsArticle]:
         """常规爬取方法"""
+        resumed = self.resume_links()
+        if resumed is not None:
+            # 断点续爬：直接处理上次已发现但尚未保存的文章
+            logger.info(f"从断点继续，剩余{len(resumed)}篇文章")
+            return await self._process_article_links(resumed)
+        
+        if self.discovery:
+            article_links = await self.discovery.discover(self.since, self.config.get('max_articles', 10))
+            if article_links is not None:
+                articles = await self._process_article_links(article_links) if article_links else []
+                # 文章都保存后才保存缓存校验信息，有失败的文章时下次重新读取订阅
+                self.commit_discovery(article_links, articles)
+                return articles
+            logger.warning("订阅和站点地图均不可用，改为渲染列表页")
+            
         # 访问最新文章页面
         latest_url = self.config.get('latest_url', 'https://www.marktechpost.com/category/tech-news/')
         logger.info(f"访问MarkTechPost最新文章页面: {latest_url}")
         
         # 设置用户代理
-        await self.page.set_extra_http_headers({
+        await self.set_extra_headers({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
             'Accept-Language': 'en-US,en;q=0.9'
         })
         
         # 访问页面
-        await self.page.goto(latest_url, wait_until="networkidle")
+        async with concurrency.slot(latest_url) as slot:
+            with run_timer.stage(STAGE_NAVIGATION, self.site, latest_url):
+                slot.check_response(await self.page.goto(latest_url, wait_until="networkidle"))
         logger.info("页面加载完成")
         
         # 等待一段时间确保页面完全加载
-        await asyncio.sleep(2)
+        with run_timer.stage(STAGE_WAIT, self.site):
+            await asyncio.sleep(2)
             
         # 获取最新文章链接
         max_articles = self.config.get('max_articles', 10)
-        article_links = await self.client.get_latest_articles(self.page, max_articles)
-        logger.info(f"获取到{len(article_links)}篇文章链接")
+        first_links = await self.client.get_latest_articles(self.page, max_articles)
+        logger.info(f"获取到{len(first_links)}篇文章链接")
+        # 需要时继续翻页，遇到已存储或过旧的文章时停止
+        article_links = await self.collect_links(first_links, max_articles, self.listing_page_url)
         
-        if not article_links:
+        if not first_links:
             # 如果没有获取到链接，尝试直接从主页获取
             logger.warning("未从新闻页面获取到文章链接，尝试从主页获取")
             main_url = self.config.get('url', 'https://www.marktechpost.com')
-            await self.page.goto(main_url, wait_until="networkidle")
-            await asyncio.sleep(2)
-            article_links = await self.client.get_latest_articles(self.page, max_articles)
+            async with concurrency.slot(main_url) as slot:
+                with run_timer.stage(STAGE_NAVIGATION, self.site, main_url):
+                    slot.check_response(await self.page.goto(main_url, wait_until="networkidle"))
+            with run_timer.stage(STAGE_WAIT, self.site):
+                await asyncio.sleep(2)
+            article_links = await self.collect_links(await self.client.get_latest_articles(self.page, max_articles), max_articles)
             logger.info(f"从主页获取到{len(article_links)}篇文章链接")
         
         if not article_links:
-            logger.warning("未获取到任何文章链接")
+            logger.warning("未获取到需要爬取的文章链接")
             return []
         
         # 爬取文章内容
@@ -109,6 +172,17 @@ class MarkTechPostCrawler(AbstractCrawler):
         
         # 处理每个关键词
         for keyword in keywords:
+            if self.journal and self.journal.is_done(keyword):
+                logger.info(f"关键词 '{keyword}' 已在上次运行中完成，跳过")
+                continue
+            resumed = self.resume_links(keyword)
+            if resumed is not None:
+                # 断点续爬：不再搜索翻页，直接处理上次已发现但尚未保存的文章
+                logger.info(f"关键词 '{keyword}' 从断点继续，剩余{len(resumed)}篇文章")
+                all_articles.extend(await self._process_article_links(resumed, keyword))
+                self.journal.keyword_done(keyword)
+                continue
+            
             logger.info(f"使用关键词 '{keyword}' 进行搜索")
             
             try:
@@ -118,8 +192,11 @@ class MarkTechPostCrawler(AbstractCrawler):
                 logger.info(f"访问搜索URL: {search_url}")
                 
                 # 访问搜索结果页面
-                await self.page.goto(search_url, wait_until="networkidle")
-                await asyncio.sleep(3)  # 等待页面完全加载
+                async with concurrency.slot(search_url) as slot:
+                    with run_timer.stage(STAGE_NAVIGATION, self.site, search_url):
+                        slot.check_response(await self.page.goto(search_url, wait_until="networkidle"))
+                with run_timer.stage(STAGE_WAIT, self.site):
+                    await asyncio.sleep(3)  # 等待页面完全加载
                 
                 # 输出页面标题和URL，用于调试
                 page_title = await self.page.title()
@@ -149,8 +226,16 @@ class MarkTechPostCrawler(AbstractCrawler):
                 
                 # 获取搜索结果中的文章链接
                 logger.info(f"获取搜索结果中的文章链接(最多{max_articles_per_keyword}篇)")
-                article_links = await self.client.get_latest_articles(self.page, max_articles_per_keyword)
+                first_links = await self.client.get_latest_articles(self.page, max_articles_per_keyword)
+                # 需要时继续翻页，遇到已存储或过旧的文章时停止
+                article_links = await self.collect_links(
+                    first_links, max_articles_per_keyword,
+                    lambda number: self.search_page_url(keyword, number), wait_seconds=3
+                )
                 
+                if first_links and not article_links:
+                    logger.info(f"搜索 '{keyword}' 的结果都已存储或早于截止日期，跳过")
+                    continue
                 if not article_links:
                     logger.warning(f"搜索 '{keyword}' 未找到任何文章链接，可能没有结果或网页结构有变化")
                     continue
@@ -171,6 +256,9 @@ class MarkTechPostCrawler(AbstractCrawler):
                 import traceback
                 logger.error(traceback.format_exc())  # 打印完整堆栈跟踪
                 logger.info(f"继续处理下一个关键词...")
+            finally:
+                if self.journal:
+                    self.journal.keyword_done(keyword)
                 
         # 输出总结信息
         if all_articles:
@@ -192,11 +280,15 @@ class MarkTechPostCrawler(AbstractCrawler):
     async def _process_article_links(self, article_links: List[str], keyword: str = None) -> List[NewsArticle]:
         """处理文章链接，爬取文章内容"""
         articles = []
-        for url in article_links:
+        # 记入运行日志，并跳过上次运行中已保存的文章
+        article_links = self.checkpoint_links(article_links, keyword)
+        if await self.defer_links(article_links, keyword):
+            # 多进程模式：文章由工作进程从任务队列中领取后抓取
+            return articles
+        # 按主机的自适应并发上限同时打开多个页面抓取文章
+        results = await self.fetch_concurrently(article_links, self.client.get_article_content)
+        for url, article_data in zip(article_links, results):
             try:
-                # 使用同一个页面顺序处理每篇文章
-                article_data = await self.client.get_article_content(self.page, url)
-                
                 # 检查article_data是否为None（表示内容为空或获取失败）
                 if article_data is None:
                     logger.warning(f"未能获取有效内容或内容为空，跳过文章: {url}")
@@ -205,6 +297,7 @@ class MarkTechPostCrawler(AbstractCrawler):
                 # 转换为NewsArticle对象
                 try:
                     # 处理日期字符串
+                    date_start = time.perf_counter()
                     pub_date = article_data.get('pub_date', '')
                     if isinstance(pub_date, str):
                         try:
@@ -229,12 +322,14 @@ class MarkTechPostCrawler(AbstractCrawler):
                                         continue
                                 else:
                                     # 如果所有格式都失败，使用当前时间
-                                    published_date = datetime.now()
+                                    published_date = utc_now()
                         except Exception as e:
                             logger.warning(f"日期解析失败: {pub_date}, 错误: {str(e)}")
-                            published_date = datetime.now()
+                            published_date = utc_now()
                     else:
-                        published_date = datetime.now()
+                        published_date = utc_now()
+                    
+                    run_timer.observe(STAGE_DATE_PARSE, time.perf_counter() - date_start, self.site, url)
                     
                     article = NewsArticle(
                         title=article_data.get('title', '未知标题'),
@@ -247,51 +342,18 @@ class MarkTechPostCrawler(AbstractCrawler):
                         keyword=keyword  # 设置关键词
                     )
                     articles.append(article)
+                    await self.emit_article(article)
                     logger.info(f"成功处理文章: {article_data.get('title')}")
                 except Exception as e:
                     logger.error(f"创建文章对象失败: {str(e)}")
             except Exception as e:
                 logger.error(f"爬取文章内容失败: {url}, 错误: {str(e)}")
         
+        QUEUE_DEPTH.labels(self.site).set(0)
         logger.info(f"成功爬取{len(articles)}篇文章")
         return articles
 
     async def parse(self, html_content: str) -> NewsArticle:
         """解析文章内容"""
         # 由于解析逻辑已经在client中实现,这里直接返回None
-        return None 
-
-    async def init_browser(self):
-        """初始化浏览器"""
-        if not self.browser:
-            try:
-                # 初始化playwright
-                self.playwright = await async_playwright().start()
-                
-                # 初始化浏览器
-                self.browser = await self.playwright.chromium.launch(headless=True)
-                
-                # 创建上下文和页面
-                self.context = await self.browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
-                    viewport={'width': 1920, 'height': 1080}
-                )
-                self.page = await self.context.new_page()
-                
-                # 设置默认超时时间为60秒，避免无限等待
-                self.page.set_default_timeout(60000)
-                
-                # 配置页面资源过滤，阻止加载大量图片和媒体文件以提高速度
-                await self.page.route('**/*.{png,jpg,jpeg,gif,svg,mp4,webm,mp3,ogg}', 
-                                    lambda route: route.abort())
-                
-                # 配置页面拦截广告和跟踪脚本
-                await self.page.route('**/{ads,analytics,tracking}/**', 
-                                    lambda route: route.abort())
-                                   
-                logger.info("浏览器初始化完成")
-                return True
-            except Exception as e:
-                logger.error(f"浏览器初始化失败: {str(e)}")
-                return False
-        return False 
\ No newline at end of file
+        return None
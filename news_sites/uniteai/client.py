@@ -1,35 +1,56 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 import logging
+import time
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from playwright.async_api import Page
 import asyncio
 
+from news_sites.link_extractor import LinkRule, extract_links
+from tools.concurrency import concurrency, is_challenge
+from tools.metrics import record_page
+from tools.timing import run_timer, STAGE_NAVIGATION, STAGE_WAIT, STAGE_CONTENT, STAGE_PARSE, STAGE_EXTRACT
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 logger = logging.getLogger(__name__)
 
+# 列表页文章链接规则：第0层为首页的三个文章区域，第1层为其他带h2标题的链接(排除分类和锚点)
+LISTING_RULES = [
+    LinkRule('.mvp-widget-feat1-wrap a[href*="unite.ai"]'),
+    LinkRule('.mvp-widget-feat1-cont a[href*="unite.ai"]'),
+    LinkRule('.mvp-blog-story-list a[href*="unite.ai"]'),
+    LinkRule('a[href*="unite.ai"]', tier=1, contains='h2',
+             accept=lambda url: '/category/' not in url and '#' not in url),
+]
+
 class UniteAIClient:
     """UniteAI API客户端"""
     
     def __init__(self, config: dict):
         self.config = config
-        self.base_url = config['url']
+        self.base_url = config.get('url', config['base_url'])
         self.latest_url = config['latest_url']
         self.max_articles = config['max_articles']
+        # 页面录制器，由--record模式设置，用于离线回放基准测试
+        self.recorder = None
         
-    async def get_latest_articles(self, page: Page, max_articles: int) -> List[str]:
+    async def get_latest_articles(self, page: 'Page', max_articles: int) -> List[str]:
         """获取最新文章链接"""
         
         logger.info(f"获取UniteAI最新文章链接，最大数量: {max_articles}")
         
         # 获取页面HTML内容
-        html_content = await page.content()
+        with run_timer.stage(STAGE_CONTENT, 'uniteai', page.url):
+            html_content = await page.content()
+        if is_challenge(html_content):
+            # 列表页是验证页时通知并发控制器下调上限
+            concurrency.report_failure(page.url, 'challenge')
+            logger.warning(f"列表页遇到反爬验证页面: {page.url}")
+            return []
         logger.info(f"获取到HTML内容，长度: {len(html_content)}")
-        
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # 收集所有文章链接
-        article_links = []
+        record_page('uniteai', html_content)
+        if self.recorder:
+            self.recorder.record(page.url, html_content, 'listing')
         
         # 打印当前页面的URL，帮助调试
         current_url = page.url
@@ -38,105 +59,11 @@ class UniteAIClient:
         # 输出一些页面基本信息帮助调试
         logger.info(f"页面标题: {await page.title()}")
         
-        # 1. 查找第一种文章区域: mvp-widget-feat1-wrap中的文章链接
-        logger.info("查找第一种文章区域中的链接")
-        feat1_links = soup.select('.mvp-widget-feat1-wrap a[href*="unite.ai"]')
-        for link in feat1_links:
-            if link.has_attr('href'):
-                url = link['href']
-                # 确保URL完整
-                if not url.startswith(('http://', 'https://')):
-                    url = urljoin(self.base_url, url)
-                
-                # 获取文章标题(如果存在)
-                title_elem = link.select_one('h2')
-                title = title_elem.get_text(strip=True) if title_elem else "未知标题"
-                
-                logger.info(f"找到文章(区域1): {title} -> {url}")
-                
-                if url not in article_links:
-                    article_links.append(url)
-                    
-                    if len(article_links) >= max_articles:
-                        break
-        
-        # 2. 查找第二种文章区域: mvp-widget-feat1-cont中的文章链接
-        if len(article_links) < max_articles:
-            logger.info("查找第二种文章区域中的链接")
-            feat1_cont_links = soup.select('.mvp-widget-feat1-cont a[href*="unite.ai"]')
-            for link in feat1_cont_links:
-                if link.has_attr('href'):
-                    url = link['href']
-                    # 确保URL完整
-                    if not url.startswith(('http://', 'https://')):
-                        url = urljoin(self.base_url, url)
-                    
-                    # 避免重复链接
-                    if url not in article_links:
-                        # 获取文章标题(如果存在)
-                        title_elem = link.select_one('h2')
-                        title = title_elem.get_text(strip=True) if title_elem else "未知标题"
-                        
-                        logger.info(f"找到文章(区域2): {title} -> {url}")
-                        article_links.append(url)
-                        
-                        if len(article_links) >= max_articles:
-                            break
-        
-        # 3. 查找第三种文章区域: mvp-blog-story-list中的文章
-        if len(article_links) < max_articles:
-            logger.info("查找第三种文章区域中的链接")
-            blog_links = soup.select('.mvp-blog-story-list a[href*="unite.ai"]')
-            for link in blog_links:
-                if link.has_attr('href'):
-                    url = link['href']
-                    # 确保URL完整
-                    if not url.startswith(('http://', 'https://')):
-                        url = urljoin(self.base_url, url)
-                    
-                    # 避免重复链接
-                    if url not in article_links:
-                        # 获取文章标题(如果存在)
-                        title_elem = link.select_one('h2')
-                        title = title_elem.get_text(strip=True) if title_elem else "未知标题"
-                        
-                        logger.info(f"找到文章(区域3): {title} -> {url}")
-                        article_links.append(url)
-                        
-                        if len(article_links) >= max_articles:
-                            break
-        
-        # 如果仍然找不到足够的文章，尝试更通用的选择器
-        if len(article_links) < max_articles:
-            logger.info("使用通用选择器查找文章链接")
-            # 寻找所有包含h2标题的链接
-            all_links = soup.select('a[href*="unite.ai"] h2')
-            for title_elem in all_links:
-                link = title_elem.parent
-                while link and link.name != 'a':
-                    link = link.parent
-                
-                if link and link.has_attr('href'):
-                    url = link['href']
-                    # 排除导航链接、分类链接等
-                    if '/category/' in url or '#' in url:
-                        continue
-                        
-                    # 确保URL完整
-                    if not url.startswith(('http://', 'https://')):
-                        url = urljoin(self.base_url, url)
-                    
-                    # 避免重复链接
-                    if url not in article_links:
-                        title = title_elem.get_text(strip=True)
-                        logger.info(f"找到文章(通用选择器): {title} -> {url}")
-                        article_links.append(url)
-                        
-                        if len(article_links) >= max_articles:
-                            break
-        
-        # 限制返回数量
-        article_links = article_links[:max_articles]
+        # 流式提取，文章区域中找到足够的链接后不再解析页面剩余部分
+        with run_timer.stage(STAGE_PARSE, 'uniteai', current_url):
+            article_links, parsed = extract_links(html_content, LISTING_RULES, max_articles, self.base_url)
+        run_timer.add_count('listing_chars_skipped', 'uniteai', len(html_content) - parsed)
+        logger.info(f"解析了{parsed}/{len(html_content)}个字符")
         
         logger.info(f"共找到{len(article_links)}个文章链接")
         for idx, url in enumerate(article_links):
@@ -144,21 +71,35 @@ class UniteAIClient:
         
         return article_links
 
-    async def get_article_content(self, page: Page, url: str) -> Dict[str, Any]:
+    async def get_article_content(self, page: 'Page', url: str) -> Dict[str, Any]:
         """获取文章内容"""
         
         logger.info(f"获取文章内容: {url}")
         
         try:
-            # 访问文章页面
-            await page.goto(url, wait_until="networkidle")
-            
-            # 等待页面加载
-            await page.wait_for_load_state("networkidle")
-            
-            # 获取页面HTML内容
-            html_content = await page.content()
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # 访问文章页面，按主机的自适应并发上限占用名额
+            async with concurrency.slot(url) as slot:
+                with run_timer.stage(STAGE_NAVIGATION, 'uniteai', url):
+                    response = await page.goto(url, wait_until="networkidle")
+                slot.check_response(response)
+                
+                # 等待页面加载
+                with run_timer.stage(STAGE_WAIT, 'uniteai', url):
+                    await page.wait_for_load_state("networkidle")
+                
+                # 获取页面HTML内容
+                with run_timer.stage(STAGE_CONTENT, 'uniteai', url):
+                    html_content = await page.content()
+                if slot.check_html(html_content):
+                    logger.warning(f"遇到反爬验证页面，跳过文章: {url}")
+                    run_timer.record_outcome('uniteai', False)
+                    return None
+            record_page('uniteai', html_content)
+            if self.recorder:
+                self.recorder.record(url, html_content, 'article')
+            with run_timer.stage(STAGE_PARSE, 'uniteai', url):
+                soup = BeautifulSoup(html_content, 'html.parser')
+            extract_start = time.perf_counter()
             
             # 提取标题
             title_elem = soup.select_one('h1.entry-title, h1.post-title, div.mvp-post-title-wrap h1')
@@ -209,9 +150,12 @@ class UniteAIClient:
             else:
                 logger.warning("未找到文章内容元素")
             
+            run_timer.observe(STAGE_EXTRACT, time.perf_counter() - extract_start, 'uniteai', url)
+            
             # 如果内容为空，返回None
             if not content.strip():
                 logger.warning(f"文章内容为空，将跳过保存: {url}")
+                run_timer.record_outcome('uniteai', False)
                 return None
                 
             # 构建文章数据
@@ -224,10 +168,12 @@ class UniteAIClient:
                 'url': url
             }
             
+            run_timer.record_outcome('uniteai', True)
             return article_data
             
         except Exception as e:
             logger.error(f"获取文章内容失败: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
+            run_timer.record_outcome('uniteai', False)
             return None
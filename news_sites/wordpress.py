@@ -0,0 +1,182 @@
+"""WordPress REST接口客户端
+
+MarkTechPost和UniteAI都是WordPress站点，可以直接请求 /wp-json/wp/v2/posts 获取文章，
+一次分页JSON请求代替几十次页面渲染，搜索关键词直接对应接口的search参数。
+接口被关闭或返回异常时由调用方回退到Playwright爬取。
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from bs4 import BeautifulSoup
+
+from model.codec import utc_now
+from model.news_article import NewsArticle
+from tools.concurrency import concurrency
+from tools.metrics import record_page
+from tools.timing import run_timer, STAGE_NAVIGATION, STAGE_EXTRACT
+
+logger = logging.getLogger(__name__)
+
+# 只请求需要的字段，_links和_embedded用于获取作者名
+POST_FIELDS = ['id', 'date_gmt', 'link', 'title', 'content', '_links', '_embedded']
+
+# 接口单页最多返回100篇
+MAX_PER_PAGE = 100
+
+
+class WordPressAPIError(Exception):
+    """接口不可用，需要回退到浏览器爬取"""
+
+
+class WordPressClient:
+    """WordPress文章接口客户端"""
+
+    def __init__(self, site: str, site_config: dict):
+        self.site = site
+        api_config = site_config.get('wordpress_api', {})
+        base_url = site_config.get('base_url') or site_config.get('url', '')
+        self.api_url = api_config.get('api_url') or f"{base_url.rstrip('/')}/wp-json/wp/v2/posts"
+        self.per_page = min(api_config.get('per_page', 20), MAX_PER_PAGE)
+        self.after_days = api_config.get('after_days')
+        self.timeout = api_config.get('timeout', 30)
+
+    def build_params(self, page: int, per_page: int, search: Optional[str] = None) -> list:
+        """生成查询参数"""
+        params = [
+            ('_fields', ','.join(POST_FIELDS)),
+            ('_embed', 'author'),
+            ('per_page', str(per_page)),
+            ('page', str(page)),
+            ('orderby', 'date'),
+            ('order', 'desc'),
+        ]
+        if self.after_days:
+            after = datetime.now(timezone.utc) - timedelta(days=self.after_days)
+            params.append(('after', after.strftime('%Y-%m-%dT%H:%M:%S')))
+        if search:
+            params.append(('search', search))
+        return params
+
+    async def fetch_posts(self, session, max_posts: int, search: Optional[str] = None) -> List[dict]:
+        """按发布时间倒序分页获取文章，最多max_posts篇
+
+        Raises:
+            WordPressAPIError: 接口返回错误状态或非JSON内容
+        """
+        import aiohttp
+
+        posts: List[dict] = []
+        page = 1
+        total_pages = 1
+        # 翻页过程中per_page必须保持不变，否则页码对应的偏移会错位
+        per_page = min(self.per_page, max_posts)
+        while len(posts) < max_posts and page <= total_pages:
+            params = self.build_params(page, per_page, search)
+            try:
+                async with concurrency.slot(self.api_url) as slot:
+                    with run_timer.stage(STAGE_NAVIGATION, self.site, self.api_url):
+                        async with session.get(self.api_url, params=params,
+                                               timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                            slot.check_response(response)
+                            # 超出最后一页时返回400
+                            if response.status == 400 and page > 1:
+                                break
+                            if response.status != 200:
+                                raise WordPressAPIError(f"接口返回状态码 {response.status}")
+                            if 'json' not in response.headers.get('Content-Type', ''):
+                                slot.check_html(await response.text())
+                                raise WordPressAPIError("接口返回的不是JSON，可能被反爬验证拦截")
+                            body = await response.read()
+                            batch = await response.json(content_type=None)
+                            total_pages = int(response.headers.get('X-WP-TotalPages', total_pages))
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                raise WordPressAPIError(str(e)) from e
+            record_page(self.site, body.decode('utf-8', errors='replace'))
+            if not isinstance(batch, list):
+                raise WordPressAPIError("接口返回格式不正确")
+            if not batch:
+                break
+            posts.extend(batch)
+            page += 1
+        return posts[:max_posts]
+
+    def to_article(self, post: dict, keyword: Optional[str] = None) -> Optional[NewsArticle]:
+        """把接口返回的文章转换为NewsArticle，正文为空时返回None"""
+        rendered = (post.get('content') or {}).get('rendered', '')
+        soup = BeautifulSoup(rendered, 'html.parser')
+        paragraphs = soup.find_all('p')
+        if paragraphs:
+            content = ' '.join(p.get_text(strip=True) for p in paragraphs)
+            html_content = ''.join(str(p) for p in paragraphs)
+        else:
+            content = soup.get_text(strip=True)
+            html_content = rendered
+        if not content.strip():
+            return None
+
+        # 标题中可能包含HTML实体和标签
+        title = BeautifulSoup((post.get('title') or {}).get('rendered', ''), 'html.parser').get_text(strip=True)
+        authors = (post.get('_embedded') or {}).get('author') or []
+        author = authors[0].get('name', '') if authors and isinstance(authors[0], dict) else ''
+        try:
+            published_date = datetime.fromisoformat(post.get('date_gmt', ''))
+        except (TypeError, ValueError):
+            published_date = utc_now()
+
+        return NewsArticle(
+            title=title or '未知标题',
+            author=author or '未知作者',
+            published_date=published_date,
+            content=content,
+            url=post.get('link', ''),
+            html_content=html_content,
+            source=self.site,
+            keyword=keyword
+        )
+
+    def to_articles(self, posts: List[dict], keyword: Optional[str] = None) -> List[NewsArticle]:
+        """批量转换，跳过正文为空的文章"""
+        extract_start = time.perf_counter()
+        articles = []
+        for post in posts:
+            try:
+                article = self.to_article(post, keyword)
+            except Exception as e:
+                logger.error(f"转换文章失败: {post.get('link')}, 错误: {str(e)}")
+                article = None
+            run_timer.record_outcome(self.site, article is not None)
+            if article:
+                articles.append(article)
+        run_timer.observe(STAGE_EXTRACT, time.perf_counter() - extract_start, self.site, self.api_url)
+        return articles
+
+    async def crawl(self, max_articles: int, keywords: Optional[List[str]] = None, session=None) -> List[NewsArticle]:
+        """获取最新文章，指定关键词时按关键词逐个搜索
+
+        Raises:
+            WordPressAPIError: 接口不可用
+        """
+        # 延迟导入，未开启接口模式的站点运行不会加载HTTP抓取服务
+        from tools.fetcher import fetch_session
+        from tools.http_cache import cached_session
+
+        session = cached_session(session or fetch_session({'Accept': 'application/json'}))
+        if not keywords:
+            posts = await self.fetch_posts(session, max_articles)
+            logger.info(f"{self.site} 接口获取到{len(posts)}篇文章")
+            return self.to_articles(posts)
+
+        articles: List[NewsArticle] = []
+        seen = set()
+        for keyword in keywords:
+            posts = await self.fetch_posts(session, max_articles, search=keyword)
+            logger.info(f"{self.site} 接口搜索 '{keyword}' 获取到{len(posts)}篇文章")
+            for article in self.to_articles(posts, keyword):
+                # 同一篇文章命中多个关键词时只保留第一个
+                if article.url not in seen:
+                    seen.add(article.url)
+                    articles.append(article)
+        return articles
@@ -1,6 +1,77 @@
+"""数据存储
+
+各存储后端按名称延迟导入，例如使用JSON存储时不会加载mysql.connector。
+"""
+import importlib
+import logging
 from .base import BaseStore
-from .mysql import MySQLStore
-from .csv import CSVStore
-from .json import JSONStore
 
-__all__ = ['BaseStore', 'MySQLStore', 'CSVStore', 'JSONStore'] 
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+# 存储类型 -> (模块路径, 类名)
+STORE_BACKENDS = {
+    'json': ('store.json', 'JSONStore'),
+    'csv': ('store.csv', 'CSVStore'),
+    'mysql': ('store.mysql', 'MySQLStore'),
+}
+
+
+def get_store_class(store_type: str):
+    """根据存储类型获取存储类"""
+    if store_type not in STORE_BACKENDS:
+        raise ValueError(f"未知的存储类型: {store_type}")
+    module_name, class_name = STORE_BACKENDS[store_type]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_store(config: dict) -> BaseStore:
+    """根据STORAGE_CONFIG创建存储实例"""
+    store_type = config.get('type', 'json')
+    store_class = get_store_class(store_type)
+    if store_type == 'mysql':
+        store = store_class(config['mysql'])
+    else:
+        store = store_class(config)
+        
+    dedup_config = config.get('dedup', {})
+    if dedup_config.get('enabled'):
+        from tools.dedup import DuplicateDetector
+        store.add_article_hook(DuplicateDetector(
+            dedup_config['index_path'],
+            dedup_config.get('max_distance', 3),
+            dedup_config.get('shingle_size', 3)
+        ))
+        
+    rollup_config = config.get('rollup', {})
+    if rollup_config.get('enabled'):
+        from tools.weekly_report import DailyRollup
+        store.add_article_hook(DailyRollup(
+            config['reports_directory'],
+            rollup_config.get('top_articles', 50),
+            rollup_config.get('top_trends', 25)
+        ))
+        
+    history_config = config.get('trend_history', {})
+    if history_config.get('enabled'):
+        from tools.trend_history import TrendHistory
+        store.add_article_hook(TrendHistory(history_config['directory']))
+        
+    search_config = config.get('search_index', {})
+    if search_config.get('enabled'):
+        from tools.search_index import SearchIndex
+        try:
+            store.add_article_hook(SearchIndex(search_config['path']))
+        except Exception as e:
+            logger.error(f"初始化全文索引失败: {str(e)}")
+    return store
+
+
+def __getattr__(name):
+    # 兼容 from store import MySQLStore 等写法，首次访问时才导入对应后端
+    for module_name, class_name in STORE_BACKENDS.values():
+        if class_name == name:
+            return getattr(importlib.import_module(module_name), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['BaseStore', 'MySQLStore', 'CSVStore', 'JSONStore', 'get_store', 'get_store_class']
@@ -1,10 +1,48 @@
 from abc import ABC, abstractmethod
-from typing import List, Union
+from datetime import datetime
+from typing import List, Optional, Set, Union
 from model.news_article import NewsArticle
 from model.platform_trends import TrendItem, TwitterTrend, GithubTrend, HuggingfaceTrend
 
 class BaseStore(ABC):
-    """存储基类"""
+    """存储基类
+    
+    子类在save_article中调用before_save_article/after_save_article，在save_trends中调用after_save_trends，
+    通过add_article_hook注册的钩子(去重、索引等)即可在所有后端上生效。
+    """
+    
+    def __init__(self):
+        self.article_hooks = []
+        
+    def add_article_hook(self, hook):
+        """注册钩子，钩子对象可实现before_save(article)、after_save(article)和after_save_trends(trends, platform)"""
+        self.article_hooks.append(hook)
+        
+    def before_save_article(self, article: NewsArticle):
+        """保存前调用，钩子可修改文章(如标记重复)"""
+        for hook in self.article_hooks:
+            if hasattr(hook, 'before_save'):
+                hook.before_save(article)
+                
+    def after_save_article(self, article: NewsArticle):
+        """文章写入成功后调用"""
+        for hook in self.article_hooks:
+            if hasattr(hook, 'after_save'):
+                hook.after_save(article)
+                
+    def after_save_trends(self, trends: list, platform: str):
+        """一批趋势项保存后调用"""
+        for hook in self.article_hooks:
+            if hasattr(hook, 'after_save_trends'):
+                hook.after_save_trends(trends, platform)
+    
+    async def get_latest_published_date(self, source: str) -> Optional[datetime]:
+        """来源最近一篇文章的发布时间(UTC，不带时区)，用于增量发现新文章；未实现时返回None"""
+        return None
+    
+    async def get_article_urls(self, source: str) -> Set[str]:
+        """来源已存储文章的URL，用于翻页时判断是否遇到已爬取的文章；未实现时返回空集合"""
+        return set()
     
     @abstractmethod
     async def save_article(self, article: NewsArticle) -> bool:
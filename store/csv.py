@@ -1,19 +1,32 @@
 import csv
-import json
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Set
 import logging
 from datetime import datetime
 import os
 from .base import BaseStore
 from model.news_article import NewsArticle
 from model.platform_trends import TrendItem, TwitterTrend, GithubTrend, HuggingfaceTrend
+from model.codec import to_row, from_dict, trend_from_dict, parse_datetime, naive_utc
 
 logger = logging.getLogger(__name__)
 
+# 新建文件时使用的表头，已有文件按其自身表头写入
+ARTICLE_COLUMNS = [
+    'id', 'title', 'author', 'published_date', 'content',
+    'html_content', 'url', 'source', 'created_at', 'updated_at',
+    'keyword', 'tags', 'duplicate_of', 'schema_version'
+]
+TREND_COLUMNS = [
+    'id', 'rank', 'name', 'description', 'url', 'platform',
+    'tweet_count', 'language', 'stars', 'period', 'period_stars', 'downloads', 'tags',
+    'created_at', 'updated_at', 'schema_version'
+]
+
 class CSVStore(BaseStore):
     """CSV存储实现"""
     
     def __init__(self, config: dict):
+        super().__init__()
         self.config = config
         self.articles_file = config['csv_path']
         self.trends_file = 'data/trends.csv'
@@ -30,20 +43,13 @@ class CSVStore(BaseStore):
             if not os.path.exists(self.articles_file):
                 with open(self.articles_file, 'w', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
-                    writer.writerow([
-                        'id', 'title', 'author', 'published_date', 'content',
-                        'html_content', 'url', 'source', 'created_at', 'updated_at'
-                    ])
+                    writer.writerow(ARTICLE_COLUMNS)
                     
             # 创建趋势CSV文件
             if not os.path.exists(self.trends_file):
                 with open(self.trends_file, 'w', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
-                    writer.writerow([
-                        'id', 'rank', 'name', 'description', 'url', 'platform',
-                        'tweet_count', 'language', 'stars', 'downloads', 'tags',
-                        'created_at', 'updated_at'
-                    ])
+                    writer.writerow(TREND_COLUMNS)
                     
             logger.info("成功初始化CSV文件")
             
@@ -51,6 +57,14 @@ class CSVStore(BaseStore):
             logger.error(f"初始化CSV文件失败: {str(e)}")
             raise
             
+    def _append_row(self, file_path: str, row: dict):
+        """按文件现有表头追加一行，表头中没有的字段被忽略"""
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            fieldnames = next(csv.reader(f))
+        with open(file_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='', extrasaction='ignore')
+            writer.writerow(row)
+            
     async def save_article(self, article: NewsArticle) -> bool:
         """保存文章"""
         try:
@@ -58,6 +72,8 @@ class CSVStore(BaseStore):
             if await self.get_article_by_url(article.url):
                 return True
                 
+            self.before_save_article(article)
+                
             # 获取当前最大ID
             max_id = 0
             with open(self.articles_file, 'r', newline='', encoding='utf-8') as f:
@@ -66,23 +82,13 @@ class CSVStore(BaseStore):
                     max_id = max(max_id, int(row['id'] or 0))
                     
             # 准备文章数据
-            article_data = {
-                'id': max_id + 1,
-                'title': article.title,
-                'author': article.author,
-                'published_date': article.published_date.isoformat(),
-                'content': article.content,
-                'html_content': article.html_content,
-                'url': article.url,
-                'source': article.source,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
+            now = datetime.now().isoformat()
+            article_data = to_row(article, with_version=True)
+            article_data.update(id=max_id + 1, created_at=now, updated_at=now)
             
             # 写入CSV
-            with open(self.articles_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=article_data.keys())
-                writer.writerow(article_data)
+            self._append_row(self.articles_file, article_data)
+            self.after_save_article(article)
                 
             return True
             
@@ -115,36 +121,12 @@ class CSVStore(BaseStore):
                     max_id = max(max_id, int(row['id'] or 0))
                     
             # 准备趋势项数据
-            trend_data = {
-                'id': max_id + 1,
-                'rank': trend.rank,
-                'name': trend.name,
-                'description': trend.description,
-                'url': trend.url,
-                'platform': trend.platform,
-                'tweet_count': '',
-                'language': '',
-                'stars': '',
-                'downloads': '',
-                'tags': '',
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
-            
-            # 根据趋势类型设置特定字段
-            if isinstance(trend, TwitterTrend):
-                trend_data['tweet_count'] = trend.tweet_count
-            elif isinstance(trend, GithubTrend):
-                trend_data['language'] = trend.language
-                trend_data['stars'] = trend.stars
-            elif isinstance(trend, HuggingfaceTrend):
-                trend_data['downloads'] = trend.downloads
-                trend_data['tags'] = json.dumps(trend.tags)
+            now = datetime.now().isoformat()
+            trend_data = to_row(trend, with_version=True)
+            trend_data.update(id=max_id + 1, created_at=now, updated_at=now)
                 
             # 写入CSV
-            with open(self.trends_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=trend_data.keys())
-                writer.writerow(trend_data)
+            self._append_row(self.trends_file, trend_data)
                 
             return True
             
@@ -157,6 +139,7 @@ class CSVStore(BaseStore):
         try:
             for trend in trends:
                 await self.save_trend(trend)
+            self.after_save_trends(trends, platform)
             return True
         except Exception as e:
             logger.error(f"批量保存趋势项失败: {str(e)}")
@@ -169,24 +152,40 @@ class CSVStore(BaseStore):
                 reader = csv.DictReader(f)
                 for row in reader:
                     if row['url'] == url:
-                        return NewsArticle(
-                            title=row['title'],
-                            author=row['author'],
-                            published_date=datetime.fromisoformat(row['published_date']),
-                            content=row['content'],
-                            html_content=row['html_content'],
-                            url=row['url'],
-                            source=row['source'],
-                            id=int(row['id']),
-                            created_at=datetime.fromisoformat(row['created_at']),
-                            updated_at=datetime.fromisoformat(row['updated_at'])
-                        )
+                        return from_dict(NewsArticle, row)
             return None
             
         except Exception as e:
             logger.error(f"获取文章失败: {str(e)}")
             return None
             
+    async def get_article_urls(self, source: str) -> Set[str]:
+        """来源已存储文章的URL"""
+        try:
+            with open(self.articles_file, 'r', newline='', encoding='utf-8') as f:
+                return {row['url'] for row in csv.DictReader(f) if row.get('source') == source}
+        except Exception as e:
+            logger.error(f"获取文章URL失败: {str(e)}")
+            return set()
+            
+    async def get_latest_published_date(self, source: str) -> Optional[datetime]:
+        """来源最近一篇文章的发布时间"""
+        latest = None
+        try:
+            with open(self.articles_file, 'r', newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    if row.get('source') != source or not row.get('published_date'):
+                        continue
+                    try:
+                        published = naive_utc(parse_datetime(row['published_date']))
+                    except ValueError:
+                        continue
+                    if latest is None or published > latest:
+                        latest = published
+        except Exception as e:
+            logger.error(f"获取最近发布时间失败: {str(e)}")
+        return latest
+            
     async def get_trend_by_url(self, url: str, platform: str) -> Optional[TrendItem]:
         """根据URL获取趋势项"""
         try:
@@ -195,32 +194,7 @@ class CSVStore(BaseStore):
                 for row in reader:
                     if row['url'] == url and row['platform'] == platform:
                         # 根据平台类型创建对应的趋势对象
-                        if platform == 'twitter':
-                            return TwitterTrend(
-                                rank=int(row['rank']),
-                                name=row['name'],
-                                description=row['description'],
-                                url=row['url'],
-                                tweet_count=row['tweet_count']
-                            )
-                        elif platform == 'github':
-                            return GithubTrend(
-                                rank=int(row['rank']),
-                                name=row['name'],
-                                description=row['description'],
-                                url=row['url'],
-                                language=row['language'],
-                                stars=int(row['stars']) if row['stars'] else 0
-                            )
-                        elif platform == 'huggingface':
-                            return HuggingfaceTrend(
-                                rank=int(row['rank']),
-                                name=row['name'],
-                                description=row['description'],
-                                url=row['url'],
-                                downloads=row['downloads'],
-                                tags=json.loads(row['tags']) if row['tags'] else []
-                            )
+                        return trend_from_dict(row)
             return None
             
         except Exception as e:
@@ -1,11 +1,11 @@
-import json
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Set
 import logging
 from datetime import datetime
 import os
 from .base import BaseStore
 from model.news_article import NewsArticle
 from model.platform_trends import TrendItem, TwitterTrend, GithubTrend, HuggingfaceTrend
+from model.codec import to_dict, from_dict, trend_from_dict, dumps, loads, parse_datetime, naive_utc
 
 logger = logging.getLogger(__name__)
 
@@ -13,9 +13,10 @@ class JSONStore(BaseStore):
     """JSON存储实现"""
     
     def __init__(self, config: dict):
+        super().__init__()
         self.config = config
         self.articles_file = config['json_path']
-        self.trends_file = 'data/trends.json'
+        self.trends_file = config.get('trends_json_path', 'data/trends.json')
         self.init_files()
         
     def init_files(self):
@@ -27,13 +28,11 @@ class JSONStore(BaseStore):
             
             # 创建文章JSON文件
             if not os.path.exists(self.articles_file):
-                with open(self.articles_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
+                self._save_json(self.articles_file, [])
                     
             # 创建趋势JSON文件
             if not os.path.exists(self.trends_file):
-                with open(self.trends_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
+                self._save_json(self.trends_file, [])
                     
             logger.info("成功初始化JSON文件")
             
@@ -44,8 +43,8 @@ class JSONStore(BaseStore):
     def _load_json(self, file_path: str) -> list:
         """加载JSON文件"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(file_path, 'rb') as f:
+                return loads(f.read())
         except Exception as e:
             logger.error(f"加载JSON文件失败: {str(e)}")
             return []
@@ -53,8 +52,8 @@ class JSONStore(BaseStore):
     def _save_json(self, file_path: str, data: list):
         """保存JSON文件"""
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(file_path, 'wb') as f:
+                f.write(dumps(data))
         except Exception as e:
             logger.error(f"保存JSON文件失败: {str(e)}")
             raise
@@ -62,6 +61,8 @@ class JSONStore(BaseStore):
     async def save_article(self, article: NewsArticle) -> bool:
         """保存文章"""
         try:
+            self.before_save_article(article)
+            
             # 加载现有文章
             articles = self._load_json(self.articles_file)
             
@@ -75,17 +76,16 @@ class JSONStore(BaseStore):
                         existing_article['content'] != article.content or
                         existing_article['html_content'] != article.html_content or
                         existing_article['title'] != article.title or
-                        existing_article['author'] != article.author
+                        existing_article['author'] != article.author or
+                        existing_article.get('tags', []) != article.tags
                     )
                     
                     if content_changed:
                         # 更新现有文章
                         logger.info(f"更新文章内容: {article.title}")
-                        existing_article['title'] = article.title
-                        existing_article['author'] = article.author
-                        existing_article['published_date'] = article.published_date.isoformat()
-                        existing_article['content'] = article.content
-                        existing_article['html_content'] = article.html_content
+                        article_data = to_dict(article, with_version=True)
+                        for key in ('title', 'author', 'published_date', 'content', 'html_content', 'tags', 'schema_version'):
+                            existing_article[key] = article_data[key]
                         existing_article['updated_at'] = datetime.now().isoformat()
                         
                         # 如果关键词存在且不同，则更新关键词
@@ -95,6 +95,7 @@ class JSONStore(BaseStore):
                         
                         # 保存更新后的文章
                         self._save_json(self.articles_file, articles)
+                        self.after_save_article(article)
                     else:
                         logger.info(f"文章内容无变化，跳过更新: {article.title}")
                         
@@ -102,25 +103,16 @@ class JSONStore(BaseStore):
                     
             # 如果文章不存在，则添加新文章
             logger.info(f"添加新文章: {article.title}")
-            article_data = {
-                'id': len(articles) + 1,
-                'title': article.title,
-                'author': article.author,
-                'published_date': article.published_date.isoformat(),
-                'content': article.content,
-                'html_content': article.html_content,
-                'url': article.url,
-                'source': article.source,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat(),
-                'keyword': article.keyword
-            }
+            now = datetime.now().isoformat()
+            article_data = to_dict(article, with_version=True)
+            article_data.update(id=len(articles) + 1, created_at=now, updated_at=now)
             
             # 添加新文章
             articles.append(article_data)
             
             # 保存到文件
             self._save_json(self.articles_file, articles)
+            self.after_save_article(article)
             
             return True
             
@@ -153,31 +145,9 @@ class JSONStore(BaseStore):
                 return True
                 
             # 准备趋势项数据
-            trend_data = {
-                'id': len(trends) + 1,
-                'rank': trend.rank,
-                'name': trend.name,
-                'description': trend.description,
-                'url': trend.url,
-                'platform': trend.platform,
-                'tweet_count': '',
-                'language': '',
-                'stars': '',
-                'downloads': '',
-                'tags': [],
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
-            
-            # 根据趋势类型设置特定字段
-            if isinstance(trend, TwitterTrend):
-                trend_data['tweet_count'] = trend.tweet_count
-            elif isinstance(trend, GithubTrend):
-                trend_data['language'] = trend.language
-                trend_data['stars'] = trend.stars
-            elif isinstance(trend, HuggingfaceTrend):
-                trend_data['downloads'] = trend.downloads
-                trend_data['tags'] = trend.tags
+            now = datetime.now().isoformat()
+            trend_data = to_dict(trend, with_version=True)
+            trend_data.update(id=len(trends) + 1, created_at=now, updated_at=now)
                 
             # 添加新趋势
             trends.append(trend_data)
@@ -196,6 +166,7 @@ class JSONStore(BaseStore):
         try:
             for trend in trends:
                 await self.save_trend(trend)
+            self.after_save_trends(trends, platform)
             return True
         except Exception as e:
             logger.error(f"批量保存趋势项失败: {str(e)}")
@@ -207,25 +178,31 @@ class JSONStore(BaseStore):
             articles = self._load_json(self.articles_file)
             for article in articles:
                 if article['url'] == url:
-                    return NewsArticle(
-                        title=article['title'],
-                        author=article['author'],
-                        published_date=datetime.fromisoformat(article['published_date']),
-                        content=article['content'],
-                        html_content=article['html_content'],
-                        url=article['url'],
-                        source=article['source'],
-                        id=article['id'],
-                        created_at=datetime.fromisoformat(article['created_at']),
-                        updated_at=datetime.fromisoformat(article['updated_at']),
-                        keyword=article.get('keyword')
-                    )
+                    return from_dict(NewsArticle, article)
             return None
             
         except Exception as e:
             logger.error(f"获取文章失败: {str(e)}")
             return None
             
+    async def get_article_urls(self, source: str) -> Set[str]:
+        """来源已存储文章的URL"""
+        return {article['url'] for article in self._load_json(self.articles_file) if article.get('source') == source}
+            
+    async def get_latest_published_date(self, source: str) -> Optional[datetime]:
+        """来源最近一篇文章的发布时间"""
+        latest = None
+        for article in self._load_json(self.articles_file):
+            if article.get('source') != source or not article.get('published_date'):
+                continue
+            try:
+                published = naive_utc(parse_datetime(article['published_date']))
+            except ValueError:
+                continue
+            if latest is None or published > latest:
+                latest = published
+        return latest
+            
     async def get_trend_by_url(self, url: str, platform: str) -> Optional[TrendItem]:
         """根据URL获取趋势项"""
         try:
@@ -233,32 +210,7 @@ class JSONStore(BaseStore):
             for trend in trends:
                 if trend['url'] == url and trend['platform'] == platform:
                     # 根据平台类型创建对应的趋势对象
-                    if platform == 'twitter':
-                        return TwitterTrend(
-                            rank=trend['rank'],
-                            name=trend['name'],
-                            description=trend['description'],
-                            url=trend['url'],
-                            tweet_count=trend['tweet_count']
-                        )
-                    elif platform == 'github':
-                        return GithubTrend(
-                            rank=trend['rank'],
-                            name=trend['name'],
-                            description=trend['description'],
-                            url=trend['url'],
-                            language=trend['language'],
-                            stars=trend['stars']
-                        )
-                    elif platform == 'huggingface':
-                        return HuggingfaceTrend(
-                            rank=trend['rank'],
-                            name=trend['name'],
-                            description=trend['description'],
-                            url=trend['url'],
-                            downloads=trend['downloads'],
-                            tags=trend['tags']
-                        )
+                    return trend_from_dict(trend)
             return None
             
         except Exception as e:
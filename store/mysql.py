@@ -1,18 +1,28 @@
+import json
 import mysql.connector
 from mysql.connector import Error
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Set
 import logging
 from datetime import datetime
 from .base import BaseStore
 from model.news_article import NewsArticle
 from model.platform_trends import TrendItem, TwitterTrend, GithubTrend, HuggingfaceTrend
+from model.codec import to_dict, from_dict, trend_from_dict, naive_utc
 
 logger = logging.getLogger(__name__)
 
+# 插入时写入的列，其余列由数据库默认值生成
+ARTICLE_COLUMNS = ('title', 'author', 'published_date', 'content', 'html_content', 'url', 'source')
+# url相同时更新的列，重复投递或多个节点同时写入同一篇文章时结果一致
+ARTICLE_UPDATE_COLUMNS = ('title', 'author', 'published_date', 'content', 'html_content')
+TREND_COLUMNS = ('rank', 'name', 'description', 'url', 'platform',
+                 'tweet_count', 'language', 'stars', 'downloads', 'tags')
+
 class MySQLStore(BaseStore):
     """MySQL存储实现"""
     
     def __init__(self, config: dict):
+        super().__init__()
         self.config = config
         self.connection = None
         self.connect()
@@ -86,27 +96,22 @@ class MySQLStore(BaseStore):
         """保存文章"""
         try:
             cursor = self.connection.cursor()
-            
-            # 检查文章是否已存在
-            cursor.execute("SELECT id FROM articles WHERE url = %s", (article.url,))
-            if cursor.fetchone():
-                return True
+            self.before_save_article(article)
                 
-            # 插入新文章
-            cursor.execute("""
-                INSERT INTO articles (title, author, published_date, content, html_content, url, source)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                article.title,
-                article.author,
-                article.published_date,
-                article.content,
-                article.html_content,
-                article.url,
-                article.source
-            ))
+            # 按url upsert：不存在时插入，存在时更新内容，单条语句避免多个节点先查后插的竞争
+            article_data = to_dict(article, iso_datetime=False)
+            fields = ', '.join(ARTICLE_COLUMNS)
+            placeholders = ', '.join(['%s'] * len(ARTICLE_COLUMNS))
+            updates = ', '.join(f"{column} = VALUES({column})" for column in ARTICLE_UPDATE_COLUMNS)
+            cursor.execute(
+                f"INSERT INTO articles ({fields}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}",
+                [article_data[column] for column in ARTICLE_COLUMNS]
+            )
             
             self.connection.commit()
+            # 影响行数: 1为新插入，2为内容有更新，0为内容无变化
+            if cursor.rowcount:
+                self.after_save_article(article)
             return True
             
         except Error as e:
@@ -130,34 +135,19 @@ class MySQLStore(BaseStore):
         try:
             cursor = self.connection.cursor()
             
-            # 检查趋势项是否已存在
-            cursor.execute("SELECT id FROM trends WHERE url = %s AND platform = %s", (trend.url, trend.platform))
-            if cursor.fetchone():
-                return True
-                
             # 准备趋势项数据
             trend_data = {
-                'rank': trend.rank,
-                'name': trend.name,
-                'description': trend.description,
-                'url': trend.url,
-                'platform': trend.platform
+                key: value for key, value in to_dict(trend, iso_datetime=False).items()
+                if key in TREND_COLUMNS
             }
-            
-            # 根据趋势类型添加特定字段
-            if isinstance(trend, TwitterTrend):
-                trend_data['tweet_count'] = trend.tweet_count
-            elif isinstance(trend, GithubTrend):
-                trend_data['language'] = trend.language
-                trend_data['stars'] = trend.stars
-            elif isinstance(trend, HuggingfaceTrend):
-                trend_data['downloads'] = trend.downloads
-                trend_data['tags'] = trend.tags
+            if 'tags' in trend_data:
+                trend_data['tags'] = json.dumps(trend_data['tags'], ensure_ascii=False)
                 
             # 构建SQL语句
             fields = ', '.join(trend_data.keys())
             placeholders = ', '.join(['%s'] * len(trend_data))
-            sql = f"INSERT INTO trends ({fields}) VALUES ({placeholders})"
+            # 已存在的趋势项保持不变
+            sql = f"INSERT IGNORE INTO trends ({fields}) VALUES ({placeholders})"
             
             # 执行插入
             cursor.execute(sql, list(trend_data.values()))
@@ -176,6 +166,7 @@ class MySQLStore(BaseStore):
         try:
             for trend in trends:
                 await self.save_trend(trend)
+            self.after_save_trends(trends, platform)
             return True
         except Exception as e:
             logger.error(f"批量保存趋势项失败: {str(e)}")
@@ -189,18 +180,7 @@ class MySQLStore(BaseStore):
             row = cursor.fetchone()
             
             if row:
-                return NewsArticle(
-                    title=row['title'],
-                    author=row['author'],
-                    published_date=row['published_date'],
-                    content=row['content'],
-                    html_content=row['html_content'],
-                    url=row['url'],
-                    source=row['source'],
-                    id=row['id'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at']
-                )
+                return from_dict(NewsArticle, row)
             return None
             
         except Error as e:
@@ -209,6 +189,33 @@ class MySQLStore(BaseStore):
         finally:
             cursor.close()
             
+    async def get_article_urls(self, source: str) -> Set[str]:
+        """来源已存储文章的URL"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT url FROM articles WHERE source = %s", (source,))
+            return {row[0] for row in cursor.fetchall()}
+            
+        except Error as e:
+            logger.error(f"获取文章URL失败: {str(e)}")
+            return set()
+        finally:
+            cursor.close()
+            
+    async def get_latest_published_date(self, source: str) -> Optional[datetime]:
+        """来源最近一篇文章的发布时间"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT MAX(published_date) FROM articles WHERE source = %s", (source,))
+            row = cursor.fetchone()
+            return naive_utc(row[0]) if row else None
+            
+        except Error as e:
+            logger.error(f"获取最近发布时间失败: {str(e)}")
+            return None
+        finally:
+            cursor.close()
+            
     async def get_trend_by_url(self, url: str, platform: str) -> Optional[TrendItem]:
         """根据URL获取趋势项"""
         try:
@@ -220,33 +227,7 @@ class MySQLStore(BaseStore):
                 return None
                 
             # 根据平台类型创建对应的趋势对象
-            if platform == 'twitter':
-                return TwitterTrend(
-                    rank=row['rank'],
-                    name=row['name'],
-                    description=row['description'],
-                    url=row['url'],
-                    tweet_count=row['tweet_count']
-                )
-            elif platform == 'github':
-                return GithubTrend(
-                    rank=row['rank'],
-                    name=row['name'],
-                    description=row['description'],
-                    url=row['url'],
-                    language=row['language'],
-                    stars=row['stars']
-                )
-            elif platform == 'huggingface':
-                return HuggingfaceTrend(
-                    rank=row['rank'],
-                    name=row['name'],
-                    description=row['description'],
-                    url=row['url'],
-                    downloads=row['downloads'],
-                    tags=row['tags']
-                )
-            return None
+            return trend_from_dict(row)
             
         except Error as e:
             logger.error(f"获取趋势项失败: {str(e)}")
@@ -0,0 +1,139 @@
+"""共享HTTP抓取服务：错误状态码在趋势平台和增量发现中被记录并跳过"""
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from news_sites.discovery import FeedDiscovery
+from tools.fetcher import Fetcher
+from trend_platforms import fetch_trends
+
+
+class _Config:
+    """fetch_trends只读取这两个属性"""
+
+    def __init__(self, base_url: str):
+        self.TREND_PLATFORMS = {'huggingface': {'api_url': f"{base_url}/api/models", 'timeout': 5}}
+        self.TREND_SITES = {'github': {'trending_url': f"{base_url}/trending", 'periods': ['daily'], 'timeout': 5}}
+
+
+async def _error_server() -> TestServer:
+    async def trending(request):
+        return web.Response(status=429, text='rate limited')
+
+    async def models(request):
+        return web.Response(status=503, text='unavailable')
+
+    async def feed(request):
+        return web.Response(status=404, text='not found')
+
+    app = web.Application()
+    app.router.add_get('/trending', trending)
+    app.router.add_get('/api/models', models)
+    app.router.add_get('/feed', feed)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def test_raise_for_status_error_is_printable():
+    async def run():
+        server = await _error_server()
+        fetcher = Fetcher({})
+        try:
+            async with fetcher.session({'Accept': 'text/html'}).get(str(server.make_url('/feed'))) as response:
+                with pytest.raises(aiohttp.ClientResponseError) as info:
+                    response.raise_for_status()
+        finally:
+            await fetcher.close()
+            await server.close()
+        return info.value
+
+    error = asyncio.run(run())
+    assert error.status == 404
+    assert '/feed' in str(error)
+    assert error.request_info.headers['Accept'] == 'text/html'
+
+
+def test_fetch_trends_skips_platforms_with_error_status():
+    async def run():
+        server = await _error_server()
+        fetcher = Fetcher({})
+        try:
+            return await fetch_trends(_Config(str(server.make_url('')).rstrip('/')), session=fetcher.session())
+        finally:
+            await fetcher.close()
+            await server.close()
+
+    assert asyncio.run(run()) == {'github': [], 'huggingface': []}
+
+
+def test_discover_returns_none_when_feed_is_missing(tmp_path):
+    async def run():
+        server = await _error_server()
+        fetcher = Fetcher({})
+        site_config = {'discovery': {'feeds': [str(server.make_url('/feed'))]}}
+        discovery = FeedDiscovery('test', site_config, str(tmp_path / 'state.json'))
+        try:
+            return await discovery.discover(None, 10, session=fetcher.session())
+        finally:
+            await fetcher.close()
+            await server.close()
+
+    assert asyncio.run(run()) is None
+
+
+async def _echo_server() -> TestServer:
+    async def echo(request):
+        return web.json_response({'agent': request.headers.get('X-Test-Agent', '')},
+                                 headers={'X-Echo': 'yes'})
+
+    async def missing(request):
+        return web.Response(status=404)
+
+    async def slow(request):
+        await asyncio.sleep(5)
+        return web.Response(text='late')
+
+    app = web.Application()
+    app.router.add_get('/echo', echo)
+    app.router.add_get('/missing', missing)
+    app.router.add_get('/slow', slow)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def test_http2_path_round_trips_headers_and_translates_errors():
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+
+    async def run():
+        server = await _echo_server()
+        fetcher = Fetcher({'http2': True})
+        session = fetcher.session({'X-Test-Agent': 'crawler'})
+        try:
+            async with session.get(str(server.make_url('/echo'))) as response:
+                echoed = (response.status, response.headers['X-Echo'], await response.json())
+            assert fetcher.snapshot()['protocol'] == 'http2'
+            async with session.get(str(server.make_url('/missing'))) as response:
+                with pytest.raises(aiohttp.ClientResponseError) as missing:
+                    response.raise_for_status()
+            with pytest.raises(asyncio.TimeoutError):
+                async with session.get(str(server.make_url('/slow')), timeout=aiohttp.ClientTimeout(total=0.2)):
+                    pass
+            port = server.port
+        finally:
+            await fetcher.close()
+            await server.close()
+        # 服务已关闭，连接被拒绝
+        with pytest.raises(aiohttp.ClientConnectionError):
+            async with Fetcher({'http2': True}).session().get(f"http://127.0.0.1:{port}/echo"):
+                pass
+        return echoed, missing.value
+
+    echoed, missing = asyncio.run(run())
+    assert echoed == (200, 'yes', {'agent': 'crawler'})
+    assert missing.status == 404 and missing.request_info.headers['X-Test-Agent'] == 'crawler'
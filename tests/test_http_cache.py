@@ -0,0 +1,200 @@
+"""响应缓存：cache_only模式下未命中的请求被记录并跳过"""
+import asyncio
+
+import aiohttp
+import pytest
+
+from news_sites.discovery import FeedDiscovery
+from tools.concurrency import SYNTHETIC_HEADER, concurrency
+from tools.fetcher import Fetcher
+from tools.http_cache import ResponseCache
+from trend_platforms import fetch_trends
+
+
+class _Config:
+    TREND_PLATFORMS = {'huggingface': {'api_url': 'http://127.0.0.1:9/api/models', 'timeout': 5}}
+    TREND_SITES = {'github': {'trending_url': 'http://127.0.0.1:9/trending', 'periods': ['daily'], 'timeout': 5}}
+
+
+@pytest.fixture
+def offline_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), mode='cache_only')
+    yield cache
+    cache.close()
+
+
+def test_cache_only_miss_raises_printable_error(offline_cache):
+    async def run():
+        session = offline_cache.wrap(Fetcher({}).session())
+        async with session.get('http://127.0.0.1:9/feed') as response:
+            with pytest.raises(aiohttp.ClientResponseError) as info:
+                response.raise_for_status()
+        return info.value
+
+    error = asyncio.run(run())
+    assert error.status == 504
+    assert '/feed' in str(error)
+
+
+def test_cache_only_miss_skips_trend_platforms(offline_cache):
+    async def run():
+        return await fetch_trends(_Config(), session=offline_cache.wrap(Fetcher({}).session()))
+
+    assert asyncio.run(run()) == {'github': [], 'huggingface': []}
+
+
+def test_cache_only_miss_falls_back_from_discovery(offline_cache, tmp_path):
+    async def run():
+        site_config = {'discovery': {'feeds': ['http://127.0.0.1:9/feed']}}
+        discovery = FeedDiscovery('test', site_config, str(tmp_path / 'state.json'))
+        return await discovery.discover(None, 10, session=offline_cache.wrap(Fetcher({}).session()))
+
+    assert asyncio.run(run()) is None
+
+
+async def _stream_server(release: asyncio.Event, hits: list):
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    async def stream(request):
+        hits.append(request.path)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b'first,')
+        # 调用方读到第一块之后才发送剩余内容，整体缓冲时会一直等待
+        await asyncio.wait_for(release.wait(), 5)
+        await response.write(b'rest')
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get('/stream', stream)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def test_miss_streams_body_and_stores_after_full_read(tmp_path):
+    async def run():
+        release, hits = asyncio.Event(), []
+        server = await _stream_server(release, hits)
+        cache = ResponseCache(str(tmp_path / 'cache.db'))
+        fetcher = Fetcher({})
+        session = cache.wrap(fetcher.session())
+        url = str(server.make_url('/stream'))
+        try:
+            chunks = []
+            async with session.get(url) as response:
+                async for chunk in response.content.iter_chunked(6):
+                    chunks.append(chunk)
+                    release.set()
+            async with session.get(url) as cached:
+                body, from_cache = await cached.read(), cached.from_cache
+        finally:
+            await fetcher.close()
+            await server.close()
+            cache.close()
+        return b''.join(chunks), body, from_cache, hits
+
+    streamed, body, from_cache, hits = asyncio.run(run())
+    assert streamed == body == b'first,rest'
+    assert from_cache
+    assert hits == ['/stream']
+
+
+def test_partial_or_oversized_body_is_not_stored(tmp_path):
+    async def run():
+        release, hits = asyncio.Event(), []
+        release.set()
+        server = await _stream_server(release, hits)
+        cache = ResponseCache(str(tmp_path / 'cache.db'), max_entry_bytes=8)
+        fetcher = Fetcher({})
+        session = cache.wrap(fetcher.session())
+        url = str(server.make_url('/stream'))
+        try:
+            async with session.get(url) as response:
+                async for chunk in response.content.iter_chunked(6):
+                    break
+            async with session.get(url) as response:
+                body = await response.read()
+            async with session.get(url) as response:
+                from_cache = response.from_cache
+        finally:
+            await fetcher.close()
+            await server.close()
+            cache.close()
+        return body, from_cache, len(hits)
+
+    body, from_cache, requests = asyncio.run(run())
+    assert body == b'first,rest'
+    assert not from_cache
+    assert requests == 3
+
+
+class _Request:
+    def __init__(self, resource_type: str, url: str):
+        self.resource_type = resource_type
+        self.url = url
+        self.method = 'GET'
+        self.headers = {}
+
+
+class _Route:
+    """Playwright Route的替身，记录处理结果"""
+
+    def __init__(self, resource_type: str, url: str):
+        self.request = _Request(resource_type, url)
+        self.result = None
+
+    async def fallback(self):
+        self.result = ('fallback',)
+
+    async def abort(self):
+        self.result = ('abort',)
+
+    async def fulfill(self, status=200, headers=None, body=None, response=None):
+        self.result = ('fulfill', status, headers or {})
+
+    async def fetch(self):
+        raise AssertionError('cache_only模式不能访问网络')
+
+
+class _Context:
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+
+def test_browser_route_never_reaches_network_offline(offline_cache):
+    async def run():
+        context = _Context()
+        await offline_cache.route(context, lambda resource_type, url: 'type:image' if resource_type == 'image' else None)
+        results = {}
+        for resource_type in ('document', 'script', 'xhr', 'stylesheet', 'image'):
+            route = _Route(resource_type, f"http://offline.test/{resource_type}")
+            await context.handler(route)
+            results[resource_type] = route.result
+        return results
+
+    results = asyncio.run(run())
+    assert results['document'][:2] == ('fulfill', 504)
+    assert SYNTHETIC_HEADER in results['document'][2]
+    assert results['script'] == results['xhr'] == results['stylesheet'] == ('abort',)
+    # 会被拦截策略拦截的请求交给拦截策略，由它中止
+    assert results['image'] == ('fallback',)
+
+
+def test_offline_misses_do_not_adjust_host_limit(offline_cache, tmp_path):
+    class _PageResponse:
+        status = 504
+        headers = {SYNTHETIC_HEADER.lower(): 'cache-miss'}
+
+    async def run():
+        async with concurrency.slot('http://offline.test/article') as slot:
+            slot.check_response(_PageResponse())
+        site_config = {'discovery': {'feeds': ['http://offline.test/feed']}}
+        discovery = FeedDiscovery('test', site_config, str(tmp_path / 'state.json'))
+        return await discovery.discover(None, 10, session=offline_cache.wrap(Fetcher({}).session()))
+
+    assert asyncio.run(run()) is None
+    limiter = concurrency.limiter('offline.test')
+    assert not limiter.outcomes and not limiter.latencies and not limiter.backoffs
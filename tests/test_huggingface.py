@@ -0,0 +1,93 @@
+"""Hugging Face趋势客户端：按Link头翻页，JSON数组在任意位置被切分时都能正确解析"""
+import asyncio
+import json
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tools.fetcher import Fetcher
+from trend_platforms.huggingface.client import HuggingfaceClient, iter_json_array
+
+MODELS = [
+    {'id': 'org/model-1', 'downloads': 10, 'tags': ['text'], 'pipeline_tag': 'text-generation'},
+    {'id': 'org/模型-2', 'downloads': 20, 'tags': ['中文, [测试]'], 'pipeline_tag': 'fill-mask'},
+    {'id': 'org/model-3', 'downloads': 30, 'tags': [], 'pipeline_tag': None},
+    {'id': 'org/model-4', 'downloads': 40, 'tags': ['vision'], 'pipeline_tag': 'image-classification'},
+]
+
+
+async def _parse(chunks):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+    return [item async for item in iter_json_array(source())]
+
+
+def test_iter_json_array_handles_every_split_point():
+    body = json.dumps(MODELS[:2], ensure_ascii=False, indent=1).encode('utf-8')
+    for split in range(1, len(body)):
+        assert asyncio.run(_parse([body[:split], body[split:]])) == MODELS[:2], split
+
+
+def test_iter_json_array_handles_byte_chunks_and_lone_closing_bracket():
+    body = json.dumps(MODELS, ensure_ascii=False).encode('utf-8')
+    chunks = [body[start:start + 1] for start in range(len(body) - 1)] + [b']', b'\n']
+    assert asyncio.run(_parse(chunks)) == MODELS
+    assert asyncio.run(_parse([b' [', b']'])) == []
+
+
+async def _models_server(requests: list) -> TestServer:
+    async def models(request):
+        requests.append(dict(request.query))
+        page = int(request.query.get('cursor', '1'))
+        items = MODELS[(page - 1) * 2:page * 2]
+        response = web.StreamResponse(headers={'Content-Type': 'application/json'})
+        if page * 2 < len(MODELS):
+            response.headers['Link'] = f'<{request.url.with_query(cursor=str(page + 1))}>; rel="next"'
+        await response.prepare(request)
+        body = json.dumps(items, ensure_ascii=False).encode('utf-8')
+        # 小块发送，最后的']'单独一块
+        for start in range(0, len(body) - 1, 7):
+            await response.write(body[start:min(start + 7, len(body) - 1)])
+        await response.write(b']')
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get('/api/models', models)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def _fetch(max_items: int):
+    async def run():
+        requests = []
+        server = await _models_server(requests)
+        fetcher = Fetcher({})
+        client = HuggingfaceClient({'api_url': str(server.make_url('/api/models')), 'page_size': 2,
+                                    'max_items': max_items, 'site_url': 'https://hf.test'})
+        try:
+            return await client.get_trending_models(fetcher.session()), requests
+        finally:
+            await fetcher.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_follows_next_links_across_pages():
+    trends, requests = _fetch(10)
+    assert [trend.name for trend in trends] == [model['id'] for model in MODELS]
+    assert [trend.rank for trend in trends] == [1, 2, 3, 4]
+    assert trends[1].url == 'https://hf.test/org/模型-2'
+    assert trends[1].tags == ['中文, [测试]']
+    assert len(requests) == 2
+    assert requests[0]['sort'] == 'trendingScore' and requests[0]['limit'] == '2'
+    assert requests[1] == {'cursor': '2'}
+
+
+def test_stops_at_max_items_without_requesting_more_pages():
+    trends, requests = _fetch(3)
+    assert [trend.name for trend in trends] == [model['id'] for model in MODELS[:3]]
+    assert len(requests) == 2
@@ -0,0 +1,44 @@
+"""指标接口：在临时端口启动，记录页面和定时任务后抓取/metrics"""
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+
+from main import TechTrendCrawler
+from tools.metrics import MetricsServer, record_page
+
+
+def test_scrape_reports_pages_and_jobs():
+    async def job():
+        await asyncio.sleep(0.01)
+
+    async def failing_job():
+        raise RuntimeError('boom')
+
+    async def run():
+        server = MetricsServer(port=0)
+        await server.start()
+        try:
+            record_page('metrics_test', 'héllo')
+            # run_job只在定时任务模式下使用scheduler和config
+            crawler = SimpleNamespace(scheduler=None)
+            await TechTrendCrawler.run_job(crawler, 'metrics_test_job', job)
+            await TechTrendCrawler.run_job(crawler, 'metrics_test_job', failing_job)
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                    return response.status, response.headers['Content-Type'], await response.text()
+        finally:
+            await server.stop()
+
+    status, content_type, text = asyncio.run(run())
+    assert status == 200 and content_type.startswith('text/plain')
+    lines = set(text.splitlines())
+    assert '# TYPE crawler_pages_fetched_total counter' in lines
+    assert 'crawler_pages_fetched_total{site="metrics_test"} 1' in lines
+    assert 'crawler_bytes_downloaded_total{site="metrics_test"} 6' in lines
+    assert '# TYPE crawler_job_duration_seconds histogram' in lines
+    assert 'crawler_job_duration_seconds_count{job="metrics_test_job"} 2' in lines
+    assert 'crawler_job_duration_seconds_bucket{job="metrics_test_job",le="+Inf"} 2' in lines
+    assert 'crawler_job_failures_total{job="metrics_test_job"} 1' in lines
+    success = [line for line in lines if line.startswith('crawler_last_success_timestamp_seconds{site="metrics_test_job"}')]
+    assert len(success) == 1 and float(success[0].split()[-1]) > 0
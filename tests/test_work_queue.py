@@ -0,0 +1,127 @@
+"""任务队列的共同约定：至少一次投递、租约到期重新投递、去重键、结果通道
+
+内存和SQLite队列总是测试；设置TEST_REDIS_URL时同时测试Redis队列。
+"""
+import os
+import time
+
+import pytest
+
+from work_queue import TASK_ARTICLE, TASK_LISTING, get_queue_class
+
+LEASE_SECONDS = 0.2
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def make_queue(request, tmp_path):
+    queues = []
+
+    def make(max_attempts: int = 3):
+        backend = request.param
+        if backend == 'memory':
+            queue = get_queue_class('memory')(LEASE_SECONDS, max_attempts)
+        elif backend == 'sqlite':
+            queue = get_queue_class('sqlite')(str(tmp_path / f"queue{len(queues)}.db"), LEASE_SECONDS, max_attempts)
+        else:
+            url = os.environ.get('TEST_REDIS_URL')
+            if not url:
+                pytest.skip('未设置TEST_REDIS_URL')
+            pytest.importorskip('redis')
+            queue = get_queue_class('redis')(url, f"techtrend_test{len(queues)}", LEASE_SECONDS, max_attempts)
+            queue.reset()
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        if request.param == 'redis':
+            queue.reset()
+        queue.close()
+
+
+def _expire_leases():
+    time.sleep(LEASE_SECONDS * 1.5)
+
+
+def test_dedup_keys(make_queue):
+    queue = make_queue()
+    assert queue.put(TASK_ARTICLE, 'site', 'ai', 'https://a.test/1')
+    # 文章按URL去重，与关键词无关
+    assert not queue.put(TASK_ARTICLE, 'site', 'ml', 'https://a.test/1')
+    assert queue.put_many(TASK_ARTICLE, 'site', [(None, 'https://a.test/2', None, None),
+                                                  (None, 'https://a.test/2', None, None),
+                                                  (None, 'https://a.test/3', None, 'custom'),
+                                                  (None, 'https://a.test/4', None, 'custom')]) == 2
+    assert queue.put(TASK_LISTING, 'site', 'ai')
+    assert not queue.put(TASK_LISTING, 'site', 'ai')
+    assert queue.unfinished() == 4
+
+
+def test_expired_lease_is_redelivered(make_queue):
+    queue = make_queue()
+    queue.put(TASK_LISTING, 'site', 'ai', payload={'page': 1})
+    first = queue.lease('worker-1')
+    assert len(first) == 1 and first[0].attempts == 1 and first[0].payload == {'page': 1}
+    # 租约内对其他进程不可见
+    assert queue.lease('worker-2') == []
+    _expire_leases()
+    second = queue.lease('worker-2')
+    assert [task.id for task in second] == [first[0].id]
+    assert second[0].attempts == 2
+
+
+def test_extend_keeps_lease(make_queue):
+    queue = make_queue()
+    queue.put(TASK_LISTING, 'site', 'ai')
+    task, = queue.lease('worker-1')
+    time.sleep(LEASE_SECONDS * 0.6)
+    queue.extend([task.id], 'worker-1')
+    time.sleep(LEASE_SECONDS * 0.6)
+    assert queue.lease('worker-2') == []
+
+
+def test_lease_expiry_fails_task_after_max_attempts(make_queue):
+    queue = make_queue(max_attempts=2)
+    queue.put(TASK_LISTING, 'site', 'ai')
+    assert len(queue.lease('worker-1')) == 1
+    _expire_leases()
+    assert queue.lease('worker-2')[0].attempts == 2
+    _expire_leases()
+    assert queue.lease('worker-3') == []
+    assert queue.unfinished() == 0
+    assert queue.stats()[TASK_LISTING].get('failed') == 1
+
+
+def test_nack_retries_until_max_attempts(make_queue):
+    queue = make_queue(max_attempts=2)
+    queue.put(TASK_LISTING, 'site', 'ai')
+    queue.nack(queue.lease('worker-1')[0], 'timeout')
+    task, = queue.lease('worker-1')
+    assert task.attempts == 2
+    queue.nack(task, 'timeout')
+    assert queue.lease('worker-1') == []
+    assert queue.stats()[TASK_LISTING].get('failed') == 1
+
+
+def test_ack_publishes_results_and_known_urls(make_queue):
+    queue = make_queue()
+    queue.put_many(TASK_ARTICLE, 'site', [('ai', f"https://a.test/{i}", None, None) for i in range(3)])
+    queue.put(TASK_ARTICLE, 'other', 'ai', 'https://b.test/1')
+    tasks = queue.lease('worker-1', limit=5)
+    # 一次领取同一站点、同一关键词的文章任务
+    assert sorted(task.url for task in tasks) == [f"https://a.test/{i}" for i in range(3)]
+    for task in tasks:
+        queue.ack(task, [{'url': task.url, 'title': '标题'}])
+    assert queue.known_urls('site') == {f"https://a.test/{i}" for i in range(3)}
+    assert queue.known_urls('other') == set()
+
+    results = queue.take_results(limit=2)
+    assert [(kind, site) for _, kind, site, _ in results] == [(TASK_ARTICLE, 'site')] * 2
+    queue.mark_consumed([result_id for result_id, _, _, _ in results])
+    remaining = queue.take_results()
+    assert len(remaining) == 1 and remaining[0][3]['title'] == '标题'
+    queue.mark_consumed([remaining[0][0]])
+    assert queue.take_results() == []
+    # 确认后的任务不会再被领取
+    _expire_leases()
+    assert [task.site for task in queue.lease('worker-2')] == ['other']
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from config.base_config import BaseConfig
+from news_sites import SITE_REGISTRY, get_crawler_class
+from store.json import JSONStore
+from tools.replay import ReplayServer, ReplayPage
+
+logger = logging.getLogger(__name__)
+
+
+async def benchmark_site(site: str, site_config: dict, entries: Dict[str, dict],
+                         server: ReplayServer, session: aiohttp.ClientSession, store: JSONStore) -> dict:
+    """对单个站点的录制页面运行基准测试
+
+    Returns:
+        包含pages/s、parse ms/page、store ms/article的统计结果
+    """
+    crawler = get_crawler_class(site)(site_config)
+    page = ReplayPage(server, session)
+    crawler.page = page
+
+    listing_urls = [url for url, entry in entries.items() if entry['kind'] == 'listing']
+    article_urls = [url for url, entry in entries.items() if entry['kind'] == 'article']
+    max_articles = site_config.get('max_articles', 10)
+
+    start = time.perf_counter()
+
+    # 列表页：先回放页面，再计时链接提取
+    listing_parse_seconds = 0.0
+    for url in listing_urls:
+        await page.goto(url)
+        parse_start = time.perf_counter()
+        await crawler.client.get_latest_articles(page, max_articles)
+        listing_parse_seconds += time.perf_counter() - parse_start
+
+    # 文章页：完整走一遍文章处理流程，扣除回放请求时间即为解析时间
+    fetch_before = page.fetch_seconds
+    process_start = time.perf_counter()
+    articles = await crawler._process_article_links(article_urls)
+    article_parse_seconds = (time.perf_counter() - process_start) - (page.fetch_seconds - fetch_before)
+
+    # 存储写入
+    store_start = time.perf_counter()
+    for article in articles:
+        await store.save_article(article)
+    store_seconds = time.perf_counter() - store_start
+
+    elapsed = time.perf_counter() - start
+    parsed_pages = len(listing_urls) + len(article_urls)
+    return {
+        'site': site,
+        'listing_pages': len(listing_urls),
+        'article_pages': len(article_urls),
+        'articles': len(articles),
+        'bytes': page.bytes_fetched,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(page.pages_fetched / elapsed, 2) if elapsed else 0.0,
+        'parse_ms_per_page': round((listing_parse_seconds + article_parse_seconds) * 1000 / parsed_pages, 2) if parsed_pages else 0.0,
+        'store_ms_per_article': round(store_seconds * 1000 / len(articles), 2) if articles else 0.0,
+    }
+
+
+async def run_benchmark(sites: List[str], latency_ms: float) -> List[dict]:
+    """启动回放服务器并依次测试各站点"""
+    replay_config = BaseConfig.REPLAY_CONFIG
+    server = ReplayServer(replay_config['recordings_directory'], replay_config['host'], 0, latency_ms)
+    await server.start()
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # 使用临时目录存储，避免污染真实数据
+            store = JSONStore({
+                'json_path': os.path.join(tmp_dir, 'articles.json'),
+                'trends_json_path': os.path.join(tmp_dir, 'trends.json')
+            })
+            async with aiohttp.ClientSession() as session:
+                for site in sites:
+                    entries = server.recordings.get(site)
+                    if not entries:
+                        logger.warning(f"站点 {site} 没有录制页面，跳过")
+                        continue
+                    result = await benchmark_site(site, BaseConfig.NEWS_SITES[site], entries, server, session, store)
+                    results.append(result)
+    finally:
+        await server.stop()
+    return results
+
+
+def print_results(results: List[dict]):
+    """打印基准测试结果表格"""
+    header = f"{'site':<14}{'pages':>7}{'articles':>10}{'pages/s':>10}{'parse ms/page':>15}{'store ms/article':>18}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        pages = r['listing_pages'] + r['article_pages']
+        print(f"{r['site']:<14}{pages:>7}{r['articles']:>10}{r['pages_per_sec']:>10}"
+              f"{r['parse_ms_per_page']:>15}{r['store_ms_per_article']:>18}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='基于录制页面的离线基准测试')
+    parser.add_argument('sites', nargs='*', default=list(SITE_REGISTRY), choices=list(SITE_REGISTRY),
+                        help='要测试的站点，默认全部')
+    parser.add_argument('--latency-ms', type=float, default=BaseConfig.REPLAY_CONFIG['latency_ms'],
+                        help='回放时每个页面的模拟延迟(毫秒)')
+    parser.add_argument('--output', help='将结果以JSON格式写入指定文件')
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.sites, args.latency_ms))
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
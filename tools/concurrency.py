@@ -0,0 +1,301 @@
+"""按主机自适应调整并发数(AIMD)
+
+每个主机一个限流器：请求成功且最近的p95延迟和错误率都正常时，并发上限每次加 1/上限
+(相当于每轮并发加1)；遇到429/503、超时或Cloudflare验证页时上限减半，并在冷却期内不再重复减半。
+p95延迟超过目标值时同样减半，让上限停在吞吐量最高、又不触发限流的位置。
+
+用法:
+    async with concurrency.slot(url) as slot:
+        response = await page.goto(url)
+        slot.check_response(response)
+        slot.check_html(await page.content())
+
+同一任务中嵌套进入同一主机的slot不会重复占用名额，因此爬虫层和客户端层可以各自加上slot。
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from tools.metrics import CONCURRENCY_LIMIT, FETCH_BACKOFFS
+from tools.timing import percentile
+
+logger = logging.getLogger(__name__)
+
+# 触发并发减半的失败原因，其余失败只计入错误率
+BACKOFF_REASONS = ('429', '503', 'timeout', 'challenge', 'latency')
+
+# Cloudflare等验证页面的特征
+CHALLENGE_MARKERS = (
+    '<title>Just a moment...</title>',
+    'cf-chl-',
+    '/cdn-cgi/challenge-platform/',
+    'Attention Required! | Cloudflare',
+    'cf-browser-verification',
+)
+
+# 离线缓存(cache_only)未命中时返回的合成响应带有此响应头，不代表站点的真实状态，不参与并发调整
+SYNTHETIC_HEADER = 'X-Crawler-Synthetic'
+
+_current_slot: ContextVar[Optional['Slot']] = ContextVar('concurrency_slot', default=None)
+
+
+def host_of(url: str) -> str:
+    """URL的主机名，作为限流粒度"""
+    return urlsplit(url).hostname or ''
+
+
+def is_challenge(html: str) -> bool:
+    """页面是否为反爬验证页"""
+    head = html[:20000]
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def is_synthetic(source) -> bool:
+    """响应(Playwright或aiohttp)或ClientResponseError是否来自离线缓存未命中"""
+    headers = getattr(source, 'headers', None)
+    if not headers:
+        return False
+    # Playwright的响应头是键为小写的dict，aiohttp的是不区分大小写的CIMultiDict
+    return bool(headers.get(SYNTHETIC_HEADER) or headers.get(SYNTHETIC_HEADER.lower()))
+
+
+def failure_reason(error: BaseException) -> Optional[str]:
+    """把异常归类为失败原因，任务取消和离线缓存未命中不算失败"""
+    if isinstance(error, asyncio.CancelledError) or is_synthetic(error):
+        return None
+    if isinstance(error, asyncio.TimeoutError) or type(error).__name__ == 'TimeoutError':
+        return 'timeout'
+    status = getattr(error, 'status', None)
+    if status in (429, 503):
+        return str(status)
+    return 'error'
+
+
+class Slot:
+    """一次占用的并发名额，记录本次请求的结果"""
+
+    __slots__ = ('limiter', 'failure', 'synthetic')
+
+    def __init__(self, limiter: 'HostLimiter'):
+        self.limiter = limiter
+        self.failure: Optional[str] = None
+        self.synthetic = False  # 离线缓存未命中，本次结果不计入统计
+
+    def fail(self, reason: str):
+        """标记本次请求失败，只保留第一个原因"""
+        if self.failure is None:
+            self.failure = reason
+
+    def check_response(self, response):
+        """根据响应状态码判断是否被限流，response可以是Playwright或aiohttp的响应"""
+        if is_synthetic(response):
+            self.synthetic = True
+            return
+        status = getattr(response, 'status', None) if response is not None else None
+        if status in (429, 503):
+            self.fail(str(status))
+        elif status is not None and status >= 500:
+            self.fail('error')
+
+    def check_html(self, html: str) -> bool:
+        """检查是否为验证页，是则标记失败并返回True"""
+        if html and is_challenge(html):
+            self.fail('challenge')
+            return True
+        return False
+
+
+class HostLimiter:
+    """单个主机的并发限制"""
+
+    def __init__(self, host: str, initial: int = 2, minimum: int = 1, maximum: int = 8,
+                 target_p95_seconds: float = 10.0, max_error_rate: float = 0.1,
+                 backoff_factor: float = 0.5, cooldown_seconds: float = 5.0,
+                 window: int = 50, adaptive: bool = True):
+        self.host = host
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.target_p95 = target_p95_seconds
+        self.max_error_rate = max_error_rate
+        self.backoff_factor = backoff_factor
+        self.cooldown = cooldown_seconds
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.backoffs: Dict[str, int] = defaultdict(int)
+        self.last_decrease = float('-inf')
+        # 不使用asyncio.Condition，避免限流器跨事件循环复用时绑定到旧循环
+        self._waiters = deque()
+        CONCURRENCY_LIMIT.labels(host).set(self.capacity)
+
+    @property
+    def capacity(self) -> int:
+        """当前允许的并发数"""
+        return max(self.minimum, int(self.limit))
+
+    def p95(self) -> float:
+        return percentile(sorted(self.latencies), 95)
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    async def acquire(self):
+        """等待空闲名额"""
+        while self.in_flight >= self.capacity:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 被唤醒后取消时把名额让给下一个等待者
+                self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self, seconds: float, failure: Optional[str] = None, record: bool = True):
+        """归还名额并根据本次结果调整并发上限，record为False时只归还名额"""
+        self.in_flight -= 1
+        if record and failure is None:
+            self.outcomes.append(True)
+            self.latencies.append(seconds)
+            if self.adaptive:
+                self._on_success()
+            CONCURRENCY_LIMIT.labels(self.host).set(self.capacity)
+        elif record:
+            self.record_failure(failure)
+        self._wake()
+
+    def record_failure(self, reason: str):
+        """记录一次失败，限流类的失败会下调并发上限"""
+        self.outcomes.append(False)
+        self.backoffs[reason] += 1
+        FETCH_BACKOFFS.labels(self.host, reason).inc()
+        if self.adaptive and reason in BACKOFF_REASONS:
+            self._decrease(reason)
+        CONCURRENCY_LIMIT.labels(self.host).set(self.capacity)
+
+    def _on_success(self):
+        if time.monotonic() - self.last_decrease < self.cooldown:
+            return
+        if self.p95() > self.target_p95:
+            self._decrease('latency')
+        elif self.error_rate() <= self.max_error_rate:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        previous = self.capacity
+        self.limit = max(float(self.minimum), self.limit * self.backoff_factor)
+        self.last_decrease = now
+        if reason == 'latency':
+            # 丢弃旧的延迟样本，按新的并发数重新评估
+            self.latencies.clear()
+        if self.capacity != previous:
+            logger.warning(f"{self.host} 并发上限下调: {previous} -> {self.capacity}, 原因: {reason}")
+
+    def _wake(self):
+        free = self.capacity - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            'limit': self.capacity,
+            'limit_exact': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'p95_ms': round(self.p95() * 1000, 2),
+            'error_rate': round(self.error_rate(), 3),
+            'backoffs': dict(self.backoffs)
+        }
+
+
+class ConcurrencyController:
+    """所有主机的限流器"""
+
+    def __init__(self, config: Optional[dict] = None):
+        self.configure(config or {})
+
+    def configure(self, config: dict):
+        """应用配置，已创建的限流器会被重置"""
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self._limiters: Dict[str, HostLimiter] = {}
+
+    def limiter(self, host: str) -> HostLimiter:
+        """获取主机的限流器，不存在时按配置创建"""
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            options = {key: value for key, value in self.config.items() if key not in ('enabled', 'hosts')}
+            options.update(self.config.get('hosts', {}).get(host, {}))
+            if not self.enabled:
+                # 关闭自适应时固定使用初始并发数
+                options['adaptive'] = False
+            limiter = self._limiters[host] = HostLimiter(host, **options)
+        return limiter
+
+    def capacity(self, url: str) -> int:
+        """URL所在主机当前允许的并发数"""
+        return self.limiter(host_of(url)).capacity
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """占用URL所在主机的一个并发名额，结束时按结果调整上限"""
+        host = host_of(url)
+        current = _current_slot.get()
+        if current is not None and current.limiter.host == host:
+            # 外层已经占用了同一主机的名额
+            try:
+                yield current
+            except BaseException as e:
+                reason = failure_reason(e)
+                if reason:
+                    current.fail(reason)
+                raise
+            return
+
+        limiter = self.limiter(host)
+        await limiter.acquire()
+        slot = Slot(limiter)
+        token = _current_slot.set(slot)
+        start = time.perf_counter()
+        try:
+            yield slot
+        except BaseException as e:
+            reason = failure_reason(e)
+            if reason:
+                slot.fail(reason)
+            raise
+        finally:
+            _current_slot.reset(token)
+            limiter.release(time.perf_counter() - start, slot.failure, not slot.synthetic)
+
+    def report_failure(self, url: str, reason: str):
+        """在slot之外发现的失败，如列表页读取内容时才发现是验证页"""
+        self.limiter(host_of(url)).record_failure(reason)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """各主机当前的并发上限和统计"""
+        return {host: limiter.snapshot() for host, limiter in sorted(self._limiters.items())}
+
+
+def _default_controller() -> ConcurrencyController:
+    from config.base_config import BaseConfig
+    return ConcurrencyController(getattr(BaseConfig, 'CONCURRENCY_CONFIG', {}))
+
+
+# 进程内共享的并发控制器
+concurrency = _default_controller()
@@ -0,0 +1,206 @@
+"""近似重复文章检测
+
+对文章正文按连续词构造shingle，计算64位SimHash指纹，并按4个16位分段建立索引。
+汉明距离不超过3的两个指纹至少有一个分段完全相同，因此查找时只需比较同分段的候选，
+与已存储文章数量基本无关。索引以jsonl格式追加写入，启动时重新加载。
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from model.news_article import NewsArticle
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+_WORD_RE = re.compile(r'\w+')
+
+# 第i个表把字节映射为其第(7-i)位的值，按高位到低位排列
+_BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(7, -1, -1)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """计算文本的64位SimHash指纹，空文本返回0"""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return 0
+    if len(words) <= shingle_size:
+        grams = {' '.join(words)}
+    else:
+        grams = {' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+
+    # 所有shingle的8字节哈希拼接在一起，按字节位置切片后用translate把指定位映射为0/1，
+    # 再用count统计1的个数，过半则该位为1。逐位统计全部在C层完成。
+    digests = b''.join(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest() for gram in grams)
+    threshold = len(grams) / 2
+    fingerprint = 0
+    for byte_index in range(8):
+        column = digests[byte_index::8]
+        for table in _BIT_TABLES:
+            fingerprint = (fingerprint << 1) | (column.translate(table).count(1) > threshold)
+    return fingerprint
+
+
+def _bands(fingerprint: int) -> List[int]:
+    return [(fingerprint >> (i * BAND_BITS)) & BAND_MASK for i in range(BANDS)]
+
+
+class SimHashIndex:
+    """按分段索引的SimHash集合"""
+
+    def __init__(self, max_distance: int = 3):
+        if max_distance >= BANDS:
+            logger.warning(f"max_distance={max_distance} 超过分段索引可保证的范围，已调整为{BANDS - 1}")
+            max_distance = BANDS - 1
+        self.max_distance = max_distance
+        self.fingerprints: Dict[str, int] = {}
+        self._bands: List[Dict[int, List[str]]] = [defaultdict(list) for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def __contains__(self, url: str):
+        return url in self.fingerprints
+
+    def add(self, url: str, fingerprint: int):
+        if url in self.fingerprints:
+            return
+        self.fingerprints[url] = fingerprint
+        for band, value in zip(self._bands, _bands(fingerprint)):
+            band[value].append(url)
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """查找最相近的已有文章，没有距离在阈值内的文章时返回None"""
+        best_url, best_distance = None, self.max_distance + 1
+        seen = set()
+        for band, value in zip(self._bands, _bands(fingerprint)):
+            for url in band.get(value, ()):
+                if url in seen:
+                    continue
+                seen.add(url)
+                distance = hamming_distance(fingerprint, self.fingerprints[url])
+                if distance < best_distance:
+                    best_url, best_distance = url, distance
+        return best_url
+
+
+class DuplicateDetector:
+    """存储钩子：保存前标记近似重复文章，保存后写入索引
+
+    重复文章仍会被保存，duplicate_of指向同一聚类中最早保存的文章，
+    下游(如周报)据此跳过重复内容。
+    """
+
+    def __init__(self, index_path: str, max_distance: int = 3, shingle_size: int = 3):
+        self.index_path = index_path
+        self.shingle_size = shingle_size
+        self.index = SimHashIndex(max_distance)
+        self.clusters: Dict[str, str] = {}  # url -> 聚类首篇文章url
+        self._pending: Dict[str, int] = {}
+        self.load()
+
+    def load(self):
+        """加载已持久化的指纹"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    self.index.add(entry['url'], int(entry['simhash'], 16))
+                    if entry.get('duplicate_of'):
+                        self.clusters[entry['url']] = entry['duplicate_of']
+            logger.info(f"已加载去重索引: {len(self.index)} 条")
+        except Exception as e:
+            logger.error(f"加载去重索引失败: {str(e)}")
+
+    def check(self, article: NewsArticle) -> Optional[str]:
+        """返回与文章近似重复的已有文章URL"""
+        if not article.content or article.url in self.index:
+            return None
+        fingerprint = simhash(article.content, self.shingle_size)
+        self._pending[article.url] = fingerprint
+        match = self.index.find(fingerprint)
+        if match is None:
+            return None
+        return self.clusters.get(match, match)
+
+    def before_save(self, article: NewsArticle):
+        duplicate_of = self.check(article)
+        if duplicate_of:
+            article.duplicate_of = duplicate_of
+            logger.info(f"检测到近似重复文章: {article.url} -> {duplicate_of}")
+
+    def after_save(self, article: NewsArticle):
+        if not article.content or article.url in self.index:
+            return
+        fingerprint = self._pending.pop(article.url, None)
+        if fingerprint is None:
+            fingerprint = simhash(article.content, self.shingle_size)
+        self.index.add(article.url, fingerprint)
+        if article.duplicate_of:
+            self.clusters[article.url] = article.duplicate_of
+
+        try:
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'url': article.url,
+                    'simhash': format(fingerprint, '016x'),
+                    'duplicate_of': article.duplicate_of
+                }, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.error(f"写入去重索引失败: {str(e)}")
+
+
+def rebuild(articles_path: str, index_path: str, max_distance: int = 3, shingle_size: int = 3) -> Dict[str, int]:
+    """根据已有的articles.json重建去重索引"""
+    from model.codec import from_dict, loads
+
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    detector = DuplicateDetector(index_path, max_distance, shingle_size)
+    with open(articles_path, 'rb') as f:
+        records = loads(f.read())
+
+    duplicates = 0
+    for record in records:
+        article = from_dict(NewsArticle, record)
+        article.duplicate_of = None
+        detector.before_save(article)
+        detector.after_save(article)
+        if article.duplicate_of:
+            duplicates += 1
+    return {'articles': len(records), 'duplicates': duplicates}
+
+
+if __name__ == "__main__":
+    from config.base_config import BaseConfig
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    storage_config = BaseConfig.STORAGE_CONFIG
+    dedup_config = storage_config['dedup']
+    parser = argparse.ArgumentParser(description='根据已存储文章重建近似重复索引')
+    parser.add_argument('--articles', default=storage_config['json_path'], help='文章JSON文件')
+    parser.add_argument('--index', default=dedup_config['index_path'], help='去重索引文件')
+    args = parser.parse_args()
+
+    result = rebuild(args.articles, args.index, dedup_config['max_distance'], dedup_config['shingle_size'])
+    print(f"共{result['articles']}篇文章，其中{result['duplicates']}篇为近似重复")
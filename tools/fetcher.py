@@ -0,0 +1,323 @@
+"""进程内共享的HTTP抓取服务
+
+趋势平台、WordPress接口、订阅和站点地图等aiohttp路径都通过fetch_session()获取会话，
+共用一个连接池，不再每次调用各自创建和销毁ClientSession:
+    - 连接池限制总连接数和每个主机的连接数，DNS解析结果缓存，空闲连接保持复用(keep-alive)
+    - 响应按Content-Encoding边下载边解压，正文超过max_body_bytes时中止并抛出BodyTooLarge
+    - http2为True且安装了httpx[http2]时改用HTTP/2，同一主机的请求在一个连接上多路复用
+
+会话的用法与aiohttp.ClientSession相同(async with session.get(...) as response)，
+可以再用http_cache.cached_session()包装。TechTrendCrawler关闭时调用close_fetcher()释放连接池，
+未启动时第一次请求自动创建。
+aiohttp在第一次创建连接池时才导入，只导入本模块的站点运行不会加载aiohttp。
+"""
+import asyncio
+import functools
+import json
+import logging
+import re
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.-]+)', re.I)
+
+
+@functools.lru_cache(maxsize=None)
+def _body_too_large() -> type:
+    """BodyTooLarge继承aiohttp.ClientPayloadError，调用方捕获aiohttp.ClientError即可处理"""
+    import aiohttp
+
+    class BodyTooLarge(aiohttp.ClientPayloadError):
+        """响应正文超过大小上限"""
+
+    BodyTooLarge.__module__, BodyTooLarge.__qualname__ = __name__, 'BodyTooLarge'
+    return BodyTooLarge
+
+
+def raise_for_status(response, method: str = 'GET', request_headers=None, message: Optional[str] = None):
+    """与aiohttp.ClientResponse.raise_for_status相同，状态码>=400时抛出ClientResponseError
+
+    FetchResponse和http_cache.CachedResponse共用。异常必须带完整的request_info，
+    否则调用方记录str(异常)时会抛出AttributeError。
+    """
+    if response.status < 400:
+        return
+    import aiohttp
+    from multidict import CIMultiDict, CIMultiDictProxy
+    from yarl import URL
+
+    url = URL(str(response.url))
+    request_info = aiohttp.RequestInfo(url, method, CIMultiDictProxy(CIMultiDict(request_headers or {})), url)
+    raise aiohttp.ClientResponseError(request_info, (), status=response.status,
+                                      message=message or f"HTTP {response.status}", headers=response.headers)
+
+
+def __getattr__(name: str):
+    # 延迟创建BodyTooLarge，导入本模块时不加载aiohttp
+    if name == 'BodyTooLarge':
+        return _body_too_large()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LimitedContent:
+    """与aiohttp的StreamReader用法相同，累计读取的字节数超过上限时抛出BodyTooLarge"""
+
+    def __init__(self, chunks, url: str, limit: int, fetcher: 'Fetcher'):
+        self._chunks = chunks  # size -> 异步迭代器，产出已解压的正文块
+        self._url = url
+        self._limit = limit
+        self._fetcher = fetcher
+        self.size = 0
+
+    async def iter_chunked(self, size: int):
+        async for chunk in self._chunks(size):
+            self.size += len(chunk)
+            self._fetcher.bytes += len(chunk)
+            if self._limit and self.size > self._limit:
+                self._fetcher.oversized += 1
+                raise _body_too_large()(f"响应正文超过{self._limit}字节: {self._url}")
+            yield chunk
+
+    async def read(self, n: int = -1) -> bytes:
+        parts = []
+        async for chunk in self.iter_chunked(65536):
+            parts.append(chunk)
+        return b''.join(parts)
+
+
+class FetchResponse:
+    """与aiohttp.ClientResponse用法相同的响应，正文边读边检查大小"""
+
+    def __init__(self, url: str, status: int, headers, chunks, limit: int, fetcher: 'Fetcher',
+                 method: str = 'GET', request_headers: Optional[dict] = None):
+        from multidict import CIMultiDict
+
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDict(headers)
+        self.method = method
+        self.request_headers = request_headers or {}
+        self.content = _LimitedContent(chunks, url, limit, fetcher)
+        self._body: Optional[bytes] = None
+
+    async def read(self) -> bytes:
+        if self._body is None:
+            self._body = await self.content.read()
+        return self._body
+
+    def get_encoding(self) -> str:
+        match = _CHARSET_RE.search(self.headers.get('Content-Type', ''))
+        return match.group(1) if match else 'utf-8'
+
+    async def text(self, encoding: Optional[str] = None, errors: str = 'strict') -> str:
+        return (await self.read()).decode(encoding or self.get_encoding(), errors)
+
+    async def json(self, content_type: Optional[str] = 'application/json', loads=json.loads, **kwargs):
+        return loads(await self.text())
+
+    def raise_for_status(self):
+        raise_for_status(self, self.method, self.request_headers)
+
+    def release(self):
+        pass
+
+
+class _FetchRequest:
+    """session.get()的返回值，用作async with，退出时把连接归还连接池"""
+
+    def __init__(self, fetcher: 'Fetcher', method: str, url: str, kwargs: dict):
+        self._fetcher = fetcher
+        self._args = (method, url, kwargs)
+        self._close = None
+
+    async def __aenter__(self) -> FetchResponse:
+        response, self._close = await self._fetcher.open(*self._args)
+        return response
+
+    async def __aexit__(self, *exc):
+        if self._close:
+            await self._close()
+        return False
+
+
+class FetchSession:
+    """共享连接池上的会话视图，只保存默认请求头，关闭会话不会关闭连接池"""
+
+    def __init__(self, fetcher: 'Fetcher', headers: Optional[dict] = None):
+        self._fetcher = fetcher
+        self.headers = {**fetcher.headers, **(headers or {})}
+
+    def get(self, url, params=None, headers=None, **kwargs) -> _FetchRequest:
+        return self.request('GET', url, params=params, headers=headers, **kwargs)
+
+    def request(self, method: str, url, params=None, headers=None, **kwargs) -> _FetchRequest:
+        kwargs.update(params=params, headers={**self.headers, **(headers or {})})
+        return _FetchRequest(self._fetcher, method, str(url), kwargs)
+
+    async def close(self):
+        pass
+
+
+class Fetcher:
+    """进程内共享的HTTP连接池"""
+
+    def __init__(self, config: dict, user_agent: str = ''):
+        self.limit = config.get('limit', 100)
+        self.limit_per_host = config.get('limit_per_host', 8)
+        self.dns_cache_seconds = config.get('dns_cache_seconds', 300)
+        self.keepalive_seconds = config.get('keepalive_seconds', 30)
+        self.timeout = config.get('timeout', 60)
+        self.max_body_bytes = config.get('max_body_bytes', 0)
+        self.http2 = config.get('http2', False)
+        self.headers = {'User-Agent': user_agent} if user_agent else {}
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._client = None  # httpx.AsyncClient，仅HTTP/2模式
+
+        self.requests = 0
+        self.bytes = 0
+        self.oversized = 0
+
+    def start(self):
+        """创建连接池，需要在事件循环中调用；已创建时直接返回"""
+        if self._session or self._client:
+            return
+        if self.http2:
+            try:
+                # 延迟导入，只有开启HTTP/2时才需要安装httpx[http2]；未安装h2时AsyncClient自己抛出ImportError
+                import httpx
+                self._client = httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=self.limit, keepalive_expiry=self.keepalive_seconds),
+                    timeout=self.timeout,
+                    follow_redirects=True
+                )
+                logger.info("HTTP抓取服务使用HTTP/2")
+                return
+            except ImportError:
+                logger.warning("未安装httpx[http2]，HTTP抓取服务改用HTTP/1.1")
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_seconds,
+            keepalive_timeout=self.keepalive_seconds
+        )
+        # auto_decompress: 按Content-Encoding流式解压，读取到的都是解压后的正文
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            auto_decompress=True
+        )
+
+    def session(self, headers: Optional[dict] = None) -> FetchSession:
+        """返回带默认请求头的会话"""
+        return FetchSession(self, headers)
+
+    async def open(self, method: str, url: str, kwargs: dict):
+        """发送请求，返回(响应, 归还连接的协程函数)"""
+        self.start()
+        self.requests += 1
+        if self._client is not None:
+            return await self._open_http2(method, url, kwargs)
+        request = self._session.request(method, url, **kwargs)
+        response = await request.__aenter__()
+        length = response.content_length
+        if self.max_body_bytes and length and length > self.max_body_bytes:
+            await request.__aexit__(None, None, None)
+            self.oversized += 1
+            raise _body_too_large()(f"响应正文超过{self.max_body_bytes}字节: {url}")
+        wrapped = FetchResponse(str(response.url), response.status, response.headers,
+                                response.content.iter_chunked, self.max_body_bytes, self,
+                                method, kwargs.get('headers'))
+
+        async def close():
+            await request.__aexit__(None, None, None)
+
+        return wrapped, close
+
+    async def _open_http2(self, method: str, url: str, kwargs: dict):
+        import aiohttp
+        import httpx
+
+        timeout = kwargs.pop('timeout', None)
+        if isinstance(timeout, aiohttp.ClientTimeout):
+            timeout = timeout.total
+        request_headers = kwargs.pop('headers', None)
+        request = self._client.build_request(method, url, params=kwargs.pop('params', None),
+                                             headers=request_headers, timeout=timeout or self.timeout)
+
+        async def chunks(size: int):
+            # 把httpx的异常转换为aiohttp的异常，调用方只需处理一套异常类型
+            try:
+                async for chunk in response.aiter_bytes(size):
+                    yield chunk
+            except httpx.TimeoutException as e:
+                raise asyncio.TimeoutError(str(e)) from e
+            except httpx.HTTPError as e:
+                raise aiohttp.ClientPayloadError(str(e)) from e
+
+        try:
+            response = await self._client.send(request, stream=True)
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise aiohttp.ClientConnectionError(str(e)) from e
+        length = int(response.headers.get('Content-Length') or 0)
+        if self.max_body_bytes and length > self.max_body_bytes:
+            await response.aclose()
+            self.oversized += 1
+            raise _body_too_large()(f"响应正文超过{self.max_body_bytes}字节: {url}")
+        headers = [(name, value) for name, value in response.headers.multi_items()]
+        return FetchResponse(str(response.url), response.status_code, headers, chunks,
+                             self.max_body_bytes, self, method, request_headers), response.aclose
+
+    def snapshot(self) -> dict:
+        """抓取统计，写入运行报告"""
+        return {
+            'protocol': 'http2' if self._client is not None else 'http1.1',
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'oversized': self.oversized
+        }
+
+    async def close(self):
+        """关闭连接池"""
+        if self._session:
+            await self._session.close()
+            self._session = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+
+_fetcher: Optional[Fetcher] = None
+
+
+def get_fetcher() -> Fetcher:
+    """进程内共享的抓取服务，第一次调用时按FETCHER_CONFIG创建"""
+    global _fetcher
+    if _fetcher is None:
+        from config.base_config import BaseConfig
+        _fetcher = Fetcher(getattr(BaseConfig, 'FETCHER_CONFIG', {}), BaseConfig.BROWSER_CONFIG['user_agent'])
+    return _fetcher
+
+
+def fetch_session(headers: Optional[dict] = None) -> FetchSession:
+    """共享连接池上的会话，headers为该会话额外的默认请求头"""
+    return get_fetcher().session(headers)
+
+
+async def close_fetcher() -> Optional[dict]:
+    """关闭共享连接池，返回关闭前的抓取统计；之后的请求会重新创建连接池"""
+    global _fetcher
+    if _fetcher is None:
+        return None
+    stats = _fetcher.snapshot()
+    await _fetcher.close()
+    _fetcher = None
+    return stats
@@ -0,0 +1,466 @@
+"""磁盘HTTP响应缓存
+
+调试时重复运行和重复的关键词搜索会一遍遍下载相同的列表页和文章页。响应按规范化URL加
+影响内容的请求头(Accept等)缓存到SQLite中，正文用zlib压缩；按URL类别设置有效期
+(列表页、订阅、接口较短，文章页较长)，总大小超过预算时按最近访问时间(LRU)淘汰。
+
+浏览器和aiohttp两条路径共用一个缓存：
+    - Playwright: route(context) 在浏览器上下文上拦截文档、脚本和接口(xhr/fetch)请求，命中时直接返回缓存内容
+    - aiohttp: wrap(session) 返回接口相同的会话，get请求先查缓存；未命中时正文仍边下载边交给调用方，
+      同时保留一份(不超过max_entry_bytes)用于写入缓存，流式解析和正文大小上限不受影响
+
+模式:
+    read_write  命中且未过期时使用缓存，否则请求并写入缓存
+    refresh     总是请求并刷新缓存
+    cache_only  只读缓存且忽略有效期，未命中时文档返回504、其余请求直接中止，运行完全离线且结果可重复
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import zlib
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from tools.concurrency import SYNTHETIC_HEADER, is_challenge
+from tools.fetcher import raise_for_status
+from tools.metrics import HTTP_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ('off', 'read_write', 'refresh', 'cache_only')
+
+# 不参与缓存键的查询参数
+_TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|mc_cid|mc_eid)$')
+
+# 浏览器中会影响页面内容的请求类型，写入和读取缓存；图片、样式等其余类型不缓存
+_BROWSER_RESOURCE_TYPES = {'document', 'script', 'xhr', 'fetch'}
+
+# 正文已解压，返回缓存内容时不能再带这些头
+_HOP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    url_class TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """规范化URL：协议和主机小写，去掉默认端口、片段和跟踪参数，查询参数排序"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not (scheme == 'http' and parts.port == 80) and not (scheme == 'https' and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _TRACKING_PARAMS.match(key))
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+class CacheEntry:
+    """缓存的响应"""
+
+    __slots__ = ('url', 'status', 'headers', 'body')
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class ResponseCache:
+    """磁盘响应缓存"""
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, ttl_seconds: Optional[dict] = None,
+                 mode: str = 'read_write', class_patterns: Optional[Dict[str, Iterable[str]]] = None,
+                 listing_urls: Iterable[str] = (), key_headers: Iterable[str] = ('Accept', 'Accept-Language'),
+                 max_entry_bytes: int = 16 * 1024 * 1024):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"未知的缓存模式: {mode}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl_seconds = ttl_seconds or {}
+        self.mode = mode
+        self.class_patterns = [
+            (url_class, re.compile(pattern))
+            for url_class, patterns in (class_patterns or {}).items() for pattern in patterns
+        ]
+        self.listing_urls = {normalize_url(url) for url in listing_urls if url}
+        self.key_headers = tuple(header.lower() for header in key_headers)
+        self.stats: Dict[str, int] = defaultdict(int)
+        self.class_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def url_class(self, url: str) -> str:
+        """URL类别，决定缓存有效期"""
+        normalized = normalize_url(url)
+        if normalized in self.listing_urls:
+            return 'listing'
+        for url_class, pattern in self.class_patterns:
+            if pattern.search(normalized):
+                return url_class
+        return 'article'
+
+    def key(self, url: str, headers: Optional[dict] = None, method: str = 'GET') -> str:
+        selected = []
+        for name, value in (headers or {}).items():
+            if name.lower() in self.key_headers:
+                selected.append(f"{name.lower()}:{value}")
+        raw = '\n'.join([method.upper(), normalize_url(url)] + sorted(selected))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, url_class: str, result: str):
+        self.stats[result] += 1
+        self.class_stats[url_class][result] += 1
+        HTTP_CACHE_REQUESTS.labels(url_class, result).inc()
+
+    def get(self, url: str, headers: Optional[dict] = None, method: str = 'GET') -> Optional[CacheEntry]:
+        """返回可用的缓存响应；cache_only模式下忽略有效期"""
+        url_class = self.url_class(url)
+        if self.mode == 'refresh':
+            self._count(url_class, 'bypass')
+            return None
+        key = self.key(url, headers, method)
+        row = self.conn.execute(
+            'SELECT status, headers, body, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self._count(url_class, 'miss')
+            return None
+        status, raw_headers, body, expires_at = row
+        now = time.time()
+        if expires_at < now and self.mode != 'cache_only':
+            self._count(url_class, 'expired')
+            return None
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            logger.warning(f"缓存内容损坏，已丢弃: {url}")
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._count(url_class, 'miss')
+            return None
+        self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        self._count(url_class, 'hit')
+        self.stats['bytes_served'] += len(body)
+        return CacheEntry(url, status, json.loads(raw_headers), body)
+
+    def put(self, url: str, status: int, headers, body: bytes, request_headers: Optional[dict] = None,
+            method: str = 'GET') -> bool:
+        """写入缓存，只缓存200响应，不缓存验证页和超过max_entry_bytes的正文"""
+        if self.mode == 'cache_only' or status != 200 or len(body) > self.max_entry_bytes:
+            return False
+        url_class = self.url_class(url)
+        ttl = self.ttl_seconds.get(url_class, self.ttl_seconds.get('default', 3600))
+        if ttl <= 0 or is_challenge(body[:20000].decode('utf-8', errors='ignore')):
+            return False
+        compressed = zlib.compress(body, 6)
+        stored_headers = {name: value for name, value in dict(headers).items() if name.lower() not in _HOP_HEADERS}
+        now = time.time()
+        key = self.key(url, request_headers, method)
+        try:
+            previous = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (key, url, url_class, status, headers, body, size, stored_at, '
+                'expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, url_class, status, json.dumps(stored_headers), compressed, len(compressed),
+                 now, now + ttl, now))
+        except sqlite3.Error as e:
+            logger.error(f"写入响应缓存失败: {url}, 错误: {str(e)}")
+            return False
+        self.total_bytes += len(compressed) - (previous[0] if previous else 0)
+        self.stats['stores'] += 1
+        self.stats['bytes_stored'] += len(compressed)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        return True
+
+    def evict(self):
+        """按最近访问时间淘汰，直到总大小降到预算的90%"""
+        target = self.max_bytes * 0.9
+        # 其他进程可能也写入了缓存，以数据库中的实际大小为准
+        self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        evicted = 0
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                'SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100').fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_bytes <= target:
+                    break
+                self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.total_bytes -= size
+                evicted += 1
+        self.stats['evictions'] += evicted
+        if evicted:
+            logger.info(f"响应缓存淘汰{evicted}条，当前{self.total_bytes / 1024 / 1024:.1f}MB")
+
+    def snapshot(self) -> dict:
+        """缓存统计，写入运行报告"""
+        lookups = self.stats['hit'] + self.stats['miss'] + self.stats['expired']
+        entries = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        return {
+            'mode': self.mode,
+            'entries': entries,
+            'size_bytes': self.total_bytes,
+            'hit_rate': round(self.stats['hit'] / lookups, 3) if lookups else 0.0,
+            **dict(self.stats),
+            'classes': {url_class: dict(counts) for url_class, counts in sorted(self.class_stats.items())}
+        }
+
+    async def route(self, target, blocked: Optional[Callable[[str, str], Optional[str]]] = None):
+        """在Playwright浏览器上下文或页面上缓存文档、脚本和接口请求
+
+        Args:
+            target: 浏览器上下文或页面
+            blocked: 请求拦截策略的判断函数(资源类型, URL)，返回真值的请求交给拦截策略处理，不缓存
+        """
+        async def handler(route):
+            request = route.request
+            if blocked and blocked(request.resource_type, request.url):
+                await route.fallback()
+                return
+            if request.resource_type not in _BROWSER_RESOURCE_TYPES or request.method != 'GET':
+                if self.mode == 'cache_only':
+                    # 不缓存的请求在离线模式下直接中止，保证运行不访问网络
+                    await route.abort()
+                else:
+                    await route.fallback()
+                return
+            entry = self.get(request.url, request.headers)
+            if entry is not None:
+                await route.fulfill(status=entry.status, headers=entry.headers, body=entry.body)
+                return
+            if self.mode == 'cache_only':
+                if request.resource_type == 'document':
+                    await route.fulfill(status=504, headers={SYNTHETIC_HEADER: 'cache-miss'}, body='')
+                else:
+                    await route.abort()
+                return
+            response = await route.fetch()
+            body = await response.body()
+            self.put(request.url, response.status, response.headers, body, request.headers)
+            await route.fulfill(response=response, body=body)
+
+        await target.route('**/*', handler)
+
+    def wrap(self, session) -> 'CachingSession':
+        """包装aiohttp会话"""
+        if isinstance(session, CachingSession):
+            return session
+        return CachingSession(session, self)
+
+    def close(self):
+        self.conn.close()
+
+
+class _CachedContent:
+    """模拟aiohttp的StreamReader，按块读取缓存内容"""
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def iter_chunked(self, size: int):
+        for start in range(0, len(self._body), size):
+            yield self._body[start:start + size]
+
+    async def read(self, n: int = -1) -> bytes:
+        body, self._body = (self._body, b'') if n < 0 else (self._body[:n], self._body[n:])
+        return body
+
+
+class _TeeContent:
+    """转发上游响应的正文块，同时保留一份；完整读完且未超过上限时交给on_complete写入缓存
+
+    调用方提前停止读取(如只需要前几条)或正文超过上限时不写入缓存。
+    """
+
+    def __init__(self, content, limit: int, on_complete):
+        self._content = content
+        self._limit = limit
+        self._on_complete = on_complete
+        self._parts: Optional[list] = []
+        self._size = 0
+
+    async def iter_chunked(self, size: int):
+        async for chunk in self._content.iter_chunked(size):
+            if self._parts is not None:
+                self._size += len(chunk)
+                if self._size > self._limit:
+                    self._parts = None
+                else:
+                    self._parts.append(chunk)
+            yield chunk
+        if self._parts is not None:
+            self._on_complete(b''.join(self._parts))
+            self._parts = None
+
+    async def read(self, n: int = -1) -> bytes:
+        parts = []
+        async for chunk in self.iter_chunked(65536):
+            parts.append(chunk)
+        return b''.join(parts)
+
+
+class CachedResponse:
+    """与aiohttp.ClientResponse用法相同的响应
+
+    命中缓存时正文来自缓存；未命中时content是上游响应的正文流，读取时才下载。
+    """
+
+    def __init__(self, url: str, status: int, headers, body: Optional[bytes], from_cache: bool,
+                 request_headers: Optional[dict] = None, content=None):
+        from multidict import CIMultiDict
+
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDict(headers)
+        self.from_cache = from_cache
+        self.request_headers = request_headers or {}
+        self._body = body
+        self.content = content if content is not None else _CachedContent(body)
+
+    async def read(self) -> bytes:
+        if self._body is None:
+            self._body = await self.content.read()
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None, errors: str = 'strict') -> str:
+        return (await self.read()).decode(encoding or 'utf-8', errors)
+
+    async def json(self, content_type: Optional[str] = 'application/json', **kwargs):
+        return json.loads(await self.read())
+
+    def raise_for_status(self):
+        raise_for_status(self, 'GET', self.request_headers)
+
+    def release(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _CachedRequest:
+    """session.get()的返回值，用作async with；未命中缓存时退出才关闭上游响应"""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._upstream = None
+
+    async def __aenter__(self) -> CachedResponse:
+        response, self._upstream = await self._coro
+        return response
+
+    async def __aexit__(self, *exc):
+        if self._upstream is not None:
+            await self._upstream.__aexit__(*exc)
+        return False
+
+
+class CachingSession:
+    """带响应缓存的aiohttp会话，未覆盖的属性和方法直接转发给原会话"""
+
+    def __init__(self, session, cache: ResponseCache):
+        self._session = session
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def get(self, url, params=None, headers=None, **kwargs) -> _CachedRequest:
+        return _CachedRequest(self._open(str(url), params, headers, kwargs))
+
+    async def _open(self, url: str, params, headers, kwargs):
+        """返回(响应, 上游请求)，命中缓存时上游请求为None"""
+        if params:
+            separator = '&' if '?' in url else '?'
+            url = f"{url}{separator}{urlencode(params if isinstance(params, (list, tuple)) else list(params.items()))}"
+        request_headers = dict(self._session.headers)
+        request_headers.update(headers or {})
+        entry = self.cache.get(url, request_headers)
+        if entry is not None:
+            return CachedResponse(url, entry.status, entry.headers, entry.body, True, request_headers), None
+        if self.cache.mode == 'cache_only':
+            return CachedResponse(url, 504, {SYNTHETIC_HEADER: 'cache-miss'}, b'', True, request_headers), None
+        upstream = self._session.get(url, headers=headers, **kwargs)
+        response = await upstream.__aenter__()
+        status, response_headers = response.status, response.headers
+        content = response.content
+        if status == 200:
+            def store(body: bytes):
+                self.cache.put(url, status, response_headers, body, request_headers)
+            content = _TeeContent(content, self.cache.max_entry_bytes, store)
+        headers_out = {name: value for name, value in response_headers.items() if name.lower() not in _HOP_HEADERS}
+        return CachedResponse(url, status, headers_out, None, False, request_headers, content), upstream
+
+
+_cache: Optional[ResponseCache] = None
+_configured = False
+
+
+def configure_cache(config: dict, mode: Optional[str] = None) -> Optional[ResponseCache]:
+    """根据HTTP_CACHE_CONFIG创建进程内共享的缓存，mode可覆盖配置(如命令行--cache-only)"""
+    global _cache, _configured
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+    _configured = True
+    mode = mode or (config.get('mode', 'read_write') if config.get('enabled') else 'off')
+    if mode == 'off':
+        return None
+    from config.base_config import BaseConfig
+    listing_urls = []
+    for site_config in BaseConfig.NEWS_SITES.values():
+        listing_urls += [site_config.get(key) for key in ('url', 'base_url', 'latest_url')]
+    _cache = ResponseCache(
+        config.get('path', './data/http_cache.db'),
+        config.get('max_bytes', 512 * 1024 * 1024),
+        config.get('ttl_seconds'),
+        mode,
+        config.get('class_patterns'),
+        listing_urls,
+        config.get('key_headers', ('Accept', 'Accept-Language')),
+        config.get('max_entry_bytes', 16 * 1024 * 1024)
+    )
+    logger.info(f"响应缓存已开启: {_cache.path}, 模式: {mode}")
+    return _cache
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """进程内共享的缓存，未开启时返回None"""
+    if not _configured:
+        from config.base_config import BaseConfig
+        configure_cache(getattr(BaseConfig, 'HTTP_CACHE_CONFIG', {}))
+    return _cache
+
+
+def cached_session(session):
+    """开启缓存时返回带缓存的会话，否则原样返回"""
+    cache = get_cache()
+    return cache.wrap(session) if cache else session
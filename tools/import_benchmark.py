@@ -0,0 +1,68 @@
+"""启动耗时基准测试
+
+在独立的子进程中测量各入口的导入耗时以及加载了哪些重量级依赖，
+用于确认短时的定时调用不会为用不到的可选依赖付出启动成本。
+
+用法: python -m tools.import_benchmark [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# 需要关注的重量级依赖
+HEAVY_MODULES = ['playwright', 'bs4', 'aiohttp', 'apscheduler', 'mysql']
+
+# 测量目标: (名称, 导入语句)
+TARGETS = [
+    ('main', 'import main'),
+    ('main+uniteai', "import main; from news_sites import get_crawler_class; get_crawler_class('uniteai')"),
+    ('main+howtogeek', "import main; from news_sites import get_crawler_class; get_crawler_class('howtogeek')"),
+    ('main+marktechpost', "import main; from news_sites import get_crawler_class; get_crawler_class('marktechpost')"),
+    ('store(json)', "from store import get_store_class; get_store_class('json')"),
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy, 'modules': len(sys.modules)}}))
+"""
+
+
+def measure(statement: str, repeat: int, cwd: str) -> dict:
+    """在子进程中多次测量导入耗时，取中位数"""
+    timings = []
+    result = {}
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        timings.append(result['seconds'])
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 1),
+        'min_ms': round(min(timings) * 1000, 1),
+        'heavy': result['heavy'],
+        'modules': result['modules']
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--repeat', type=int, default=5, help='每个目标测量次数')
+    args = parser.parse_args()
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print(f"{'target':<20}{'median ms':>11}{'min ms':>9}{'modules':>9}  heavy deps")
+    for name, statement in TARGETS:
+        try:
+            r = measure(statement, args.repeat, project_root)
+            print(f"{name:<20}{r['median_ms']:>11}{r['min_ms']:>9}{r['modules']:>9}  {', '.join(r['heavy']) or '-'}")
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<20}  导入失败: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
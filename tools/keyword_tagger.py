@@ -0,0 +1,121 @@
+"""多模式关键词打标签
+
+把所有关键词编译为Aho–Corasick自动机，对标题和正文只做一次线性扫描即可找出
+全部命中的关键词。匹配前统一casefold，并要求命中位置两侧不是字母数字，
+避免'ai'命中'said'之类的情况。
+"""
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from model.news_article import NewsArticle
+
+logger = logging.getLogger(__name__)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class KeywordAutomaton:
+    """Aho–Corasick自动机"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]  # 状态 -> [(关键词长度, 原始关键词)]
+        self.keywords: List[str] = []
+
+        seen = set()
+        for keyword in keywords:
+            folded = keyword.strip().casefold()
+            if not folded or folded in seen:
+                continue
+            seen.add(folded)
+            self.keywords.append(keyword.strip())
+            self._add(folded, keyword.strip())
+        self._build()
+
+    def _add(self, folded: str, keyword: str):
+        state = 0
+        for char in folded:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(folded), keyword))
+
+    def _build(self):
+        """按层次遍历计算失败指针，并合并失败链上的输出"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                # 第一层状态的失败指针指向根
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str):
+        """逐个返回(起始位置, 结束位置, 关键词)，只包含满足单词边界的命中"""
+        text = text.casefold()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        length = len(text)
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = index + 1
+            if end < length and _is_word_char(text[end]):
+                continue
+            for size, keyword in output[state]:
+                start = end - size
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                yield start, end, keyword
+
+    def match(self, text: str) -> List[str]:
+        """返回命中的关键词，按首次出现的顺序去重"""
+        found = {}
+        for _, _, keyword in self.iter_matches(text):
+            found.setdefault(keyword, None)
+        return list(found)
+
+
+class KeywordTagger:
+    """存储钩子：保存前用全部关键词为文章打标签"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.automaton = KeywordAutomaton(keywords)
+
+    @classmethod
+    def from_config(cls, config) -> 'KeywordTagger':
+        """使用各站点search_keywords的并集以及TAGGING_CONFIG中的额外关键词"""
+        keywords = []
+        for site_config in config.NEWS_SITES.values():
+            keywords.extend(site_config.get('search_keywords', []))
+        keywords.extend(config.TAGGING_CONFIG.get('extra_keywords', []))
+        return cls(keywords)
+
+    def tag(self, article: NewsArticle) -> List[str]:
+        """为文章打标签，保留已有标签"""
+        tags = self.automaton.match(f"{article.title}\n{article.content}")
+        for tag in article.tags:
+            if tag not in tags:
+                tags.append(tag)
+        article.tags = tags
+        return tags
+
+    def before_save(self, article: NewsArticle):
+        self.tag(article)
@@ -0,0 +1,242 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认直方图分桶(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """指标基类，按标签值保存子指标"""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # 无标签指标直接创建唯一的子指标，保证接口中始终可见
+            self.labels()
+
+    def labels(self, *values):
+        """获取指定标签值的子指标"""
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际传入 {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return '\n'.join(lines)
+
+    def _render_child(self, key, child):
+        raise NotImplementedError
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_to_current_time(self):
+        self.value = time.time()
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        """无标签指标的快捷方法"""
+        self.labels().inc(amount)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """可增可减的瞬时值"""
+
+    type_name = 'gauge'
+
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        """无标签指标的快捷方法"""
+        self.labels().observe(value)
+
+    def _render_child(self, key, child):
+        cumulative = 0
+        for bound, count in zip(self.buckets, child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """生成Prometheus文本格式"""
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+registry = Registry()
+
+PAGES_FETCHED = registry.register(Counter(
+    'crawler_pages_fetched_total', '已获取的页面数', ['site']))
+BYTES_DOWNLOADED = registry.register(Counter(
+    'crawler_bytes_downloaded_total', '已下载的页面字节数', ['site']))
+STAGE_SECONDS = registry.register(Histogram(
+    'crawler_stage_seconds', '各阶段耗时(解析、存储、导航等)', ['stage', 'site']))
+QUEUE_DEPTH = registry.register(Gauge(
+    'crawler_queue_depth', '待处理的文章链接数', ['site']))
+BROWSER_CONTEXTS = registry.register(Gauge(
+    'crawler_browser_contexts', '当前存活的浏览器上下文数'))
+JOB_SECONDS = registry.register(Histogram(
+    'crawler_job_duration_seconds', '定时任务耗时', ['job'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)))
+JOB_FAILURES = registry.register(Counter(
+    'crawler_job_failures_total', '定时任务失败次数', ['job']))
+BLOCKED_REQUESTS = registry.register(Counter(
+    'crawler_blocked_requests_total', '被拦截的浏览器请求数', ['site', 'reason']))
+BLOCKED_BYTES = registry.register(Counter(
+    'crawler_blocked_bytes_estimated_total', '拦截请求预计节省的字节数', ['site']))
+LAST_SUCCESS = registry.register(Gauge(
+    'crawler_last_success_timestamp_seconds', '各站点或任务最近一次成功的时间戳', ['site']))
+CONCURRENCY_LIMIT = registry.register(Gauge(
+    'crawler_concurrency_limit', '各主机当前的自适应并发上限', ['host']))
+FETCH_BACKOFFS = registry.register(Counter(
+    'crawler_fetch_backoffs_total', '各主机请求失败次数(限流、超时、验证页等)', ['host', 'reason']))
+BROWSER_RSS = registry.register(Gauge(
+    'crawler_browser_rss_bytes', '浏览器进程树(驱动及Chromium)最近一次测量的常驻内存', ['site']))
+BROWSER_RECYCLES = registry.register(Counter(
+    'crawler_browser_recycles_total', '浏览器上下文更换和浏览器重启次数', ['site', 'action']))
+HTTP_CACHE_REQUESTS = registry.register(Counter(
+    'crawler_http_cache_requests_total', '响应缓存查询次数(hit、miss、expired、bypass)', ['url_class', 'result']))
+
+
+def record_page(site: str, html: str):
+    """记录一次页面获取"""
+    PAGES_FETCHED.labels(site).inc()
+    BYTES_DOWNLOADED.labels(site).inc(len(html.encode('utf-8')))
+
+
+class MetricsServer:
+    """在当前事件循环中提供/metrics接口"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9108, metrics_registry: Registry = registry):
+        self.host = host
+        self.port = port
+        self.registry = metrics_registry
+        self._runner = None
+
+    async def start(self):
+        # 延迟导入aiohttp，只有开启指标接口时才需要
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"指标接口已启动: http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
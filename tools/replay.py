@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+def load_index(index_file: str) -> Dict[str, dict]:
+    """加载录制索引文件"""
+    if not os.path.exists(index_file):
+        return {}
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"加载录制索引失败: {index_file}, 错误: {str(e)}")
+        return {}
+
+
+def load_recordings(directory: str) -> Dict[str, Dict[str, dict]]:
+    """加载所有站点的录制索引
+
+    Returns:
+        {站点名: {原始URL: 索引项}}
+    """
+    recordings = {}
+    if not os.path.isdir(directory):
+        return recordings
+    for site in sorted(os.listdir(directory)):
+        index = load_index(os.path.join(directory, site, 'index.json'))
+        if index:
+            recordings[site] = index
+    return recordings
+
+
+class PageRecorder:
+    """页面录制器，按站点保存列表页和文章页的HTML"""
+
+    def __init__(self, site: str, directory: str):
+        self.site = site
+        self.site_dir = os.path.join(directory, site)
+        self.index_file = os.path.join(self.site_dir, 'index.json')
+        os.makedirs(self.site_dir, exist_ok=True)
+        self.index = load_index(self.index_file)
+
+    def record(self, url: str, html: str, kind: str):
+        """保存一个页面
+
+        Args:
+            url: 页面原始URL
+            html: 页面HTML内容
+            kind: 页面类型，listing(列表页/搜索页)或article(文章页)
+        """
+        try:
+            name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + '.html'
+            relative_path = f"{kind}/{name}"
+            os.makedirs(os.path.join(self.site_dir, kind), exist_ok=True)
+            with open(os.path.join(self.site_dir, relative_path), 'w', encoding='utf-8') as f:
+                f.write(html)
+
+            self.index[url] = {
+                'kind': kind,
+                'file': relative_path,
+                'length': len(html),
+                'recorded_at': datetime.now().isoformat()
+            }
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=2)
+            logger.info(f"已录制{kind}页面: {url}")
+        except Exception as e:
+            logger.error(f"录制页面失败: {url}, 错误: {str(e)}")
+
+
+class ReplayServer:
+    """本地回放服务器，按原始URL返回录制的HTML，可配置延迟"""
+
+    def __init__(self, directory: str, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0):
+        self.directory = directory
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.recordings = load_recordings(directory)
+        self._pages: Dict[str, str] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+        # 建立URL到文件路径的映射
+        for site, index in self.recordings.items():
+            for url, entry in index.items():
+                self._pages[url] = os.path.join(directory, site, entry['file'])
+
+    async def start(self):
+        """启动服务器"""
+        app = web.Application()
+        app.router.add_get('/replay', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # 端口为0时使用系统分配的实际端口
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"回放服务器已启动: http://{self.host}:{self.port}，共{len(self._pages)}个页面，延迟{self.latency_ms}ms")
+
+    async def stop(self):
+        """停止服务器"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def url_for(self, url: str) -> str:
+        """获取原始URL在回放服务器上的地址"""
+        return f"http://{self.host}:{self.port}/replay?url={quote(url, safe='')}"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        url = request.query.get('url', '')
+        path = self._pages.get(url)
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        if not path or not os.path.exists(path):
+            return web.Response(status=404, text=f"未录制的页面: {url}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return web.Response(text=f.read(), content_type='text/html')
+
+    async def route_page(self, page, session):
+        """让Playwright页面的文档请求从回放服务器获取，其余请求全部拦截"""
+        async def handler(route):
+            request = route.request
+            if request.resource_type != 'document':
+                await route.abort()
+                return
+            async with session.get(self.url_for(request.url)) as response:
+                if response.status != 200:
+                    await route.abort()
+                    return
+                body = await response.text()
+            await route.fulfill(status=200, content_type='text/html', body=body)
+
+        await page.route('**/*', handler)
+
+
+class ReplayPage:
+    """Playwright Page的最小替身，从回放服务器读取HTML
+
+    只实现客户端解析逻辑用到的方法，使基准测试无需启动浏览器。
+    """
+
+    def __init__(self, server: ReplayServer, session):
+        self.server = server
+        self.session = session
+        self.url = 'about:blank'
+        self._html = ''
+        self.pages_fetched = 0
+        self.bytes_fetched = 0
+        self.fetch_seconds = 0.0
+
+    async def goto(self, url: str, **kwargs):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        async with self.session.get(self.server.url_for(url)) as response:
+            self._html = await response.text() if response.status == 200 else ''
+        self.fetch_seconds += loop.time() - start
+        self.pages_fetched += 1
+        self.bytes_fetched += len(self._html)
+        self.url = url
+
+    async def wait_for_load_state(self, *args, **kwargs):
+        pass
+
+    async def set_extra_http_headers(self, headers):
+        pass
+
+    async def content(self) -> str:
+        return self._html
+
+    async def title(self) -> str:
+        match = re.search(r'<title[^>]*>(.*?)</title>', self._html, re.S | re.I)
+        return match.group(1).strip() if match else ''
+
+    async def evaluate(self, script, *args):
+        return []
+
+
+async def serve(directory: str, host: str, port: int, latency_ms: float):
+    """以独立进程方式运行回放服务器"""
+    server = ReplayServer(directory, host, port, latency_ms)
+    await server.start()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    from config.base_config import BaseConfig
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    replay_config = BaseConfig.REPLAY_CONFIG
+    parser = argparse.ArgumentParser(description='录制页面回放服务器')
+    parser.add_argument('--host', default=replay_config['host'])
+    parser.add_argument('--port', type=int, default=replay_config['port'])
+    parser.add_argument('--latency-ms', type=float, default=replay_config['latency_ms'], help='每个页面的模拟延迟(毫秒)')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(replay_config['recordings_directory'], args.host, args.port, args.latency_ms))
+    except KeyboardInterrupt:
+        logger.info("回放服务器已停止")
@@ -0,0 +1,144 @@
+"""爬取运行日志(断点续爬)
+
+每个站点、每个关键词发现的链接、已获取和已保存的文章URL逐条追加写入 <directory>/current.jsonl，
+每写一条就flush。进程中途退出后用 `python main.py --resume` 继续：已完成的站点和关键词直接跳过，
+进行中的关键词使用日志里已发现的链接，只处理尚未保存的文章，不再重新翻页。
+整次运行正常结束后日志改名为 last.jsonl，下次运行重新开始。
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'current.jsonl'
+LAST_FILE = 'last.jsonl'
+
+
+class SiteJournal:
+    """单个站点在本次运行中的进度"""
+
+    def __init__(self, journal: 'RunJournal', site: str):
+        self.journal = journal
+        self.site = site
+        self.discovered: Dict[str, List[str]] = {}
+        self.fetched: Set[str] = set()
+        self.saved: Set[str] = set()
+        self.done_keywords: Set[str] = set()
+        self.finished = False
+
+    def apply(self, event: dict):
+        """把一条日志事件应用到进度上"""
+        kind = event.get('type')
+        keyword = event.get('keyword') or ''
+        if kind == 'discovered':
+            links = self.discovered.setdefault(keyword, [])
+            known = set(links)
+            links.extend(url for url in event.get('urls', []) if url not in known)
+        elif kind == 'fetched' and event.get('ok'):
+            self.fetched.add(event['url'])
+        elif kind == 'saved':
+            self.saved.add(event['url'])
+        elif kind == 'keyword_done':
+            self.done_keywords.add(keyword)
+        elif kind == 'site_finished':
+            self.finished = True
+
+    def _record(self, kind: str, **fields):
+        event = {'type': kind, 'site': self.site, **fields}
+        self.apply(event)
+        self.journal.write(event)
+
+    def pending_links(self, keyword: Optional[str] = None) -> Optional[List[str]]:
+        """关键词上次已发现但尚未保存的链接，没有记录时返回None"""
+        links = self.discovered.get(keyword or '')
+        if links is None:
+            return None
+        return [url for url in links if url not in self.saved]
+
+    def record_discovered(self, keyword: Optional[str], urls: List[str]):
+        new = [url for url in urls if url not in set(self.discovered.get(keyword or '', []))]
+        if new:
+            self._record('discovered', keyword=keyword or '', urls=new)
+
+    def record_fetched(self, url: str, ok: bool):
+        self._record('fetched', url=url, ok=ok)
+
+    def record_saved(self, url: str):
+        self._record('saved', url=url)
+
+    def keyword_done(self, keyword: Optional[str] = None):
+        self._record('keyword_done', keyword=keyword or '')
+
+    def is_done(self, keyword: Optional[str] = None) -> bool:
+        return (keyword or '') in self.done_keywords
+
+    def finish(self):
+        self._record('site_finished')
+
+
+class RunJournal:
+    """一次运行的日志，包含所有站点"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, CURRENT_FILE)
+        self.sites: Dict[str, SiteJournal] = {}
+        self.resumed = False
+        self._file = None
+
+    @classmethod
+    def start(cls, directory: str, resume: bool = False) -> 'RunJournal':
+        """开始一次运行；resume为True且存在未完成的日志时从断点继续"""
+        journal = cls(directory)
+        os.makedirs(directory, exist_ok=True)
+        if resume and os.path.exists(journal.path):
+            journal._load()
+            journal.resumed = True
+            logger.info(f"从运行日志恢复: {journal.path}，" + ', '.join(
+                f"{site} 已保存{len(progress.saved)}篇" for site, progress in journal.sites.items()))
+        elif resume:
+            logger.warning("没有可恢复的运行日志，重新开始")
+        journal._file = open(journal.path, 'a' if journal.resumed else 'w', encoding='utf-8')
+        journal.write({'type': 'resumed' if journal.resumed else 'run_started'})
+        return journal
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 进程退出时最后一行可能没有写完整
+                    continue
+                if event.get('site'):
+                    self.site(event['site']).apply(event)
+
+    def site(self, site: str) -> SiteJournal:
+        if site not in self.sites:
+            self.sites[site] = SiteJournal(self, site)
+        return self.sites[site]
+
+    def write(self, event: dict):
+        """追加一条事件并立即写入磁盘"""
+        if not self._file:
+            return
+        event['at'] = datetime.now().isoformat(timespec='seconds')
+        try:
+            self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._file.flush()
+        except Exception as e:
+            logger.error(f"写入运行日志失败: {str(e)}")
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """整次运行正常结束，日志改名为last.jsonl"""
+        self.write({'type': 'run_finished'})
+        self.close()
+        os.replace(self.path, os.path.join(self.directory, LAST_FILE))
@@ -0,0 +1,203 @@
+"""本地全文索引
+
+基于SQLite FTS5对文章标题和正文建立倒排索引，按BM25排序，支持按来源、关键词和
+发布日期过滤。作为存储钩子使用时，每次save_article成功后增量更新索引。
+
+用法:
+    python -m tools.search_index "deepseek r1" --source uniteai --since 2025-03-01
+    python -m tools.search_index --rebuild
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+
+from model.news_article import NewsArticle
+
+logger = logging.getLogger(__name__)
+
+# BM25列权重：标题命中比正文命中更重要
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+
+def to_match_query(query: str) -> str:
+    """把普通查询转为FTS5语法：每个词加引号，词之间为AND关系"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+class SearchIndex:
+    """文章全文索引"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.init_tables()
+
+    def init_tables(self):
+        """创建文档表和FTS5索引"""
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL UNIQUE,
+                    title TEXT NOT NULL,
+                    source TEXT,
+                    keyword TEXT,
+                    published_at TEXT
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_documents_source ON documents(source)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_documents_keyword ON documents(keyword)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_documents_published ON documents(published_at)")
+            self.connection.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts
+                USING fts5(title, content, tokenize='porter unicode61 remove_diacritics 2')
+            """)
+
+    def add(self, article: NewsArticle, commit: bool = True):
+        """添加或更新一篇文章"""
+        published_at = article.published_date.isoformat() if article.published_date else None
+        row = self.connection.execute("SELECT id FROM documents WHERE url = ?", (article.url,)).fetchone()
+        if row:
+            doc_id = row[0]
+            self.connection.execute(
+                "UPDATE documents SET title = ?, source = ?, keyword = ?, published_at = ? WHERE id = ?",
+                (article.title, article.source, article.keyword, published_at, doc_id)
+            )
+            self.connection.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+        else:
+            doc_id = self.connection.execute(
+                "INSERT INTO documents (url, title, source, keyword, published_at) VALUES (?, ?, ?, ?, ?)",
+                (article.url, article.title, article.source, article.keyword, published_at)
+            ).lastrowid
+        self.connection.execute(
+            "INSERT INTO documents_fts (rowid, title, content) VALUES (?, ?, ?)",
+            (doc_id, article.title, article.content)
+        )
+        if commit:
+            self.connection.commit()
+
+    def after_save(self, article: NewsArticle):
+        """存储钩子：文章保存成功后更新索引"""
+        try:
+            self.add(article)
+        except sqlite3.Error as e:
+            logger.error(f"更新全文索引失败: {article.url}, 错误: {str(e)}")
+
+    def search(self, query: str, source: Optional[str] = None, keyword: Optional[str] = None,
+               since: Optional[date] = None, until: Optional[date] = None,
+               limit: int = 20, raw: bool = False) -> List[dict]:
+        """按BM25相关度查询文章
+
+        Args:
+            query: 查询词，raw为True时按FTS5语法原样使用(支持短语、OR、NEAR等)
+            source: 只返回该来源的文章
+            keyword: 只返回该搜索关键词下的文章
+            since: 发布日期下限(含)
+            until: 发布日期上限(含)
+            limit: 最多返回条数
+        """
+        match = query if raw else to_match_query(query)
+        if not match:
+            return []
+
+        conditions = ["documents_fts MATCH ?"]
+        params = [match]
+        if source:
+            conditions.append("d.source = ?")
+            params.append(source)
+        if keyword:
+            conditions.append("d.keyword = ?")
+            params.append(keyword)
+        if since:
+            conditions.append("d.published_at >= ?")
+            params.append(since.isoformat())
+        if until:
+            conditions.append("d.published_at < ?")
+            params.append((until + timedelta(days=1)).isoformat())
+        params.append(limit)
+
+        rows = self.connection.execute(f"""
+            SELECT d.url, d.title, d.source, d.keyword, d.published_at,
+                   bm25(documents_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS score,
+                   snippet(documents_fts, 1, '[', ']', '...', 12) AS snippet
+            FROM documents_fts
+            JOIN documents d ON d.id = documents_fts.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY score
+            LIMIT ?
+        """, params).fetchall()
+
+        columns = ('url', 'title', 'source', 'keyword', 'published_at', 'score', 'snippet')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def rebuild(self, articles: List[NewsArticle]):
+        """清空并重建索引"""
+        with self.connection:
+            self.connection.execute("DELETE FROM documents")
+            self.connection.execute("DELETE FROM documents_fts")
+        for article in articles:
+            self.add(article, commit=False)
+        self.connection.commit()
+        self.connection.execute("INSERT INTO documents_fts(documents_fts) VALUES ('optimize')")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+if __name__ == "__main__":
+    from config.base_config import BaseConfig
+    from model.codec import from_dict, loads
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    storage_config = BaseConfig.STORAGE_CONFIG
+    parser = argparse.ArgumentParser(description='查询本地文章全文索引')
+    parser.add_argument('query', nargs='?', default='', help='查询词')
+    parser.add_argument('--source', help='按来源过滤，如uniteai')
+    parser.add_argument('--keyword', help='按搜索关键词过滤')
+    parser.add_argument('--since', type=_parse_date, help='发布日期下限，格式YYYY-MM-DD')
+    parser.add_argument('--until', type=_parse_date, help='发布日期上限，格式YYYY-MM-DD')
+    parser.add_argument('--limit', type=int, default=20, help='最多返回条数')
+    parser.add_argument('--raw', action='store_true', help='按FTS5语法解析查询')
+    parser.add_argument('--index', default=storage_config['search_index']['path'], help='索引文件')
+    parser.add_argument('--rebuild', action='store_true', help='根据文章JSON文件重建索引')
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    try:
+        if args.rebuild:
+            with open(storage_config['json_path'], 'rb') as f:
+                records = loads(f.read())
+            index.rebuild([from_dict(NewsArticle, record) for record in records])
+            print(f"已重建索引: {index.count()} 篇文章")
+        if args.query:
+            start = time.perf_counter()
+            results = index.search(args.query, args.source, args.keyword, args.since, args.until,
+                                   args.limit, args.raw)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for result in results:
+                print(f"{result['score']:8.2f}  {(result['published_at'] or '')[:10]}  "
+                      f"[{result['source']}] {result['title']}")
+                print(f"          {result['url']}")
+                print(f"          {result['snippet']}")
+            print(f"共{len(results)}条结果，耗时{elapsed_ms:.1f}ms")
+    finally:
+        index.close()
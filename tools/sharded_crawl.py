@@ -0,0 +1,334 @@
+"""多进程、多机分片爬取
+
+单个事件循环加一个Chromium只能用满一两个核。协调进程把站点、关键词和趋势平台写成任务放入
+任务队列(work_queue)，工作进程各自启动浏览器和页面池领取任务：
+    - 列表任务(listing): 翻页或增量发现得到文章链接，写成文章任务放回队列
+    - 文章任务(article): 一次领取同一站点、同一关键词的一批链接并发抓取
+    - 趋势任务(trend): 抓取单个趋势平台
+默认由工作进程把结果随确认写回队列，协调进程统一保存，存储钩子(去重、全文索引等)只在一个进程中运行；
+使用MySQL等共享存储时可以开启worker_writes，由各工作进程直接通过BaseStore写入(按url upsert，重复投递不会产生重复数据)。
+
+用法:
+    python main.py --workers 4         本机协调进程+4个工作进程，--workers 0 表示按CPU核数
+    python main.py --workers 4 --join  只在本机启动工作进程，加入其他机器上协调进程的Redis队列
+各主机的并发上限按本机进程数均分，吞吐量在达到站点限流前随进程数增长。
+"""
+import asyncio
+import copy
+import logging
+import math
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from model.codec import parse_datetime
+from work_queue import WorkQueue, Task, TASK_ARTICLE, TASK_LISTING, TASK_TREND, get_work_queue
+
+logger = logging.getLogger(__name__)
+
+
+def worker_count(configured: int) -> int:
+    """工作进程数，0表示按CPU核数"""
+    return configured if configured > 0 else max(1, os.cpu_count() or 1)
+
+
+def scaled_concurrency_config(config: dict, workers: int) -> dict:
+    """按进程数均分各主机的并发上限"""
+    scaled = copy.deepcopy(config)
+    targets = [scaled] + list(scaled.get('hosts', {}).values())
+    for options in targets:
+        for key, default in (('initial', 2), ('maximum', 8)):
+            if key in options or options is scaled:
+                options[key] = max(1, math.ceil(options.get(key, default) / workers))
+    return scaled
+
+
+def listing_keywords(site_config: dict) -> List[Optional[str]]:
+    """站点的列表任务：每个搜索关键词一个，无关键词或本地打标签时只有一个常规爬取任务"""
+    keywords = site_config.get('search_keywords', [])
+    if not keywords or site_config.get('local_tagging'):
+        return [None]
+    return list(keywords)
+
+
+def enabled_trend_platforms(config) -> List[str]:
+    """已启用且已实现客户端的趋势平台"""
+    from trend_platforms import TREND_PLATFORM_REGISTRY, get_trend_platform_configs
+    return [
+        platform for platform, platform_config in get_trend_platform_configs(config).items()
+        if platform_config.get('enabled', True) and platform in TREND_PLATFORM_REGISTRY
+    ]
+
+
+class Worker:
+    """工作者：循环领取任务直到队列中没有未完成的任务
+
+    writer为TechTrendCrawler时直接保存结果，否则结果随确认写回队列。
+    """
+
+    def __init__(self, config, worker_id: str, queue: WorkQueue, writer=None):
+        self.config = config
+        self.worker_id = worker_id
+        self.queue = queue
+        self.writer = writer
+        self.batch_size = config.WORK_QUEUE_CONFIG.get('batch_size', 4)
+        self.poll_seconds = config.WORK_QUEUE_CONFIG.get('poll_seconds', 1.0)
+        self.crawlers: Dict[str, object] = {}
+        self._leased: List[int] = []
+        self._current_site = ''
+
+    def crawler(self, site: str):
+        """每个站点一个爬虫实例，浏览器在第一次需要时启动"""
+        if site not in self.crawlers:
+            from news_sites import get_crawler_class
+            crawler = get_crawler_class(site)(self.config.NEWS_SITES[site])
+            crawler.link_sink = self.enqueue_links
+            self.crawlers[site] = crawler
+        return self.crawlers[site]
+
+    async def enqueue_links(self, links: List[str], keyword: Optional[str]):
+        """列表任务发现的链接写成文章任务，同一URL只抓取一次"""
+        site = self._current_site
+        added = self.queue.put_many(TASK_ARTICLE, site, [(keyword, url, None, None) for url in links])
+        logger.info(f"[{self.worker_id}] {site} 关键词 '{keyword or ''}' 新增{added}/{len(links)}个文章任务")
+
+    async def _heartbeat(self):
+        """定期延长已领取任务的租约"""
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            self.queue.extend(self._leased, self.worker_id)
+
+    async def run_listing(self, task: Task) -> list:
+        """执行列表任务，返回接口模式下直接得到的文章"""
+        crawler = self.crawler(task.site)
+        site_config = self.config.NEWS_SITES[task.site]
+        # 每个列表任务只处理一个关键词；本地打标签在文章任务中进行
+        crawler.config = dict(site_config, search_keywords=[task.keyword] if task.keyword else [],
+                              local_tagging=False)
+        since = task.payload.get('since')
+        crawler.since = parse_datetime(since) if since else None
+        crawler.known_urls = self.queue.known_urls(task.site)
+        self._current_site = task.site
+        try:
+            if not crawler.use_api:
+                await crawler.init_browser()
+            return await crawler.crawl()
+        finally:
+            crawler.config = site_config
+
+    async def run_articles(self, tasks: List[Task]) -> list:
+        """一批文章任务，同一站点、同一关键词"""
+        crawler = self.crawler(tasks[0].site)
+        link_sink, crawler.link_sink = crawler.link_sink, None
+        try:
+            await crawler.init_browser()
+            articles = await crawler._process_article_links([task.url for task in tasks], tasks[0].keyword)
+        finally:
+            crawler.link_sink = link_sink
+        keywords = crawler.config.get('search_keywords')
+        if keywords and crawler.config.get('local_tagging'):
+            articles = crawler.filter_by_keywords(articles, keywords)
+        return articles
+
+    async def run_trend(self, task: Task) -> list:
+        from trend_platforms import fetch_trends
+        results = await fetch_trends(self.config, [task.site])
+        return results.get(task.site, [])
+
+    async def complete(self, tasks: List[Task], items: list):
+        """保存或写回结果并确认任务；整批结果挂在第一个任务上"""
+        from model.codec import to_dict
+
+        kind, site = tasks[0].kind, tasks[0].site
+        if self.writer and items:
+            if kind == TASK_TREND:
+                await self.writer.save_platform_trends(site, items)
+            else:
+                for item in items:
+                    await self.writer.save_article_now(site, item)
+            items = []
+        # 抓取失败或内容为空的文章同样确认，与单进程模式一致不再重试
+        self.queue.ack(tasks[0], [to_dict(item) for item in items])
+        for task in tasks[1:]:
+            self.queue.ack(task)
+
+    async def run(self):
+        heartbeat = asyncio.create_task(self._heartbeat())
+        processed = 0
+        try:
+            while True:
+                tasks = self.queue.lease(self.worker_id, self.batch_size)
+                if not tasks:
+                    if self.queue.unfinished() == 0:
+                        break
+                    # 其他工作者的列表任务可能还会产生文章任务
+                    await asyncio.sleep(self.poll_seconds)
+                    continue
+                self._leased = [task.id for task in tasks]
+                try:
+                    if tasks[0].kind == TASK_LISTING:
+                        items = await self.run_listing(tasks[0])
+                    elif tasks[0].kind == TASK_TREND:
+                        items = await self.run_trend(tasks[0])
+                    else:
+                        items = await self.run_articles(tasks)
+                    await self.complete(tasks, items)
+                except Exception as e:
+                    logger.error(f"[{self.worker_id}] 执行任务失败: {tasks}, 错误: {str(e)}")
+                    for task in tasks:
+                        self.queue.nack(task, str(e))
+                    continue
+                finally:
+                    self._leased = []
+                processed += len(tasks)
+        finally:
+            heartbeat.cancel()
+            for crawler in self.crawlers.values():
+                await crawler.close_browser()
+        logger.info(f"[{self.worker_id}] 队列已清空，共处理{processed}个任务")
+
+
+def worker_main(worker_id: str, workers: int, cache_mode: str = 'off'):
+    """工作进程入口，cache_mode与协调进程的响应缓存模式一致(命令行--cache-only不会传到子进程的配置中)"""
+    logging.basicConfig(level=logging.INFO,
+                        format=f'%(asctime)s - {worker_id} - %(name)s - %(levelname)s - %(message)s')
+    from config.base_config import BaseConfig
+    from tools.concurrency import concurrency
+    from tools.fetcher import close_fetcher
+    from tools.http_cache import configure_cache
+    from tools.timing import run_timer
+
+    concurrency.configure(scaled_concurrency_config(BaseConfig.CONCURRENCY_CONFIG, workers))
+    cache = configure_cache(BaseConfig.HTTP_CACHE_CONFIG, cache_mode)
+    config = BaseConfig()
+    queue = get_work_queue(config.WORK_QUEUE_CONFIG)
+    writer = None
+    if config.WORK_QUEUE_CONFIG.get('worker_writes'):
+        from main import TechTrendCrawler
+        writer = TechTrendCrawler()
+
+    async def run():
+        try:
+            await Worker(config, worker_id, queue, writer).run()
+        finally:
+            # 共享连接池绑定在本进程的事件循环上，退出前关闭
+            stats = await close_fetcher()
+            if stats and stats['requests']:
+                run_timer.set_section('fetcher', stats)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+        run_timer.set_section('concurrency', concurrency.snapshot())
+        if cache:
+            run_timer.set_section('http_cache', cache.snapshot())
+        run_timer.write_report(os.path.join(config.METRICS_CONFIG['run_report_directory'], worker_id))
+
+
+class Coordinator:
+    """协调者：写入任务、启动本机工作进程、保存结果"""
+
+    def __init__(self, crawler, workers: int, resume: bool = False):
+        self.crawler = crawler  # TechTrendCrawler，结果通过它的存储保存
+        self.config = crawler.config
+        self.workers = worker_count(workers)
+        self.resume = resume
+        self.queue = get_work_queue(self.config.WORK_QUEUE_CONFIG)
+        self.poll_seconds = self.config.WORK_QUEUE_CONFIG.get('poll_seconds', 1.0)
+
+    async def enqueue(self, sites: List[str], platforms: List[str]):
+        """为每个站点和趋势平台写入任务，已存储的文章写成已完成的文章任务，后续发现时直接跳过"""
+        store = self.crawler.store
+        for site in sites:
+            site_config = self.config.NEWS_SITES[site]
+            since = await store.get_latest_published_date(site)
+            known = await store.get_article_urls(site)
+            self.queue.put_many(TASK_ARTICLE, site, [(None, url, None, None) for url in known], status='done')
+            payload = {'since': since.isoformat() if since else None}
+            added = self.queue.put_many(TASK_LISTING, site, [
+                (keyword, None, payload, None) for keyword in listing_keywords(site_config)
+            ])
+            logger.info(f"{site_config['name']} 新增{added}个列表任务，已存储{len(known)}篇文章")
+        for platform in platforms:
+            self.queue.put(TASK_TREND, platform)
+        if platforms:
+            logger.info(f"新增{len(platforms)}个趋势任务: {', '.join(platforms)}")
+
+    async def save_results(self) -> int:
+        """保存工作者写回的文章和趋势"""
+        from model.codec import from_dict, trend_from_dict
+        from model.news_article import NewsArticle
+
+        saved = 0
+        while True:
+            results = self.queue.take_results()
+            if not results:
+                return saved
+            trends = defaultdict(list)
+            for result_id, kind, site, payload in results:
+                try:
+                    if kind == TASK_TREND:
+                        trends[site].append(trend_from_dict(payload))
+                    elif await self.crawler.save_article_now(site, from_dict(NewsArticle, payload)):
+                        saved += 1
+                except Exception as e:
+                    logger.error(f"保存队列结果失败: {payload.get('url')}, 错误: {str(e)}")
+            for platform, items in trends.items():
+                await self.crawler.save_platform_trends(platform, items)
+            self.queue.mark_consumed([result[0] for result in results])
+
+    async def run(self, sites: List[str], platforms: List[str], join: bool = False):
+        """join为True时只启动本机工作进程，任务由其他机器上的协调进程写入"""
+        if join:
+            if not self.queue.shared:
+                raise ValueError("进程内队列不能被其他机器加入，请使用redis队列")
+        elif self.resume and self.queue.unfinished():
+            logger.info(f"从任务队列继续: {self.queue.stats()}")
+        else:
+            self.queue.reset()
+            await self.enqueue(sites, platforms)
+
+        start = time.perf_counter()
+        saved = 0
+        if not self.queue.shared:
+            # 进程内队列：工作者作为协程运行在当前事件循环中
+            workers = [Worker(self.config, f"worker-{index}", self.queue) for index in range(self.workers)]
+            runs = asyncio.gather(*(worker.run() for worker in workers))
+            while not runs.done():
+                saved += await self.save_results()
+                await asyncio.wait([runs], timeout=self.poll_seconds)
+            await runs
+            saved += await self.save_results()
+        else:
+            from tools.http_cache import get_cache
+            cache = get_cache()
+            cache_mode = cache.mode if cache else 'off'
+            context = multiprocessing.get_context('spawn')
+            processes = [
+                context.Process(target=worker_main, args=(f"worker-{os.getpid()}-{index}", self.workers, cache_mode))
+                for index in range(self.workers)
+            ]
+            for process in processes:
+                process.start()
+            logger.info(f"已启动{self.workers}个工作进程")
+            try:
+                while any(process.is_alive() for process in processes):
+                    if not join:
+                        saved += await self.save_results()
+                    await asyncio.sleep(self.poll_seconds)
+                if not join:
+                    saved += await self.save_results()
+            finally:
+                for process in processes:
+                    if process.is_alive():
+                        process.terminate()
+                    process.join()
+        stats = self.queue.stats()
+        self.queue.close()
+        logger.info(f"分片爬取完成: 保存{saved}篇文章, 耗时{time.perf_counter() - start:.1f}秒, 任务统计: {stats}")
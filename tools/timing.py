@@ -0,0 +1,164 @@
+import json
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from tools.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# 各阶段名称
+STAGE_BROWSER_LAUNCH = 'browser_launch'
+STAGE_NAVIGATION = 'navigation'
+STAGE_WAIT = 'wait'
+STAGE_CONTENT = 'page_content'
+STAGE_PARSE = 'parse'
+STAGE_EXTRACT = 'extract'
+STAGE_DATE_PARSE = 'date_parse'
+STAGE_STORE_WRITE = 'store_write'
+STAGE_TREND_FETCH = 'trend_fetch'
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """计算已排序数据的百分位数(最近秩法)"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class StageTimer:
+    """按阶段统计爬取耗时，每次运行结束后生成JSON报告"""
+
+    def __init__(self, slowest_per_stage: int = 5):
+        self.slowest_per_stage = slowest_per_stage
+        self.reset()
+
+    def reset(self):
+        """清空统计数据，开始新一轮运行"""
+        self.started_at = datetime.now()
+        # (阶段, 站点) -> 耗时列表(秒)
+        self.samples: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        # 阶段 -> [(耗时, 站点, URL)]，只保留最慢的若干条
+        self.slowest: Dict[str, List[Tuple[float, str, str]]] = defaultdict(list)
+        # 站点 -> {'success': n, 'failure': n}
+        self.outcomes: Dict[str, Dict[str, int]] = defaultdict(lambda: {'success': 0, 'failure': 0})
+        self.stage_errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        # 站点 -> {计数名: 值}，如拦截请求数
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # 附加到报告中的其他信息，如各主机的并发上限
+        self.sections: Dict[str, dict] = {}
+
+    def observe(self, stage: str, seconds: float, site: str = '', url: str = '', ok: bool = True):
+        """记录一次阶段耗时"""
+        self.samples[(stage, site)].append(seconds)
+        STAGE_SECONDS.labels(stage, site).observe(seconds)
+        if not ok:
+            self.stage_errors[(stage, site)] += 1
+        slowest = self.slowest[stage]
+        slowest.append((seconds, site, url))
+        if len(slowest) > self.slowest_per_stage * 4:
+            slowest.sort(reverse=True)
+            del slowest[self.slowest_per_stage:]
+
+    @contextmanager
+    def stage(self, stage: str, site: str = '', url: str = ''):
+        """计时上下文，同步和异步代码中均可使用
+
+        示例:
+            with run_timer.stage(STAGE_NAVIGATION, 'howtogeek', url):
+                await page.goto(url)
+        """
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, site, url, ok)
+
+    def record_outcome(self, site: str, success: bool):
+        """记录一篇文章的抓取结果"""
+        self.outcomes[site]['success' if success else 'failure'] += 1
+
+    def add_count(self, name: str, site: str, amount: int = 1):
+        """累加一个计数项"""
+        self.counters[site][name] += amount
+
+    def set_section(self, name: str, data: dict):
+        """在报告中附加一节信息"""
+        self.sections[name] = data
+
+    @staticmethod
+    def _summarize(values: List[float]) -> dict:
+        values = sorted(values)
+        return {
+            'count': len(values),
+            'total_ms': round(sum(values) * 1000, 2),
+            'mean_ms': round(sum(values) * 1000 / len(values), 2),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2)
+        }
+
+    def report(self) -> dict:
+        """生成运行报告"""
+        by_stage: Dict[str, List[float]] = defaultdict(list)
+        sites: Dict[str, dict] = defaultdict(dict)
+        for (stage, site), values in self.samples.items():
+            by_stage[stage].extend(values)
+            summary = self._summarize(values)
+            summary['errors'] = self.stage_errors.get((stage, site), 0)
+            sites[site or 'global'][stage] = summary
+
+        stages = {}
+        for stage, values in by_stage.items():
+            stages[stage] = self._summarize(values)
+            stages[stage]['slowest'] = [
+                {'ms': round(seconds * 1000, 2), 'site': site, 'url': url}
+                for seconds, site, url in sorted(self.slowest[stage], reverse=True)[:self.slowest_per_stage]
+            ]
+
+        finished_at = datetime.now()
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': finished_at.isoformat(),
+            'duration_seconds': round((finished_at - self.started_at).total_seconds(), 3),
+            'stages': stages,
+            'sites': dict(sites),
+            'outcomes': {site: dict(counts) for site, counts in self.outcomes.items()},
+            'counters': {site: dict(counts) for site, counts in self.counters.items()},
+            **self.sections
+        }
+
+    def write_report(self, directory: str) -> Optional[str]:
+        """将运行报告写入JSON文件，返回文件路径"""
+        if not self.samples and not self.outcomes and not self.counters:
+            return None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"run_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json")
+            report = self.report()
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+            for stage, summary in report['stages'].items():
+                logger.info(f"阶段 {stage}: {summary['count']}次, p50={summary['p50_ms']}ms, "
+                            f"p95={summary['p95_ms']}ms, p99={summary['p99_ms']}ms")
+            logger.info(f"运行报告已保存: {path}")
+            return path
+        except Exception as e:
+            logger.error(f"保存运行报告失败: {str(e)}")
+            return None
+
+
+# 进程内共享的计时器
+run_timer = StageTimer()
@@ -0,0 +1,281 @@
+"""趋势历史时间序列
+
+每次抓取的榜单以(快照时间, 排名, 星标数)追加到对应条目的时间序列中，按平台和月份分桶存储：
+<directory>/<platform>/<YYYY-MM>.hist。每列数据先做差分再用zigzag变长整数编码，
+整个分桶再用zlib压缩，每小时一次快照一年下来每个条目只占几十KB。
+历史月份的分桶写完后不再改动，只有当前月份的分桶会被重写。
+
+用法:
+    python -m tools.trend_history gained --hours 24
+    python -m tools.trend_history trajectory https://github.com/owner/repo --period daily
+"""
+import argparse
+import logging
+import os
+import struct
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'THv1'
+COLUMNS = ('times', 'ranks', 'stars')
+
+
+def _append_varint(out: bytearray, delta: int):
+    zigzag = delta * 2 if delta >= 0 else -delta * 2 - 1
+    while zigzag >= 0x80:
+        out.append((zigzag & 0x7f) | 0x80)
+        zigzag >>= 7
+    out.append(zigzag)
+
+
+def encode_column(values: Iterable[int]) -> bytes:
+    """差分 + zigzag + 变长整数编码"""
+    out = bytearray()
+    previous = 0
+    for value in values:
+        _append_varint(out, value - previous)
+        previous = value
+    return bytes(out)
+
+
+def decode_column(data: bytes, count: int) -> array:
+    """encode_column的逆过程"""
+    values = array('q')
+    previous = 0
+    shift = 0
+    zigzag = 0
+    for byte in data:
+        zigzag |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        delta = zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+        previous += delta
+        values.append(previous)
+        zigzag = 0
+        shift = 0
+    if len(values) != count:
+        raise ValueError(f"列长度不一致: 期望{count}，实际{len(values)}")
+    return values
+
+
+def series_key(trend) -> str:
+    """时间序列键：同一仓库在不同周期的榜单上分别记录"""
+    period = getattr(trend, 'period', '')
+    return f"{trend.url}|{period}" if period else trend.url
+
+
+def _month(moment: datetime) -> str:
+    return moment.strftime('%Y-%m')
+
+
+def _months_between(start: datetime, end: datetime) -> List[str]:
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class TrendSeries:
+    """单个条目在一个分桶内的列式数据
+
+    除了解码后的数组，还保留每列的编码结果，追加新数据时只需编码一个差值。
+    """
+
+    __slots__ = ('times', 'ranks', 'stars', 'encoded')
+
+    def __init__(self):
+        self.times = array('q')
+        self.ranks = array('q')
+        self.stars = array('q')
+        self.encoded = {column: bytearray() for column in COLUMNS}
+
+    def load_column(self, column: str, data: bytes, count: int):
+        setattr(self, column, decode_column(data, count))
+        self.encoded[column] = bytearray(data)
+
+    def append(self, timestamp: int, rank: int, stars: int):
+        for column, value in zip(COLUMNS, (timestamp, rank, stars)):
+            values = getattr(self, column)
+            _append_varint(self.encoded[column], value - (values[-1] if values else 0))
+            values.append(value)
+
+    def __len__(self):
+        return len(self.times)
+
+
+class TrendHistory:
+    """按平台和月份分桶的趋势历史"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._buckets: Dict[Tuple[str, str], Dict[str, TrendSeries]] = {}
+
+    def _path(self, platform: str, month: str) -> str:
+        return os.path.join(self.directory, platform, f"{month}.hist")
+
+    def _bucket(self, platform: str, month: str) -> Dict[str, TrendSeries]:
+        key = (platform, month)
+        if key not in self._buckets:
+            self._buckets[key] = self._read(self._path(platform, month))
+        return self._buckets[key]
+
+    def _read(self, path: str) -> Dict[str, TrendSeries]:
+        bucket: Dict[str, TrendSeries] = {}
+        if not os.path.exists(path):
+            return bucket
+        try:
+            with open(path, 'rb') as f:
+                data = zlib.decompress(f.read())
+            if data[:4] != MAGIC:
+                raise ValueError("文件格式不正确")
+            offset = 4
+            while offset < len(data):
+                key_length, count = struct.unpack_from('<HI', data, offset)
+                offset += 6
+                key = data[offset:offset + key_length].decode('utf-8')
+                offset += key_length
+                series = TrendSeries()
+                for column in COLUMNS:
+                    (length,) = struct.unpack_from('<I', data, offset)
+                    offset += 4
+                    series.load_column(column, data[offset:offset + length], count)
+                    offset += length
+                bucket[key] = series
+        except Exception as e:
+            logger.error(f"读取趋势历史失败: {path}, 错误: {str(e)}")
+        return bucket
+
+    def _write(self, platform: str, month: str):
+        path = self._path(platform, month)
+        parts = [MAGIC]
+        for key, series in self._buckets[(platform, month)].items():
+            key_bytes = key.encode('utf-8')
+            parts.append(struct.pack('<HI', len(key_bytes), len(series)))
+            parts.append(key_bytes)
+            for column in COLUMNS:
+                encoded = series.encoded[column]
+                parts.append(struct.pack('<I', len(encoded)))
+                parts.append(encoded)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(b''.join(parts)))
+        os.replace(tmp_path, path)
+
+    def record(self, platform: str, trends: list, at: Optional[datetime] = None) -> int:
+        """追加一次快照，同一快照中重复出现的条目取最高排名，返回记录的条目数"""
+        at = at or datetime.now()
+        timestamp = int(at.timestamp())
+        latest: Dict[str, Tuple[int, int]] = {}
+        for trend in trends:
+            key = series_key(trend)
+            stars = getattr(trend, 'stars', 0) or 0
+            if key in latest:
+                rank, stars = min(latest[key][0], trend.rank), max(latest[key][1], stars)
+            else:
+                rank = trend.rank
+            latest[key] = (rank, stars)
+
+        bucket = self._bucket(platform, _month(at))
+        for key, (rank, stars) in latest.items():
+            series = bucket.setdefault(key, TrendSeries())
+            if series.times and series.times[-1] >= timestamp:
+                continue
+            series.append(timestamp, rank, stars)
+        try:
+            self._write(platform, _month(at))
+        except Exception as e:
+            logger.error(f"写入趋势历史失败: {str(e)}")
+        return len(latest)
+
+    def after_save_trends(self, trends: list, platform: str):
+        """存储钩子：每批趋势保存后追加快照"""
+        self.record(platform, trends)
+
+    def points(self, platform: str, key: str, since: datetime, until: Optional[datetime] = None) -> List[Tuple[int, int, int]]:
+        """返回时间范围内的(时间戳, 排名, 星标数)"""
+        until = until or datetime.now()
+        start, end = int(since.timestamp()), int(until.timestamp())
+        result = []
+        for month in _months_between(since, until):
+            series = self._bucket(platform, month).get(key)
+            if not series:
+                continue
+            result.extend(
+                (t, r, s) for t, r, s in zip(series.times, series.ranks, series.stars) if start <= t <= end
+            )
+        return result
+
+    def rank_trajectory(self, platform: str, url: str, period: str = '', since: Optional[datetime] = None,
+                        until: Optional[datetime] = None) -> List[Tuple[datetime, int]]:
+        """条目的排名变化轨迹，默认最近30天"""
+        since = since or datetime.now() - timedelta(days=30)
+        key = f"{url}|{period}" if period else url
+        return [(datetime.fromtimestamp(t), rank) for t, rank, _ in self.points(platform, key, since, until)]
+
+    def stars_gained(self, platform: str, hours: int = 24, now: Optional[datetime] = None,
+                     period: Optional[str] = None, top: int = 10) -> List[Tuple[str, int]]:
+        """最近hours小时内星标增长最多的条目
+
+        以窗口内第一个快照为基准，与最新快照相减；period可限定只看某个周期榜单上的条目。
+        """
+        now = now or datetime.now()
+        since = now - timedelta(hours=hours)
+        start, end = int(since.timestamp()), int(now.timestamp())
+        first: Dict[str, int] = {}
+        last: Dict[str, int] = {}
+        for month in _months_between(since, now):
+            for key, series in self._bucket(platform, month).items():
+                if period is not None and not key.endswith(f"|{period}"):
+                    continue
+                for t, stars in zip(series.times, series.stars):
+                    if start <= t <= end:
+                        first.setdefault(key, stars)
+                        last[key] = stars
+
+        gained: Dict[str, int] = {}
+        for key, stars in last.items():
+            url = key.split('|', 1)[0]
+            gained[url] = max(gained.get(url, 0), stars - first[key])
+        return sorted(gained.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    def size_bytes(self) -> int:
+        """历史文件占用的磁盘空间"""
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+
+if __name__ == "__main__":
+    from config.base_config import BaseConfig
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='查询趋势历史')
+    parser.add_argument('--platform', default='github', help='平台名')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    gained_parser = subparsers.add_parser('gained', help='最近一段时间星标增长最多的条目')
+    gained_parser.add_argument('--hours', type=int, default=24)
+    gained_parser.add_argument('--period', help='只看某个周期榜单，如daily')
+    gained_parser.add_argument('--top', type=int, default=10)
+    trajectory_parser = subparsers.add_parser('trajectory', help='条目的排名变化轨迹')
+    trajectory_parser.add_argument('url')
+    trajectory_parser.add_argument('--period', default='')
+    trajectory_parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    history = TrendHistory(BaseConfig.STORAGE_CONFIG['trend_history']['directory'])
+    if args.command == 'gained':
+        for url, gained in history.stars_gained(args.platform, args.hours, period=args.period, top=args.top):
+            print(f"{gained:>8}  {url}")
+    else:
+        since = datetime.now() - timedelta(days=args.days)
+        for moment, rank in history.rank_trajectory(args.platform, args.url, args.period, since):
+            print(f"{moment:%Y-%m-%d %H:%M}  #{rank}")
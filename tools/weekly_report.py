@@ -0,0 +1,359 @@
+"""每日汇总与周报生成
+
+DailyRollup作为存储钩子，在文章和趋势保存时增量更新当天的汇总文件
+(<reports_directory>/rollups/YYYY-MM-DD.json)：按来源、关键词、标签的文章数，
+当天的榜单快照以及GitHub仓库的首末星标数。周报任务只需读取最近7个汇总文件，
+不必重新扫描全部文章。
+
+用法:
+    python -m tools.weekly_report                 # 生成截至今天的周报
+    python -m tools.weekly_report --date 2025-03-09
+    python -m tools.weekly_report --rebuild       # 根据已存储的文章和趋势重建汇总
+"""
+import argparse
+import html
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from model.news_article import NewsArticle
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_DIRECTORY = 'rollups'
+
+
+def _empty_rollup(day: str) -> dict:
+    return {
+        'date': day,
+        'articles': 0,
+        'duplicates': 0,
+        'by_source': {},
+        'by_keyword': {},
+        'by_tag': {},
+        'top_articles': [],
+        'trends': {},
+        'repos': {},
+        'urls': []
+    }
+
+
+def _increment(counts: Dict[str, int], key: str, amount: int = 1):
+    counts[key] = counts.get(key, 0) + amount
+
+
+class DailyRollup:
+    """按天维护的预聚合数据"""
+
+    def __init__(self, reports_directory: str, top_articles: int = 50, top_trends: int = 25):
+        self.directory = os.path.join(reports_directory, ROLLUP_DIRECTORY)
+        self.top_articles = top_articles
+        self.top_trends = top_trends
+        self._day: Optional[str] = None
+        self._data: Optional[dict] = None
+        self._urls = set()
+
+    def path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{day}.json")
+
+    def load(self, day: str) -> dict:
+        """读取某天的汇总，不存在时返回空汇总"""
+        try:
+            with open(self.path(day), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return _empty_rollup(day)
+        except Exception as e:
+            logger.error(f"读取每日汇总失败: {day}, 错误: {str(e)}")
+            return _empty_rollup(day)
+
+    def _current(self, day: Optional[str] = None) -> dict:
+        day = day or date.today().isoformat()
+        if day != self._day:
+            if self._data is not None:
+                self.flush()
+            self._data = self.load(day)
+            self._urls = set(self._data['urls'])
+            self._day = day
+        return self._data
+
+    def add_article(self, article: NewsArticle, day: Optional[str] = None) -> bool:
+        """把文章计入汇总，同一天内重复保存的文章只计一次"""
+        data = self._current(day)
+        if article.url in self._urls:
+            return False
+        self._urls.add(article.url)
+        data['urls'].append(article.url)
+
+        data['articles'] += 1
+        _increment(data['by_source'], article.source)
+        if article.keyword:
+            _increment(data['by_keyword'], article.keyword)
+        for tag in article.tags:
+            _increment(data['by_tag'], tag)
+
+        if article.duplicate_of:
+            data['duplicates'] += 1
+        elif len(data['top_articles']) < self.top_articles:
+            data['top_articles'].append({
+                'title': article.title,
+                'url': article.url,
+                'source': article.source,
+                'published_date': article.published_date.isoformat() if article.published_date else None,
+                'tags': list(article.tags)
+            })
+        return True
+
+    def add_trends(self, trends: list, platform: str, day: Optional[str] = None):
+        """合并当天的榜单，保留每个条目当天的最高排名；GitHub仓库额外记录首末星标数"""
+        data = self._current(day)
+        items = {item['url']: item for item in data['trends'].get(platform, [])}
+        for trend in trends:
+            item = items.get(trend.url)
+            if item is None or trend.rank < item['rank']:
+                items[trend.url] = {'rank': trend.rank, 'name': trend.name, 'url': trend.url,
+                                    'description': trend.description[:200]}
+        data['trends'][platform] = sorted(items.values(), key=lambda item: item['rank'])[:self.top_trends]
+        for trend in trends:
+            stars = getattr(trend, 'stars', None)
+            if stars is None:
+                continue
+            repo = data['repos'].setdefault(trend.url, {
+                'name': trend.name,
+                'language': getattr(trend, 'language', ''),
+                'first_stars': stars
+            })
+            repo['last_stars'] = stars
+
+    def flush(self):
+        """原子写入当天汇总"""
+        if self._data is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(self._day)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"写入每日汇总失败: {str(e)}")
+
+    def after_save(self, article: NewsArticle):
+        """存储钩子：文章保存后更新汇总"""
+        if self.add_article(article):
+            self.flush()
+
+    def after_save_trends(self, trends: list, platform: str):
+        """存储钩子：趋势保存后更新汇总"""
+        self.add_trends(trends, platform)
+        self.flush()
+
+
+def build_weekly_summary(reports_directory: str, end: date, days: int = 7, top: int = 10) -> dict:
+    """合并最近days天的汇总"""
+    rollup = DailyRollup(reports_directory)
+    start = end - timedelta(days=days - 1)
+    summary = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days_with_data': 0,
+        'articles': 0,
+        'duplicates': 0,
+        'by_source': {},
+        'by_keyword': {},
+        'by_tag': {},
+        'top_articles': [],
+        'trends': {},
+        'repos': []
+    }
+    seen_urls = set()
+    trends: Dict[str, Dict[str, dict]] = {}
+    repos: Dict[str, dict] = {}
+
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        if not os.path.exists(rollup.path(day)):
+            continue
+        data = rollup.load(day)
+        summary['days_with_data'] += 1
+        summary['articles'] += data['articles']
+        summary['duplicates'] += data['duplicates']
+        for field in ('by_source', 'by_keyword', 'by_tag'):
+            for key, count in data[field].items():
+                _increment(summary[field], key, count)
+
+        for article in data['top_articles']:
+            if article['url'] not in seen_urls:
+                seen_urls.add(article['url'])
+                summary['top_articles'].append(article)
+
+        # 榜单：统计上榜天数和最高排名
+        for platform, items in data['trends'].items():
+            platform_items = trends.setdefault(platform, {})
+            for item in items:
+                entry = platform_items.setdefault(item['url'], dict(item, best_rank=item['rank'], days=0))
+                entry['best_rank'] = min(entry['best_rank'], item['rank'])
+                entry['days'] += 1
+
+        # 仓库星标：取一周内最早的首次值和最新的末次值
+        for url, repo in data['repos'].items():
+            entry = repos.setdefault(url, dict(repo, url=url))
+            entry['last_stars'] = repo['last_stars']
+
+    for platform, items in trends.items():
+        summary['trends'][platform] = sorted(
+            items.values(), key=lambda item: (-item['days'], item['best_rank']))[:top]
+    for repo in repos.values():
+        repo['star_delta'] = repo['last_stars'] - repo['first_stars']
+    summary['repos'] = sorted(repos.values(), key=lambda repo: repo['star_delta'], reverse=True)[:top]
+    summary['top_articles'] = summary['top_articles'][-top * 3:][::-1]
+    return summary
+
+
+def _sorted_counts(counts: Dict[str, int]) -> List[Tuple[str, int]]:
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+
+def render_markdown(summary: dict) -> str:
+    """生成Markdown周报"""
+    lines = [
+        f"# 科技趋势周报 ({summary['start']} ~ {summary['end']})",
+        "",
+        f"本周共收录 {summary['articles']} 篇文章，其中 {summary['duplicates']} 篇为近似重复。",
+        ""
+    ]
+    for title, field in (('按来源', 'by_source'), ('按搜索关键词', 'by_keyword'), ('按标签', 'by_tag')):
+        if not summary[field]:
+            continue
+        lines += [f"## {title}", "", "| 名称 | 文章数 |", "| --- | ---: |"]
+        lines += [f"| {key} | {count} |" for key, count in _sorted_counts(summary[field])]
+        lines.append("")
+
+    if summary['repos']:
+        lines += ["## 本周星标增长最多的仓库", "", "| 仓库 | 语言 | 新增星标 | 当前星标 |", "| --- | --- | ---: | ---: |"]
+        lines += [f"| [{repo['name']}]({repo['url']}) | {repo['language']} | {repo['star_delta']} | {repo['last_stars']} |"
+                  for repo in summary['repos']]
+        lines.append("")
+
+    for platform, items in summary['trends'].items():
+        lines += [f"## {platform} 榜单", ""]
+        lines += [f"{index}. [{item['name']}]({item['url']}) - 最高第{item['best_rank']}名，上榜{item['days']}天"
+                  for index, item in enumerate(items, 1)]
+        lines.append("")
+
+    if summary['top_articles']:
+        lines += ["## 文章", ""]
+        for article in summary['top_articles']:
+            tags = f" `{'` `'.join(article['tags'])}`" if article['tags'] else ''
+            lines.append(f"- [{article['title']}]({article['url']}) ({article['source']}){tags}")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def render_html(summary: dict) -> str:
+    """生成HTML周报"""
+    e = html.escape
+    parts = [
+        "<!DOCTYPE html>",
+        "<html lang=\"zh-CN\"><head><meta charset=\"utf-8\">",
+        f"<title>科技趋势周报 {e(summary['start'])} ~ {e(summary['end'])}</title>",
+        "<style>body{font-family:sans-serif;max-width:960px;margin:auto}"
+        "table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:4px 8px}</style>",
+        "</head><body>",
+        f"<h1>科技趋势周报 ({e(summary['start'])} ~ {e(summary['end'])})</h1>",
+        f"<p>本周共收录 {summary['articles']} 篇文章，其中 {summary['duplicates']} 篇为近似重复。</p>"
+    ]
+    for title, field in (('按来源', 'by_source'), ('按搜索关键词', 'by_keyword'), ('按标签', 'by_tag')):
+        if not summary[field]:
+            continue
+        parts.append(f"<h2>{title}</h2><table><tr><th>名称</th><th>文章数</th></tr>")
+        parts += [f"<tr><td>{e(key)}</td><td>{count}</td></tr>" for key, count in _sorted_counts(summary[field])]
+        parts.append("</table>")
+
+    if summary['repos']:
+        parts.append("<h2>本周星标增长最多的仓库</h2>"
+                     "<table><tr><th>仓库</th><th>语言</th><th>新增星标</th><th>当前星标</th></tr>")
+        parts += [f"<tr><td><a href=\"{e(repo['url'])}\">{e(repo['name'])}</a></td><td>{e(repo['language'])}</td>"
+                  f"<td>{repo['star_delta']}</td><td>{repo['last_stars']}</td></tr>" for repo in summary['repos']]
+        parts.append("</table>")
+
+    for platform, items in summary['trends'].items():
+        parts.append(f"<h2>{e(platform)} 榜单</h2><ol>")
+        parts += [f"<li><a href=\"{e(item['url'])}\">{e(item['name'])}</a> - 最高第{item['best_rank']}名，"
+                  f"上榜{item['days']}天</li>" for item in items]
+        parts.append("</ol>")
+
+    if summary['top_articles']:
+        parts.append("<h2>文章</h2><ul>")
+        for article in summary['top_articles']:
+            tags = ' '.join(f"<code>{e(tag)}</code>" for tag in article['tags'])
+            parts.append(f"<li><a href=\"{e(article['url'])}\">{e(article['title'])}</a> ({e(article['source'])}) {tags}</li>")
+        parts.append("</ul>")
+    parts.append("</body></html>")
+    return '\n'.join(parts)
+
+
+def generate_weekly_report(reports_directory: str, end: Optional[date] = None) -> Tuple[str, str]:
+    """生成周报，返回Markdown和HTML文件路径"""
+    end = end or date.today()
+    summary = build_weekly_summary(reports_directory, end)
+    if not summary['days_with_data']:
+        logger.warning(f"{summary['start']} ~ {summary['end']} 没有每日汇总数据，周报内容为空")
+
+    os.makedirs(reports_directory, exist_ok=True)
+    base_path = os.path.join(reports_directory, f"weekly_report_{end.isoformat()}")
+    with open(base_path + '.md', 'w', encoding='utf-8') as f:
+        f.write(render_markdown(summary))
+    with open(base_path + '.html', 'w', encoding='utf-8') as f:
+        f.write(render_html(summary))
+    logger.info(f"周报已生成: {base_path}.md, {base_path}.html")
+    return base_path + '.md', base_path + '.html'
+
+
+def rebuild_rollups(reports_directory: str, articles_path: str, trends_path: str):
+    """根据已存储的JSON文件重建每日汇总，按记录的created_at日期归档"""
+    from model.codec import from_dict, trend_from_dict, loads
+
+    rollup = DailyRollup(reports_directory)
+    if os.path.isdir(rollup.directory):
+        for name in os.listdir(rollup.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(rollup.directory, name))
+
+    def day_of(record: dict) -> str:
+        return (record.get('created_at') or datetime.now().isoformat())[:10]
+
+    with open(articles_path, 'rb') as f:
+        records = loads(f.read())
+    for record in sorted(records, key=day_of):
+        rollup.add_article(from_dict(NewsArticle, record), day_of(record))
+
+    if os.path.exists(trends_path):
+        with open(trends_path, 'rb') as f:
+            records = loads(f.read())
+        by_day: Dict[Tuple[str, str], list] = {}
+        for record in records:
+            by_day.setdefault((day_of(record), record.get('platform', '')), []).append(trend_from_dict(record))
+        for (day, platform), trends in sorted(by_day.items()):
+            rollup.add_trends(trends, platform, day)
+    rollup.flush()
+
+
+if __name__ == "__main__":
+    from config.base_config import BaseConfig
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    storage_config = BaseConfig.STORAGE_CONFIG
+    parser = argparse.ArgumentParser(description='根据每日汇总生成周报')
+    parser.add_argument('--date', type=date.fromisoformat, default=date.today(), help='周报截止日期，格式YYYY-MM-DD')
+    parser.add_argument('--rebuild', action='store_true', help='先根据已存储的文章和趋势重建每日汇总')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_rollups(storage_config['reports_directory'], storage_config['json_path'],
+                        storage_config.get('trends_json_path', 'data/trends.json'))
+    for path in generate_weekly_report(storage_config['reports_directory'], args.date):
+        print(path)
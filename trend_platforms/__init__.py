@@ -0,0 +1,99 @@
+"""趋势平台客户端注册表
+
+所有启用的平台共用一个aiohttp会话并发抓取，每个平台有独立的超时，
+单个平台失败或超时不影响其他平台。
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+from tools.fetcher import fetch_session
+from tools.http_cache import cached_session
+from tools.timing import run_timer, STAGE_TREND_FETCH
+
+logger = logging.getLogger(__name__)
+
+# 平台名 -> (模块路径, 客户端类名)，客户端需实现 async fetch(session) -> List[TrendItem]
+TREND_PLATFORM_REGISTRY = {
+    'github': ('trend_platforms.github', 'GithubClient'),
+    'huggingface': ('trend_platforms.huggingface', 'HuggingfaceClient'),
+}
+
+# 未单独配置timeout时的默认超时(秒)
+DEFAULT_TIMEOUT = 30
+
+
+def get_trend_client_class(platform: str):
+    """根据平台名获取趋势客户端类"""
+    if platform not in TREND_PLATFORM_REGISTRY:
+        raise ValueError(f"未实现的趋势平台: {platform}")
+    module_name, class_name = TREND_PLATFORM_REGISTRY[platform]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_trend_platform_configs(config) -> Dict[str, dict]:
+    """合并TREND_PLATFORMS和TREND_SITES中的平台配置，后者优先"""
+    configs = {}
+    for platform in list(config.TREND_PLATFORMS) + list(config.TREND_SITES):
+        merged = dict(config.TREND_PLATFORMS.get(platform, {}))
+        merged.update(config.TREND_SITES.get(platform, {}))
+        configs[platform] = merged
+    return configs
+
+
+async def _fetch_platform(platform: str, platform_config: dict, session) -> list:
+    """抓取单个平台，超时或出错时返回空列表"""
+    timeout = platform_config.get('timeout', DEFAULT_TIMEOUT)
+    start = time.perf_counter()
+    ok = False
+    try:
+        client = get_trend_client_class(platform)(platform_config)
+        trends = await asyncio.wait_for(client.fetch(session), timeout)
+        ok = True
+        logger.info(f"{platform} 趋势抓取完成: {len(trends)} 条, 耗时{time.perf_counter() - start:.1f}秒")
+        return trends
+    except asyncio.TimeoutError:
+        logger.error(f"{platform} 趋势抓取超时({timeout}秒)")
+        return []
+    except Exception as e:
+        logger.error(f"{platform} 趋势抓取失败: {str(e)}")
+        return []
+    finally:
+        run_timer.observe(STAGE_TREND_FETCH, time.perf_counter() - start, platform, ok=ok)
+
+
+async def fetch_trends(config, platforms: Optional[List[str]] = None, session=None) -> Dict[str, list]:
+    """并发抓取所有已启用且已实现的平台
+
+    Args:
+        config: BaseConfig
+        platforms: 只抓取指定平台，默认全部
+        session: 共享的aiohttp会话，不传时临时创建
+
+    Returns:
+        平台名 -> 趋势列表
+    """
+    selected = {}
+    for platform, platform_config in get_trend_platform_configs(config).items():
+        if platforms and platform not in platforms:
+            continue
+        if not platform_config.get('enabled', True):
+            continue
+        if platform not in TREND_PLATFORM_REGISTRY:
+            logger.warning(f"趋势平台 {platform} 尚未实现客户端，跳过")
+            continue
+        selected[platform] = platform_config
+    if not selected:
+        return {}
+
+    session = cached_session(session or fetch_session())
+    results = await asyncio.gather(*(
+        _fetch_platform(platform, platform_config, session)
+        for platform, platform_config in selected.items()
+    ))
+    return dict(zip(selected, results))
+
+
+__all__ = ['TREND_PLATFORM_REGISTRY', 'get_trend_client_class', 'get_trend_platform_configs', 'fetch_trends']
@@ -1,52 +1,119 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
+import asyncio
+import logging
+import re
 import aiohttp
 from bs4 import BeautifulSoup
 from datetime import datetime
 from model.platform_trends import GithubTrend
+from tools.fetcher import fetch_session
+
+logger = logging.getLogger(__name__)
+
+# 榜单键: (语言, 周期)，语言为空字符串表示不限语言的总榜
+TrendingKey = Tuple[str, str]
 
 class GithubClient:
-    """GitHub API客户端"""
+    """GitHub API客户端
+    
+    按 语言 × 周期(daily/weekly/monthly) 组合并发请求趋势页面，所有请求共用一个
+    连接池，HTML解析放到线程池中执行，避免阻塞事件循环。
+    """
     
     def __init__(self, config: dict):
         self.config = config
-        self.url = config['url']
-        self.max_items = config['max_items']
+        self.url = config.get('trending_url', config.get('url', 'https://github.com/trending')).rstrip('/')
+        self.max_items = config.get('max_items', 25)
+        self.languages = list(config.get('languages', []))
+        if config.get('include_all_languages', True) or not self.languages:
+            self.languages.insert(0, '')
+        self.periods = config.get('periods', ['daily'])
+        self.concurrency = config.get('concurrency', 6)
+    
+    def trending_url(self, language: str, period: str) -> str:
+        """生成指定语言和周期的趋势页面地址"""
+        path = f"{self.url}/{language}" if language else self.url
+        return f"{path}?since={period}"
+    
+    async def fetch(self, session: aiohttp.ClientSession) -> List[GithubTrend]:
+        """趋势平台统一接口，使用调用方提供的会话"""
+        return await self.get_trending_repos(session)
+    
+    async def get_trending_repos(self, session: Optional[aiohttp.ClientSession] = None) -> List[GithubTrend]:
+        """获取全部榜单的趋势仓库列表"""
+        snapshot = await self.get_trending_snapshot(session)
+        return [repo for repos in snapshot.values() for repo in repos]
+    
+    async def get_trending_snapshot(self, session: Optional[aiohttp.ClientSession] = None) -> Dict[TrendingKey, List[GithubTrend]]:
+        """并发获取所有 语言 × 周期 的榜单
+        
+        Returns:
+            (语言, 周期) -> 仓库列表，获取失败的榜单不会出现在结果中
+        """
+        session = session or fetch_session()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        keys = [(language, period) for language in self.languages for period in self.periods]
+        results = await asyncio.gather(
+            *(self._fetch_trending(session, semaphore, language, period) for language, period in keys),
+            return_exceptions=True
+        )
         
-    async def get_trending_repos(self) -> List[GithubTrend]:
-        """获取趋势仓库列表"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.url) as response:
+        snapshot = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.error(f"获取GitHub榜单失败: {self.trending_url(*key)}, 错误: {str(result)}")
+                continue
+            snapshot[key] = result
+        return snapshot
+    
+    async def _fetch_trending(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                              language: str, period: str) -> List[GithubTrend]:
+        """获取并解析单个榜单"""
+        async with semaphore:
+            async with session.get(self.trending_url(language, period)) as response:
+                response.raise_for_status()
                 html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # 提取仓库信息
-                repos = []
-                for i, repo in enumerate(soup.select('article.Box-row')):
-                    if i >= self.max_items:
-                        break
-                        
-                    name_elem = repo.select_one('h1 a')
-                    desc_elem = repo.select_one('p')
-                    lang_elem = repo.select_one('span[itemprop="programmingLanguage"]')
-                    stars_elem = repo.select_one('a.Link--muted')
-                    
-                    if not all([name_elem, desc_elem]):
-                        continue
-                        
-                    name = name_elem.text.strip()
-                    description = desc_elem.text.strip()
-                    language = lang_elem.text.strip() if lang_elem else "Unknown"
-                    stars = int(stars_elem.text.strip().replace(',', '')) if stars_elem else 0
-                    url = f"https://github.com{name_elem['href']}"
-                    
-                    repo = GithubTrend(
-                        rank=i+1,
-                        name=name,
-                        description=description,
-                        url=url,
-                        language=language,
-                        stars=stars
-                    )
-                    repos.append(repo)
-                    
-                return repos 
\ No newline at end of file
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.parse_trending, html, period)
+    
+    def parse_trending(self, html: str, period: str = '') -> List[GithubTrend]:
+        """解析趋势页面"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # 提取仓库信息
+        repos = []
+        for i, repo in enumerate(soup.select('article.Box-row')):
+            if i >= self.max_items:
+                break
+            
+            name_elem = repo.select_one('h1 a')
+            desc_elem = repo.select_one('p')
+            lang_elem = repo.select_one('span[itemprop="programmingLanguage"]')
+            stars_elem = repo.select_one('a.Link--muted')
+            period_elem = repo.select_one('span.float-sm-right')
+            
+            # 没有描述的仓库也保留
+            if not name_elem:
+                continue
+            
+            name = re.sub(r'\s+', '', name_elem.text)  # "owner / repo" -> "owner/repo"
+            description = desc_elem.text.strip() if desc_elem else ''
+            language = lang_elem.text.strip() if lang_elem else "Unknown"
+            stars = int(stars_elem.text.strip().replace(',', '')) if stars_elem else 0
+            period_match = re.search(r'[\d,]+', period_elem.text) if period_elem else None
+            period_stars = int(period_match.group().replace(',', '')) if period_match else 0
+            url = f"https://github.com{name_elem['href']}"
+            
+            repo = GithubTrend(
+                rank=i+1,
+                name=name,
+                description=description,
+                url=url,
+                language=language,
+                stars=stars,
+                period=period,
+                period_stars=period_stars
+            )
+            repos.append(repo)
+        
+        return repos
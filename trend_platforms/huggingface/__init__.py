@@ -0,0 +1,4 @@
+from .core import HuggingfaceCrawler
+from .client import HuggingfaceClient
+
+__all__ = ['HuggingfaceCrawler', 'HuggingfaceClient']
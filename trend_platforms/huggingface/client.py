@@ -0,0 +1,92 @@
+from typing import Optional, List, AsyncIterator
+import codecs
+import json
+import logging
+import re
+import aiohttp
+from model.platform_trends import HuggingfaceTrend
+from tools.fetcher import fetch_session
+
+logger = logging.getLogger(__name__)
+
+# 只请求需要的字段，减小响应体积
+EXPAND_FIELDS = ['downloads', 'likes', 'tags', 'pipeline_tag', 'trendingScore']
+
+_NEXT_LINK_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """增量解析JSON数组，每解析出一个元素就立即返回，不必等待整个响应体下载完成"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        position = 0
+        while True:
+            # 跳过空白、数组起始符和元素之间的逗号
+            while position < len(buffer) and buffer[position] in ' \t\r\n,[':
+                if buffer[position] == '[':
+                    started = True
+                position += 1
+            if position >= len(buffer) or buffer[position] == ']':
+                break
+            if not started:
+                raise ValueError("响应不是JSON数组")
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # 元素不完整，等待更多数据
+            position = end
+            yield item
+        buffer = buffer[position:]
+
+
+class HuggingfaceClient:
+    """Hugging Face模型列表JSON接口客户端"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.api_url = config.get('api_url', 'https://huggingface.co/api/models')
+        self.site_url = config.get('site_url', 'https://huggingface.co').rstrip('/')
+        self.max_items = config.get('max_items', 25)
+        self.page_size = min(config.get('page_size', 25), self.max_items)
+
+    def first_page_params(self) -> list:
+        """首页请求参数，后续页直接使用Link头中的地址"""
+        params = [('sort', 'trendingScore'), ('direction', '-1'), ('limit', str(self.page_size))]
+        params += [('expand[]', field) for field in EXPAND_FIELDS]
+        return params
+
+    async def fetch(self, session: aiohttp.ClientSession) -> List[HuggingfaceTrend]:
+        """趋势平台统一接口，使用调用方提供的会话"""
+        return await self.get_trending_models(session)
+
+    async def get_trending_models(self, session: Optional[aiohttp.ClientSession] = None) -> List[HuggingfaceTrend]:
+        """按趋势分数获取模型列表，按Link头翻页直到max_items"""
+        session = session or fetch_session()
+        models = []
+        url, params = self.api_url, self.first_page_params()
+        while url and len(models) < self.max_items:
+            async with session.get(url, params=params) as response:
+                response.raise_for_status()
+                async for item in iter_json_array(response.content.iter_chunked(16384)):
+                    models.append(self.parse_model(item, len(models) + 1))
+                    if len(models) >= self.max_items:
+                        break
+                match = _NEXT_LINK_RE.search(response.headers.get('Link', ''))
+            url, params = (match.group(1) if match else None), None
+        return models
+
+    def parse_model(self, item: dict, rank: int) -> HuggingfaceTrend:
+        """把接口返回的模型信息转换为HuggingfaceTrend"""
+        model_id = item.get('id') or item.get('modelId', '')
+        return HuggingfaceTrend(
+            rank=rank,
+            name=model_id,
+            description=item.get('pipeline_tag') or '',
+            url=f"{self.site_url}/{model_id}",
+            downloads=str(item.get('downloads', 0)),
+            tags=list(item.get('tags', []))
+        )
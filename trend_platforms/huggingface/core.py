@@ -0,0 +1,37 @@
+import logging
+from typing import List
+from base.base_crawler import AbstractCrawler
+from model.platform_trends import HuggingfaceTrend
+from .client import HuggingfaceClient
+
+logger = logging.getLogger(__name__)
+
+class HuggingfaceCrawler(AbstractCrawler):
+    """Hugging Face趋势爬虫实现"""
+    
+    site = 'huggingface'
+    
+    def __init__(self, config: dict):
+        super().__init__()
+        self.config = config
+        self.client = HuggingfaceClient(config)
+        
+    async def crawl(self) -> List[HuggingfaceTrend]:
+        """爬取Hugging Face趋势模型"""
+        try:
+            logger.info("开始爬取Hugging Face趋势模型...")
+            
+            # 通过JSON接口获取，不需要启动浏览器
+            models = await self.client.get_trending_models()
+            
+            logger.info(f"成功爬取{len(models)}个趋势模型")
+            return models
+            
+        except Exception as e:
+            logger.error(f"爬取Hugging Face趋势模型时出错: {str(e)}")
+            return []
+            
+    async def parse(self, html_content: str) -> HuggingfaceTrend:
+        """解析模型内容"""
+        # 由于解析逻辑已经在client中实现,这里直接返回None
+        return None
@@ -0,0 +1,42 @@
+"""分片爬取的任务队列
+
+各后端按名称延迟导入，例如使用SQLite队列时不会加载redis。
+    - sqlite: 单机多进程，默认
+    - redis: 多台机器共用一个Redis(或兼容Redis协议的服务)
+    - memory: 进程内队列，用于测试和单进程运行
+"""
+import importlib
+
+from .base import WorkQueue, Task, TASK_LISTING, TASK_ARTICLE, TASK_TREND, dedup_key
+
+# 队列类型 -> (模块路径, 类名)
+QUEUE_BACKENDS = {
+    'sqlite': ('work_queue.sqlite', 'SQLiteWorkQueue'),
+    'redis': ('work_queue.redis', 'RedisWorkQueue'),
+    'memory': ('work_queue.memory', 'MemoryWorkQueue'),
+}
+
+
+def get_queue_class(backend: str):
+    """根据队列类型获取队列类"""
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(f"未知的任务队列类型: {backend}")
+    module_name, class_name = QUEUE_BACKENDS[backend]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_work_queue(config: dict) -> WorkQueue:
+    """根据WORK_QUEUE_CONFIG创建任务队列"""
+    backend = config.get('backend', 'sqlite')
+    queue_class = get_queue_class(backend)
+    lease_seconds = config.get('lease_seconds', 300)
+    max_attempts = config.get('max_attempts', 3)
+    if backend == 'sqlite':
+        return queue_class(config['path'], lease_seconds, max_attempts)
+    if backend == 'redis':
+        return queue_class(config['redis_url'], config.get('redis_prefix', 'techtrend'), lease_seconds, max_attempts)
+    return queue_class(lease_seconds, max_attempts)
+
+
+__all__ = ['WorkQueue', 'Task', 'TASK_LISTING', 'TASK_ARTICLE', 'TASK_TREND', 'dedup_key',
+           'QUEUE_BACKENDS', 'get_queue_class', 'get_work_queue']
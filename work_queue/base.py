@@ -0,0 +1,116 @@
+import json
+from abc import ABC, abstractmethod
+from typing import List, Optional, Set
+
+# 任务类型
+TASK_LISTING = 'listing'  # 站点+关键词，翻页得到文章链接
+TASK_ARTICLE = 'article'  # 单篇文章
+TASK_TREND = 'trend'      # 单个趋势平台
+
+# 列表任务优先，尽快把文章链接放入队列供其他进程领取
+PRIORITIES = {TASK_LISTING: 1, TASK_TREND: 1, TASK_ARTICLE: 0}
+
+
+def dedup_key(kind: str, site: str, keyword: Optional[str] = None, url: Optional[str] = None) -> str:
+    """默认去重键：文章按URL去重，与站点和关键词无关"""
+    if kind == TASK_ARTICLE and url:
+        return f"{kind}:{url}"
+    return f"{kind}:{site}:{keyword or ''}"
+
+
+class Task:
+    """领取到的任务"""
+
+    __slots__ = ('id', 'kind', 'site', 'keyword', 'url', 'payload', 'attempts')
+
+    def __init__(self, id, kind: str, site: str, keyword: Optional[str], url: Optional[str],
+                 payload: Optional[str], attempts: int):
+        self.id = id
+        self.kind = kind
+        self.site = site
+        self.keyword = keyword or None
+        self.url = url or None
+        self.payload = json.loads(payload) if payload else {}
+        self.attempts = int(attempts)
+
+    def __repr__(self):
+        return f"Task({self.id}, {self.kind}, {self.site}, {self.keyword or self.url})"
+
+
+class WorkQueue(ABC):
+    """任务队列基类
+
+    至少一次投递：领取的任务在租约(可见性超时)内对其他进程不可见，确认前租约到期会被重新领取，
+    因此同一任务可能被处理多次，结果的保存需要幂等(存储按url upsert)。
+    任务按去重键只入队一次；确认时附带的结果进入结果通道，由协调进程取出保存。
+    """
+
+    # 能否被多个进程或多台机器共享；内存队列只能在同一进程内使用
+    shared = True
+
+    def __init__(self, lease_seconds: float = 300, max_attempts: int = 3):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def put(self, kind: str, site: str, keyword: Optional[str] = None, url: Optional[str] = None,
+            payload: Optional[dict] = None, key: Optional[str] = None, status: str = 'pending') -> bool:
+        """添加任务，去重键已存在时忽略并返回False"""
+        return self.put_many(kind, site, [(keyword, url, payload, key)], status) == 1
+
+    @abstractmethod
+    def put_many(self, kind: str, site: str, items: list, status: str = 'pending') -> int:
+        """批量添加同一站点的任务，items为(keyword, url, payload, 去重键)，去重键为None时使用dedup_key；
+        status为'done'时直接写成已完成的任务(如已存储的文章)，返回新增数量"""
+        pass
+
+    @abstractmethod
+    def lease(self, worker: str, limit: int = 1) -> List[Task]:
+        """领取任务；第一个是文章任务时，再领取同一站点、同一关键词的文章任务，最多limit个"""
+        pass
+
+    @abstractmethod
+    def extend(self, task_ids: list, worker: str):
+        """延长租约，处理时间较长的任务需要定期调用"""
+        pass
+
+    @abstractmethod
+    def ack(self, task: Task, results: Optional[List[dict]] = None):
+        """确认任务完成，结果随确认一起进入结果通道"""
+        pass
+
+    @abstractmethod
+    def nack(self, task: Task, error: str):
+        """任务失败，尝试次数未用尽时放回队列"""
+        pass
+
+    @abstractmethod
+    def known_urls(self, site: str) -> Set[str]:
+        """站点已完成(包括运行开始前已存储)的文章URL"""
+        pass
+
+    @abstractmethod
+    def take_results(self, limit: int = 100) -> List[tuple]:
+        """取出未处理的结果，返回(结果id, 任务类型, 站点, 结果)；保存后调用mark_consumed"""
+        pass
+
+    @abstractmethod
+    def mark_consumed(self, result_ids: list):
+        pass
+
+    @abstractmethod
+    def unfinished(self) -> int:
+        """待处理和处理中的任务数"""
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """各类型、各状态的任务数"""
+        pass
+
+    @abstractmethod
+    def reset(self):
+        """清空队列，开始新的一次运行"""
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,121 @@
+"""进程内任务队列
+
+语义与SQLite和Redis队列相同(租约、去重、结果通道)，数据只保存在内存中。
+用于测试和不需要多进程的本地运行，工作协程与协调者在同一个事件循环中共享同一个实例。
+"""
+import itertools
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Set
+
+from .base import WorkQueue, Task, TASK_ARTICLE, PRIORITIES, dedup_key
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryWorkQueue(WorkQueue):
+    """进程内任务队列"""
+
+    shared = False
+
+    def __init__(self, lease_seconds: float = 300, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        self.reset()
+
+    def reset(self):
+        self._ids = itertools.count(1)
+        self._tasks: Dict[int, dict] = {}
+        self._keys: Dict[str, int] = {}
+        self._results: List[tuple] = []
+        self._result_ids = itertools.count(1)
+
+    def put_many(self, kind: str, site: str, items: list, status: str = 'pending') -> int:
+        added = 0
+        for keyword, url, payload, key in items:
+            key = key or dedup_key(kind, site, keyword, url)
+            if key in self._keys:
+                continue
+            task_id = next(self._ids)
+            self._keys[key] = task_id
+            self._tasks[task_id] = {
+                'kind': kind, 'site': site, 'keyword': keyword or '', 'url': url,
+                'payload': json.dumps(payload) if payload else None, 'priority': PRIORITIES.get(kind, 0),
+                'status': status, 'attempts': 0, 'lease_until': None, 'worker': None, 'error': None
+            }
+            added += 1
+        return added
+
+    def _expire(self, now: float):
+        for task in self._tasks.values():
+            if task['status'] == 'leased' and task['lease_until'] < now and task['attempts'] >= self.max_attempts:
+                task.update(status='failed', error='lease expired')
+
+    def _available(self, task: dict, now: float) -> bool:
+        return task['status'] == 'pending' or (task['status'] == 'leased' and task['lease_until'] < now)
+
+    def lease(self, worker: str, limit: int = 1) -> List[Task]:
+        now = time.time()
+        self._expire(now)
+        candidates = sorted(
+            (task_id for task_id, task in self._tasks.items() if self._available(task, now)),
+            key=lambda task_id: (-self._tasks[task_id]['priority'], task_id)
+        )
+        if not candidates:
+            return []
+        first = self._tasks[candidates[0]]
+        chosen = [candidates[0]]
+        if first['kind'] == TASK_ARTICLE:
+            chosen += [
+                task_id for task_id in candidates[1:]
+                if (self._tasks[task_id]['kind'], self._tasks[task_id]['site'], self._tasks[task_id]['keyword'])
+                == (first['kind'], first['site'], first['keyword'])
+            ][:limit - 1]
+        leased = []
+        for task_id in chosen:
+            task = self._tasks[task_id]
+            task.update(status='leased', attempts=task['attempts'] + 1,
+                        lease_until=now + self.lease_seconds, worker=worker)
+            leased.append(Task(task_id, task['kind'], task['site'], task['keyword'], task['url'],
+                               task['payload'], task['attempts']))
+        return leased
+
+    def extend(self, task_ids: list, worker: str):
+        for task_id in task_ids:
+            task = self._tasks.get(task_id)
+            if task and task['status'] == 'leased' and task['worker'] == worker:
+                task['lease_until'] = time.time() + self.lease_seconds
+
+    def ack(self, task: Task, results: Optional[List[dict]] = None):
+        self._tasks[task.id].update(status='done', lease_until=None, error=None)
+        for result in results or []:
+            self._results.append((next(self._result_ids), task.kind, task.site, result))
+
+    def nack(self, task: Task, error: str):
+        status = 'pending' if task.attempts < self.max_attempts else 'failed'
+        self._tasks[task.id].update(status=status, lease_until=None, error=error[:500])
+        if status == 'failed':
+            logger.error(f"任务失败且不再重试: {task}, 错误: {error}")
+
+    def known_urls(self, site: str) -> Set[str]:
+        return {
+            task['url'] for task in self._tasks.values()
+            if task['kind'] == TASK_ARTICLE and task['site'] == site and task['status'] == 'done'
+        }
+
+    def take_results(self, limit: int = 100) -> List[tuple]:
+        return self._results[:limit]
+
+    def mark_consumed(self, result_ids: list):
+        consumed = set(result_ids)
+        self._results = [result for result in self._results if result[0] not in consumed]
+
+    def unfinished(self) -> int:
+        return sum(1 for task in self._tasks.values() if task['status'] in ('pending', 'leased'))
+
+    def stats(self) -> dict:
+        stats: dict = {}
+        for task in self._tasks.values():
+            counts = stats.setdefault(task['kind'], {})
+            counts[task['status']] = counts.get(task['status'], 0) + 1
+        return stats
@@ -0,0 +1,248 @@
+"""基于Redis的分布式任务队列
+
+多台机器共用一个Redis作为抓取边界(frontier)，兼容Redis协议的服务(如KeyDB、Valkey)均可使用。
+任务的状态转换(入队去重、领取、到期回收、确认、失败重试)都在Lua脚本中原子执行。
+
+键(均带前缀):
+    seq            任务id自增序列
+    dedup          去重键 -> 任务id
+    task:<id>      任务哈希
+    pending        待领取任务，按优先级和id排序
+    leased         已领取任务，分数为租约到期时间
+    counts         "类型:状态" -> 任务数
+    known:<site>   已完成的文章URL
+    results        结果通道(列表)，只由协调进程消费
+"""
+import json
+import logging
+import time
+from typing import List, Optional, Set
+
+from .base import WorkQueue, Task, PRIORITIES, dedup_key
+
+logger = logging.getLogger(__name__)
+
+# 待领取有序集合的分数：优先级高的在前，同优先级按入队顺序
+_SCORE = '(1 - priority) * 1e12 + tonumber(id)'
+
+_PUT = """
+local kind, site, status = ARGV[1], ARGV[2], ARGV[3]
+local priority = tonumber(ARGV[4])
+local added = 0
+for i = 5, #ARGV, 4 do
+    local key, keyword, url, payload = ARGV[i], ARGV[i + 1], ARGV[i + 2], ARGV[i + 3]
+    if redis.call('HSETNX', KEYS[1], key, 0) == 1 then
+        local id = redis.call('INCR', KEYS[2])
+        redis.call('HSET', KEYS[1], key, id)
+        redis.call('HSET', KEYS[5] .. id, 'kind', kind, 'site', site, 'keyword', keyword, 'url', url,
+                   'payload', payload, 'priority', priority, 'status', status, 'attempts', 0)
+        if status == 'pending' then
+            redis.call('ZADD', KEYS[3], %(score)s, id)
+        elseif status == 'done' and kind == 'article' and url ~= '' then
+            redis.call('SADD', KEYS[6] .. site, url)
+        end
+        redis.call('HINCRBY', KEYS[4], kind .. ':' .. status, 1)
+        added = added + 1
+    end
+end
+return added
+""" % {'score': _SCORE}
+
+_LEASE = """
+local now, limit = tonumber(ARGV[1]), tonumber(ARGV[2])
+local deadline, max_attempts, worker = now + tonumber(ARGV[3]), tonumber(ARGV[4]), ARGV[5]
+local prefix = KEYS[4]
+-- 回收租约到期的任务
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    local key = prefix .. id
+    local kind = redis.call('HGET', key, 'kind')
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('HINCRBY', KEYS[3], kind .. ':leased', -1)
+    if tonumber(redis.call('HGET', key, 'attempts')) >= max_attempts then
+        redis.call('HSET', key, 'status', 'failed', 'error', 'lease expired')
+        redis.call('HINCRBY', KEYS[3], kind .. ':failed', 1)
+    else
+        local priority = tonumber(redis.call('HGET', key, 'priority'))
+        redis.call('HSET', key, 'status', 'pending')
+        redis.call('ZADD', KEYS[1], %(score)s, id)
+        redis.call('HINCRBY', KEYS[3], kind .. ':pending', 1)
+    end
+end
+local candidates = redis.call('ZRANGE', KEYS[1], 0, limit * 10)
+if #candidates == 0 then
+    return {}
+end
+local first = redis.call('HMGET', prefix .. candidates[1], 'kind', 'site', 'keyword')
+local chosen = {candidates[1]}
+if first[1] == 'article' then
+    for i = 2, #candidates do
+        if #chosen >= limit then
+            break
+        end
+        local other = redis.call('HMGET', prefix .. candidates[i], 'kind', 'site', 'keyword')
+        if other[1] == first[1] and other[2] == first[2] and other[3] == first[3] then
+            table.insert(chosen, candidates[i])
+        end
+    end
+end
+for _, id in ipairs(chosen) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], deadline, id)
+    redis.call('HINCRBY', prefix .. id, 'attempts', 1)
+    redis.call('HSET', prefix .. id, 'status', 'leased', 'worker', worker)
+    redis.call('HINCRBY', KEYS[3], first[1] .. ':pending', -1)
+    redis.call('HINCRBY', KEYS[3], first[1] .. ':leased', 1)
+end
+return chosen
+""" % {'score': _SCORE}
+
+_ACK = """
+local id = ARGV[1]
+local key = KEYS[4] .. id
+local task = redis.call('HMGET', key, 'kind', 'site', 'url', 'status')
+local kind, site, url, status = task[1], task[2], task[3], task[4]
+if not kind or status == 'done' then
+    return 0
+end
+redis.call('ZREM', KEYS[1], id)
+redis.call('ZREM', KEYS[2], id)
+redis.call('HINCRBY', KEYS[3], kind .. ':' .. status, -1)
+redis.call('HINCRBY', KEYS[3], kind .. ':done', 1)
+redis.call('HSET', key, 'status', 'done')
+redis.call('HDEL', key, 'error')
+if kind == 'article' and url ~= '' then
+    redis.call('SADD', KEYS[5] .. site, url)
+end
+for i = 2, #ARGV do
+    redis.call('RPUSH', KEYS[6], ARGV[i])
+end
+return 1
+"""
+
+_NACK = """
+local id, error, max_attempts = ARGV[1], ARGV[2], tonumber(ARGV[3])
+local key = KEYS[4] .. id
+local task = redis.call('HMGET', key, 'kind', 'status', 'attempts', 'priority')
+local kind, status = task[1], task[2]
+if not kind or status ~= 'leased' then
+    return 0
+end
+redis.call('ZREM', KEYS[2], id)
+redis.call('HINCRBY', KEYS[3], kind .. ':leased', -1)
+if tonumber(task[3]) >= max_attempts then
+    redis.call('HSET', key, 'status', 'failed', 'error', error)
+    redis.call('HINCRBY', KEYS[3], kind .. ':failed', 1)
+    return -1
+end
+local priority = tonumber(task[4])
+redis.call('HSET', key, 'status', 'pending', 'error', error)
+redis.call('ZADD', KEYS[1], %(score)s, id)
+redis.call('HINCRBY', KEYS[3], kind .. ':pending', 1)
+return 1
+""" % {'score': _SCORE}
+
+
+class RedisWorkQueue(WorkQueue):
+    """多台机器共享的任务队列，结果通道只能有一个消费者(协调进程)"""
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', prefix: str = 'techtrend',
+                 lease_seconds: float = 300, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        # 延迟导入，只有使用Redis队列时才需要安装redis
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._put = self.client.register_script(_PUT)
+        self._lease = self.client.register_script(_LEASE)
+        self._ack = self.client.register_script(_ACK)
+        self._nack = self.client.register_script(_NACK)
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def reset(self):
+        keys = list(self.client.scan_iter(match=self.key('*'), count=1000))
+        for start in range(0, len(keys), 500):
+            self.client.delete(*keys[start:start + 500])
+
+    def put_many(self, kind: str, site: str, items: list, status: str = 'pending') -> int:
+        args = [kind, site, status, PRIORITIES.get(kind, 0)]
+        for keyword, url, payload, key in items:
+            args += [key or dedup_key(kind, site, keyword, url), keyword or '', url or '',
+                     json.dumps(payload) if payload else '']
+        if len(args) == 4:
+            return 0
+        return int(self._put(
+            keys=[self.key('dedup'), self.key('seq'), self.key('pending'), self.key('counts'),
+                  self.key('task:'), self.key('known:')],
+            args=args
+        ))
+
+    def lease(self, worker: str, limit: int = 1) -> List[Task]:
+        ids = self._lease(
+            keys=[self.key('pending'), self.key('leased'), self.key('counts'), self.key('task:')],
+            args=[time.time(), limit, self.lease_seconds, self.max_attempts, worker]
+        )
+        if not ids:
+            return []
+        pipeline = self.client.pipeline(transaction=False)
+        for task_id in ids:
+            pipeline.hmget(self.key(f'task:{task_id}'), 'kind', 'site', 'keyword', 'url', 'payload', 'attempts')
+        return [Task(int(task_id), *fields) for task_id, fields in zip(ids, pipeline.execute())]
+
+    def extend(self, task_ids: list, worker: str):
+        if not task_ids:
+            return
+        deadline = time.time() + self.lease_seconds
+        # xx: 只更新仍在租约中的任务
+        self.client.zadd(self.key('leased'), {str(task_id): deadline for task_id in task_ids}, xx=True)
+
+    def ack(self, task: Task, results: Optional[List[dict]] = None):
+        payloads = [json.dumps({'kind': task.kind, 'site': task.site, 'payload': result}, ensure_ascii=False)
+                    for result in results or []]
+        self._ack(
+            keys=[self.key('pending'), self.key('leased'), self.key('counts'), self.key('task:'),
+                  self.key('known:'), self.key('results')],
+            args=[task.id, *payloads]
+        )
+
+    def nack(self, task: Task, error: str):
+        outcome = self._nack(
+            keys=[self.key('pending'), self.key('leased'), self.key('counts'), self.key('task:')],
+            args=[task.id, error[:500], self.max_attempts]
+        )
+        if outcome == -1:
+            logger.error(f"任务失败且不再重试: {task}, 错误: {error}")
+
+    def known_urls(self, site: str) -> Set[str]:
+        return set(self.client.smembers(self.key(f'known:{site}')))
+
+    def take_results(self, limit: int = 100) -> List[tuple]:
+        # 结果id为列表中的位置，mark_consumed按数量从头部删除
+        results = []
+        for index, raw in enumerate(self.client.lrange(self.key('results'), 0, limit - 1)):
+            result = json.loads(raw)
+            results.append((index, result['kind'], result['site'], result['payload']))
+        return results
+
+    def mark_consumed(self, result_ids: list):
+        if result_ids:
+            self.client.ltrim(self.key('results'), len(result_ids), -1)
+
+    def unfinished(self) -> int:
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.zcard(self.key('pending'))
+        pipeline.zcard(self.key('leased'))
+        return sum(pipeline.execute())
+
+    def stats(self) -> dict:
+        stats: dict = {}
+        for field, count in self.client.hgetall(self.key('counts')).items():
+            kind, status = field.split(':', 1)
+            if int(count):
+                stats.setdefault(kind, {})[status] = int(count)
+        return stats
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,178 @@
+"""基于SQLite的本地持久化任务队列
+
+单机多进程使用：每个进程各自打开一个实例，领取任务时用BEGIN IMMEDIATE事务加锁，
+租约到期时间和结果都保存在同一个数据库文件中，协调进程重启后可以从未完成的任务继续。
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from .base import WorkQueue, Task, TASK_ARTICLE, PRIORITIES, dedup_key
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    site TEXT NOT NULL,
+    keyword TEXT,
+    url TEXT,
+    payload TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    worker TEXT,
+    error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, priority, id);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    site TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    consumed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """单机多进程共享的任务队列"""
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # 自动提交模式，写操作显式使用BEGIN IMMEDIATE，避免多个进程同时领取同一任务
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    def reset(self):
+        with self._transaction():
+            self.conn.execute('DELETE FROM tasks')
+            self.conn.execute('DELETE FROM results')
+
+    def put_many(self, kind: str, site: str, items: list, status: str = 'pending') -> int:
+        now = time.time()
+        rows = []
+        for keyword, url, payload, key in items:
+            rows.append((key or dedup_key(kind, site, keyword, url), kind, site, keyword or '', url,
+                         json.dumps(payload) if payload else None, PRIORITIES.get(kind, 0), status, now))
+        with self._transaction():
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO tasks (dedup_key, kind, site, keyword, url, payload, priority, status, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            return self.conn.total_changes - before
+
+    def lease(self, worker: str, limit: int = 1) -> List[Task]:
+        now = time.time()
+        with self._transaction():
+            # 租约到期且尝试次数用尽的任务不再重试
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?", (now, self.max_attempts))
+            available = "(status = 'pending' OR (status = 'leased' AND lease_until < ?))"
+            first = self.conn.execute(
+                f'SELECT id, kind, site, keyword FROM tasks WHERE {available} '
+                'ORDER BY priority DESC, id LIMIT 1', (now,)).fetchone()
+            if first is None:
+                return []
+            ids = [first[0]]
+            if first[1] == TASK_ARTICLE and limit > 1:
+                ids += [row[0] for row in self.conn.execute(
+                    f'SELECT id FROM tasks WHERE {available} AND kind = ? AND site = ? AND keyword = ? AND id != ? '
+                    'ORDER BY id LIMIT ?', (now, first[1], first[2], first[3], first[0], limit - 1))]
+            placeholders = ','.join('?' * len(ids))
+            self.conn.execute(
+                f"UPDATE tasks SET status = 'leased', attempts = attempts + 1, lease_until = ?, worker = ? "
+                f"WHERE id IN ({placeholders})", [now + self.lease_seconds, worker, *ids])
+            rows = self.conn.execute(
+                f'SELECT id, kind, site, keyword, url, payload, attempts FROM tasks WHERE id IN ({placeholders}) '
+                'ORDER BY id', ids).fetchall()
+        return [Task(*row) for row in rows]
+
+    def extend(self, task_ids: List[int], worker: str):
+        if not task_ids:
+            return
+        placeholders = ','.join('?' * len(task_ids))
+        with self._transaction():
+            self.conn.execute(
+                f"UPDATE tasks SET lease_until = ? WHERE status = 'leased' AND worker = ? AND id IN ({placeholders})",
+                [time.time() + self.lease_seconds, worker, *task_ids])
+
+    def ack(self, task: Task, results: Optional[List[dict]] = None):
+        # 结果与确认在同一事务中写入
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE tasks SET status = 'done', lease_until = NULL, error = NULL WHERE id = ?", (task.id,))
+            if results:
+                self.conn.executemany(
+                    'INSERT INTO results (task_id, kind, site, payload) VALUES (?, ?, ?, ?)',
+                    [(task.id, task.kind, task.site, json.dumps(result, ensure_ascii=False)) for result in results])
+
+    def nack(self, task: Task, error: str):
+        status = 'pending' if task.attempts < self.max_attempts else 'failed'
+        with self._transaction():
+            self.conn.execute(
+                'UPDATE tasks SET status = ?, lease_until = NULL, error = ? WHERE id = ?',
+                (status, error[:500], task.id))
+        if status == 'failed':
+            logger.error(f"任务失败且不再重试: {task}, 错误: {error}")
+
+    def known_urls(self, site: str) -> set:
+        return {row[0] for row in self.conn.execute(
+            "SELECT url FROM tasks WHERE kind = ? AND site = ? AND status = 'done'", (TASK_ARTICLE, site))}
+
+    def take_results(self, limit: int = 100) -> List[tuple]:
+        rows = self.conn.execute(
+            'SELECT id, kind, site, payload FROM results WHERE consumed = 0 ORDER BY id LIMIT ?', (limit,)).fetchall()
+        return [(row[0], row[1], row[2], json.loads(row[3])) for row in rows]
+
+    def mark_consumed(self, result_ids: List[int]):
+        if not result_ids:
+            return
+        placeholders = ','.join('?' * len(result_ids))
+        with self._transaction():
+            self.conn.execute(f'UPDATE results SET consumed = 1 WHERE id IN ({placeholders})', result_ids)
+
+    def unfinished(self) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def stats(self) -> dict:
+        stats: dict = {}
+        for kind, status, count in self.conn.execute(
+                'SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status'):
+            stats.setdefault(kind, {})[status] = count
+        return stats
+
+    def close(self):
+        self.conn.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE事务，出错时回滚"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False